@@ -0,0 +1,295 @@
+"""Motor del torneo de la arena, sin dependencias de interfaz gráfica.
+
+Las reglas viven aquí y tanto la aplicación de escritorio (main.py) como la de
+Streamlit (streamli_app.py) se limitan a pintar los eventos que devuelve cada
+acción del motor.
+"""
+import random
+from collections import namedtuple
+
+import trazas
+from modelo_configuracion import NIVELES, cargar_configuracion
+
+# Un evento del torneo. tipo es una de las constantes EVENTO_*; los eventos de
+# log llevan mensaje y tag, el resto lleva sus datos en un diccionario.
+Evento = namedtuple("Evento", "tipo mensaje tag datos", defaults=("", None, None))
+
+EVENTO_LOG = "log"
+EVENTO_RONDA = "ronda"
+EVENTO_REACCION = "reaccion"
+EVENTO_RECOMPENSAS = "recompensas"
+
+TIPOS_RONDA = {1: "Calentamiento", 2: "Desafío", 3: "Jefe Final"}
+
+
+def nivel_a_tier(nivel):
+    """Devuelve ((min, max), archivo, clave_recompensa) para un nivel de héroes"""
+    for tier in NIVELES:
+        rango = tier[0]
+        if rango[0] <= nivel <= rango[1]:
+            return tier
+    raise ValueError("Nivel debe estar entre 1 y 10")
+
+
+class EstadoArena:
+    """Estado de una partida"""
+
+    __slots__ = (
+        "heroes_nivel", "tier", "clave_recompensa", "ronda_actual", "encuentro_actual",
+        "encuentro", "archivo_encuentros", "acciones_heroicas", "acciones_deshonrosas", "moral_grupo",
+        "cordura", "bonif_critico", "apuesta_activa", "apuesta_monedas",
+        "juego_iniciado", "accion_disponible", "terminado", "recompensas",
+    )
+
+    def __init__(self, moral_inicial=10, cordura_inicial=10):
+        self.heroes_nivel = None
+        # Tier de modelo_configuracion: recompensa y tablas de encuentros de la partida
+        self.tier = None
+        self.clave_recompensa = None
+        self.ronda_actual = 1
+        self.encuentro_actual = None
+        self.encuentro = None
+        # Índice al catálogo compartido, no una copia de las tablas
+        self.archivo_encuentros = None
+        self.acciones_heroicas = 0
+        self.acciones_deshonrosas = 0
+        self.moral_grupo = moral_inicial
+        self.cordura = cordura_inicial
+        self.bonif_critico = False
+        self.apuesta_activa = False
+        self.apuesta_monedas = 0
+        self.juego_iniciado = False
+        self.accion_disponible = False
+        self.terminado = False
+        self.recompensas = None
+
+
+class ArenaEngine:
+    """Reglas del torneo: cada acción devuelve la lista de eventos que produjo"""
+
+    def __init__(self, reglas, rng=None):
+        self.rng = rng or random.Random()
+        self._eventos = []
+        self.usar_reglas(reglas)
+        self.estado = EstadoArena(self.moral_max, self.cordura_max)
+
+    def usar_reglas(self, reglas):
+        """Pasar a otras Reglas compiladas conservando la partida en curso"""
+        self.reglas = reglas
+        self.moral_max = reglas.moral_max
+        self.cordura_max = reglas.cordura_max
+
+    @classmethod
+    def desde_configuracion(cls, configuracion, rng=None):
+        """Crear un motor sobre una ConfiguracionApp compartida (sin leer archivos)"""
+        return cls(configuracion.reglas, rng=rng)
+
+    def usar_configuracion(self, configuracion):
+        """Pasar a otra versión de la configuración conservando la partida en curso"""
+        self.usar_reglas(configuracion.reglas)
+
+    @classmethod
+    def desde_directorio(cls, data_dir, rng=None):
+        """Crear un motor con la configuración de assets/data (o su instantánea en caché)"""
+        return cls(cargar_configuracion(data_dir).reglas, rng=rng)
+
+    # ----- utilidades internas -----
+
+    def _log(self, mensaje, tag=None):
+        self._eventos.append(Evento(EVENTO_LOG, mensaje, tag))
+
+    def _recoger_eventos(self):
+        eventos = self._eventos
+        self._eventos = []
+        return eventos
+
+    def tier(self, nivel):
+        """Tier del nivel de héroes, con sus tablas de encuentros ya compiladas"""
+        tier_por_nivel = self.reglas.tier_por_nivel
+        if not 1 <= nivel < len(tier_por_nivel) or tier_por_nivel[nivel] is None:
+            raise ValueError(f"Nivel debe estar entre 1 y {len(tier_por_nivel) - 1}")
+        tier = tier_por_nivel[nivel]
+        if tier.rondas is None:
+            raise ValueError(f"Archivo de encuentros no encontrado: {tier.archivo}")
+        return tier
+
+    # ----- acciones -----
+
+    def reiniciar(self):
+        """Volver al estado inicial"""
+        self.estado = EstadoArena(self.moral_max, self.cordura_max)
+        self._eventos = []
+
+    def iniciar_arena(self, nivel, apuesta):
+        if apuesta < 0 or apuesta > 500:
+            raise ValueError("La apuesta debe estar entre 0 y 500")
+
+        tier = self.tier(nivel)
+
+        estado = self.estado
+        estado.tier = tier
+        estado.heroes_nivel = tier.heroes_nivel
+        estado.clave_recompensa = tier.clave_recompensa
+        estado.archivo_encuentros = tier.archivo
+        estado.apuesta_monedas = apuesta
+        estado.apuesta_activa = apuesta > 0
+        estado.juego_iniciado = True
+
+        multiplicador = tier.recompensa.multiplicador_monedas
+
+        self._log("\n«¡Atención, nobles espectadores!»", "speaker")
+
+        if estado.apuesta_activa:
+            ganancia_potencial = int(estado.apuesta_monedas * multiplicador)
+            self._log(f"«¡Nuestros valientes héroes han apostado {estado.apuesta_monedas} monedas!»", "speaker")
+            self._log(f"«Si logran la victoria, obtendrán {ganancia_potencial} monedas adicionales!»", "speaker")
+        else:
+            self._log("«¡Jajaja nuestros héroes no han apostado o eso quiere decir que solo les queda la vida!»", "speaker")
+            self._log("«¡Una muestra de valentía o tal vez de locura!»", "speaker")
+
+        self._log("«¡Que comience el espectáculo!»", "speaker")
+
+        self._log(f"\n=== HÉROES DE NIVEL {estado.heroes_nivel.replace('_', '-')} ===", "titulo")
+        if estado.apuesta_activa:
+            self._log(f"¡Has apostado {estado.apuesta_monedas} monedas!", "apuesta")
+        else:
+            self._log("¡No has realizado ninguna apuesta!", "apuesta")
+
+        self._ejecutar_ronda(1)
+        return self._recoger_eventos()
+
+    def ejecutar_ronda(self, ronda):
+        self._ejecutar_ronda(ronda)
+        return self._recoger_eventos()
+
+    @trazas.span
+    def _ejecutar_ronda(self, ronda):
+        estado = self.estado
+        estado.ronda_actual = ronda
+        tipo_ronda = TIPOS_RONDA.get(ronda, "Jefe Final")
+
+        tabla = estado.tier.rondas[ronda]
+        tirada, encuentro = tabla.tirar(self.rng)
+        estado.encuentro = encuentro
+        estado.encuentro_actual = encuentro.texto
+
+        self._eventos.append(Evento(EVENTO_RONDA, datos={
+            "ronda": ronda, "tirada": tirada, "enemigos": encuentro.texto, "encuentro": encuentro
+        }))
+        self._log(f"\n=== RONDA {ronda}: {tipo_ronda.upper()} ===", "ronda")
+        self._log(f"Tirada: {tirada}", "enemigo")
+        self._mostrar_enemigos()
+        estado.bonif_critico = False
+        estado.accion_disponible = True
+
+    def _mostrar_enemigos(self):
+        self._log("\nENEMIGOS EN LA ARENA:", "enemigo")
+        for linea in self.estado.encuentro.lineas:
+            self._log(linea, "enemigo")
+
+    @trazas.span
+    def evaluar_accion(self, tipo_accion):
+        estado = self.estado
+        if tipo_accion == "heroica":
+            estado.acciones_heroicas += 1
+            tag = "heroico"
+            tabla = self.reglas.apoyo
+        else:
+            estado.acciones_deshonrosas += 1
+            tag = "deshonroso"
+            tabla = self.reglas.desprecio
+        self._actualizar_estados(tipo_accion)
+
+        reaccion = tabla.tirar(self.rng)
+
+        self._eventos.append(Evento(EVENTO_REACCION, datos={
+            "tipo_accion": tipo_accion, "id": reaccion.id, "critica": reaccion.critica
+        }))
+        self._log(f"\nLos héroes realizan una acción {tipo_accion}:", tag)
+        self._log(f"» {reaccion.efecto}", "critical" if reaccion.critica else "efecto")
+
+        self._aplicar_efecto_publico(reaccion.id, tipo_accion == "heroica")
+        estado.accion_disponible = False
+        return self._recoger_eventos()
+
+    def _aplicar_efecto_publico(self, id_efecto, es_apoyo):
+        estado = self.estado
+        if es_apoyo:
+            if id_efecto == 4:
+                estado.bonif_critico = True
+                self._log("¡BONIFICACIÓN CRÍTICA ACTIVADA!", "critical")
+            elif id_efecto == 19:
+                estado.moral_grupo = min(self.moral_max, estado.moral_grupo + 1)
+                self._log("+1 a la Moral del Grupo", "heroico")
+        else:
+            if id_efecto == 4:
+                estado.moral_grupo = max(0, estado.moral_grupo - 1)
+                self._log("-1 a la Moral del Grupo", "deshonroso")
+            elif id_efecto == 5:
+                estado.cordura = max(0, estado.cordura - 1)
+                self._log("-1 a la Cordura", "deshonroso")
+        self._actualizar_estados()
+
+    def _actualizar_estados(self, accion=None):
+        estado = self.estado
+        if accion == "heroica":
+            estado.moral_grupo = min(self.moral_max, estado.moral_grupo + self.reglas.heroico.moral)
+        elif accion == "deshonrosa":
+            estado.cordura = max(0, estado.cordura + self.reglas.deshonroso.cordura)
+
+        self._log(
+            f"\nMoral del Grupo: {estado.moral_grupo}/{self.moral_max} "
+            f"| Cordura: {estado.cordura}/{self.cordura_max}",
+            "efecto"
+        )
+
+    def _mostrar_descanso(self):
+        # Entre rondas siempre es descanso corto
+        descanso = self.reglas.descanso_corto
+
+        self._log(f"\n=== {descanso.descripcion} ===", "titulo")
+        for beneficio in descanso.beneficios:
+            self._log(beneficio, "lista")
+
+        estado = self.estado
+        estado.moral_grupo = min(self.moral_max, estado.moral_grupo + descanso.moral)
+
+        # Efecto de cordura ("1d3", "2", "1d4+1"...), compilado al cargar las reglas
+        cordura_sumada = descanso.expresion_cordura.tirar(self.rng)
+
+        estado.cordura = min(self.cordura_max, estado.cordura + cordura_sumada)
+        self._actualizar_estados()
+
+    @trazas.span
+    def siguiente_ronda(self):
+        """Descanso y siguiente ronda, o las recompensas si ya se jugó la final"""
+        estado = self.estado
+        if estado.ronda_actual < 3:
+            # Descanso después de la ronda 1 y 2
+            self._mostrar_descanso()
+            self._ejecutar_ronda(estado.ronda_actual + 1)
+        else:
+            self._calcular_recompensas()
+            estado.accion_disponible = False
+            estado.terminado = True
+        return self._recoger_eventos()
+
+    def _calcular_recompensas(self):
+        estado = self.estado
+        recompensa = (estado.tier or self.reglas.tier_por_nivel[1]).recompensa
+        multiplicador = recompensa.multiplicador_monedas
+        monedas_base = recompensa.monedas
+
+        # Solo se aplica el multiplicador si los héroes apostaron algo
+        ganancia_apuesta = 0
+        if estado.apuesta_activa and estado.apuesta_monedas > 0:
+            ganancia_apuesta = int(estado.apuesta_monedas * multiplicador)
+
+        estado.recompensas = {
+            "monedas": monedas_base + ganancia_apuesta,
+            "monedas_base": monedas_base,
+            "ganancia_apuesta": ganancia_apuesta,
+            "experiencia": recompensa.experiencia,
+            "tesoros": list(recompensa.tesoros),
+        }
+        self._eventos.append(Evento(EVENTO_RECOMPENSAS, datos=estado.recompensas))
@@ -0,0 +1,317 @@
+"""Audio de la aplicación de escritorio en un hilo propio.
+
+MotorAudio es el dueño del mixer de pygame: el hilo de la GUI solo encola
+órdenes (reproducir, pausar, efecto...) y nunca espera al audio. pygame se
+importa en ese hilo, sin su mensaje de bienvenida, la primera vez que hace
+falta.
+
+La música se decodifica una sola vez a PCM y se guarda en la caché como WAV,
+con el hash del original y el formato del mixer en el nombre, recortando el
+silencio que el codificador MP3 añade al principio y al final. Los arranques
+siguientes la reproducen en streaming desde ese WAV: el primer fotograma es
+inmediato y el bucle no tiene huecos. En el primer arranque suena el MP3
+mientras otro hilo lo decodifica, y el WAV se encola para cuando termine la
+primera vuelta. (Las dependencias no traen ningún codificador OGG; el WAV
+ocupa más en disco pero no hay que decodificarlo.)
+
+Los efectos (aplausos, abucheos, gong y fanfarria) se decodifican enteros al
+configurar el audio y quedan en memoria como pygame.Sound. Disparar uno es
+encolar una orden ya construida; el hilo de audio la atiende con
+find_channel(True) sobre un número fijo de canales, así que si todos están
+sonando el efecto nuevo sustituye al que más tiempo lleva. Al hacer clic no se
+decodifica nada ni se reservan búferes de audio.
+
+Los volúmenes salen de config/sonido.json: volumen_musica × volumen_global
+para la música y volumen_efectos × volumen_global para los efectos.
+"""
+import io
+import os
+import queue
+import threading
+from pathlib import Path
+
+from cache_disco import directorio_cache_predeterminado, hash_archivo
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+FRECUENCIA = 44100
+CANALES = 2
+# Muestras por bloque del mixer: 512 a 44,1 kHz son unos 12 ms de salida
+BUFFER_MIXER = 512
+# Valor absoluto (16 bits) por debajo del cual una muestra cuenta como silencio al recortar
+UMBRAL_SILENCIO = 4
+# Cambiar al modificar cómo se genera el WAV de la caché
+VERSION_CACHE = 1
+
+# Efectos del banco: cada uno es <nombre><extensión> en la carpeta rutas.efectos de sonido.json
+EFECTOS = ("aplausos", "abucheos", "gong", "fanfarria")
+FORMATOS = (".wav", ".ogg", ".mp3")
+# Canales del mixer para efectos; la música va aparte
+CANALES_EFECTOS = 8
+
+DETENIDA, SONANDO, PAUSADA = "detenida", "sonando", "pausada"
+
+
+class MotorAudio:
+    """Hilo de audio con cola de órdenes; los métodos públicos nunca bloquean"""
+
+    def __init__(self, paquete, ruta_musica, directorio_cache=None):
+        self.paquete = paquete
+        self.ruta_musica = Path(ruta_musica)
+        self.directorio = Path(directorio_cache or directorio_cache_predeterminado()) / "audio"
+        self._ordenes = queue.SimpleQueue()
+        self._hilo = None
+        # True solo mientras hay un hilo con el mixer funcionando: sin él, los efectos se descartan
+        self._activo = False
+        # Última orden "configurar": cada hilo nuevo la aplica al arrancar
+        self._configuracion = None
+        # Órdenes de efecto construidas una vez: dispararlos no crea objetos nuevos
+        self._ordenes_efecto = {nombre: ("efecto", nombre) for nombre in EFECTOS}
+        # Se activa cuando el mixer está inicializado y la música cargada (o ha fallado)
+        self.listo = threading.Event()
+        # Excepción del último intento de inicializar el mixer, o None
+        self.error = None
+
+        # Solo los toca el hilo de audio
+        self._mixer = None
+        self._estado = DETENIDA
+        self._en_bucle = False
+        self.volumen_global = 1.0
+        self.volumen_musica = 0.7
+        self.volumen_efectos = 0.9
+        self._directorio_efectos = None
+        self._formatos = FORMATOS
+        self.banco = {}
+
+    # ----- órdenes desde el hilo de la GUI -----
+
+    def iniciar(self):
+        """Lanzar el hilo de audio (una sola vez, o de nuevo tras un fallo)"""
+        if self._hilo is None:
+            self.error = None
+            self.listo.clear()
+            self._hilo = threading.Thread(target=self._trabajar, name="audio", daemon=True)
+            self._hilo.start()
+
+    def configurar(self, sonido_config, directorio_config=None):
+        """Aplicar sonido.json; sus rutas son relativas a directorio_config (donde está el JSON)"""
+        efectos = sonido_config.get("rutas", {}).get("efectos")
+        if efectos and directorio_config is not None:
+            efectos = Path(os.path.normpath(Path(directorio_config) / efectos))
+        else:
+            efectos = None
+        self._configuracion = (sonido_config.get("volumen_global", 1.0),
+                               sonido_config.get("volumen_musica", 1.0),
+                               sonido_config.get("volumen_efectos", 1.0),
+                               efectos,
+                               tuple(sonido_config.get("formatos_soportados", FORMATOS)))
+        # Sin hilo, la aplicará el próximo que arranque
+        if self._hilo is not None:
+            self._ordenes.put(("configurar", *self._configuracion))
+
+    def reproducir(self, reintentar=False):
+        """Empezar o reanudar la música.
+
+        Si el mixer no se pudo inicializar, solo se vuelve a intentar con
+        reintentar=True (una acción explícita del usuario), no en cada llamada.
+        """
+        if self._hilo is None and self.error is not None and not reintentar:
+            return
+        self._ordenes.put(("reproducir",))
+        self.iniciar()
+
+    def pausar(self):
+        if self._hilo is not None:
+            self._ordenes.put(("pausar",))
+
+    def efecto(self, nombre):
+        """Disparar un efecto del banco (uno de EFECTOS); sin mixer o sin el efecto, no suena nada"""
+        if self._activo:
+            self._ordenes.put(self._ordenes_efecto[nombre])
+
+    def detener(self):
+        """Parar el hilo de audio al cerrar (sin esperarlo)"""
+        self._activo = False
+        self._ordenes.put(None)
+
+    # ----- hilo de audio -----
+
+    def _trabajar(self):
+        try:
+            import pygame
+            pygame.mixer.init(FRECUENCIA, -16, CANALES, BUFFER_MIXER)
+            pygame.mixer.set_num_channels(CANALES_EFECTOS)
+            self._mixer = pygame.mixer
+            self._cargar_musica()
+        except Exception as e:
+            print(f"Error inicializando el audio con pygame: {e}")
+            self.error = e
+            # Sin mixer no se puede atender ninguna orden: se descartan las pendientes para que
+            # no suenen todas de golpe si un reintento tiene éxito
+            self._hilo = None
+            while True:
+                try:
+                    self._ordenes.get_nowait()
+                except queue.Empty:
+                    break
+            self.listo.set()
+            return
+        self._activo = True
+        if self._configuracion is not None:
+            try:
+                self._orden_configurar(*self._configuracion)
+            except Exception as e:
+                print(f"Error de audio (configurar): {e}")
+        self.listo.set()
+
+        manejadores = {
+            "configurar": self._orden_configurar,
+            "cargar_efectos": self._orden_cargar_efectos,
+            "reproducir": self._orden_reproducir,
+            "pausar": self._orden_pausar,
+            "efecto": self._orden_efecto,
+            "encolar_bucle": self._orden_encolar_bucle,
+        }
+        while True:
+            orden = self._ordenes.get()
+            if orden is None:
+                break
+            try:
+                manejadores[orden[0]](*orden[1:])
+            except Exception as e:
+                print(f"Error de audio ({orden[0]}): {e}")
+        # El mixer lo cierra pygame al salir; cerrarlo aquí a la vez que su atexit se bloquea
+        self._mixer.music.stop()
+        self._mixer.stop()
+
+    def _ruta_cache(self):
+        frecuencia, tamaño, canales = self._mixer.get_init()
+        if tamaño != -16:
+            return None
+        digest = self.paquete.hash(self.ruta_musica) or hash_archivo(self.ruta_musica)
+        nombre = f"{self.ruta_musica.stem}-{digest[:16]}-{frecuencia}hz{canales}c-v{VERSION_CACHE}.wav"
+        return self.directorio / nombre
+
+    def _cargar_musica(self):
+        if not self.paquete.existe(self.ruta_musica):
+            print("Archivo de música no encontrado")
+            return
+        cache = self._ruta_cache()
+        if cache is not None and cache.exists():
+            self._mixer.music.load(str(cache))
+            self._en_bucle = True
+            return
+
+        vista = self.paquete.vista(self.ruta_musica)
+        if vista is None:
+            self._mixer.music.load(str(self.ruta_musica))
+        else:
+            self._mixer.music.load(io.BytesIO(vista), self.ruta_musica.suffix.lstrip("."))
+        # Una sola vuelta: la siguiente ya sale del WAV sin huecos
+        self._en_bucle = cache is None
+        if cache is not None:
+            threading.Thread(target=self._transcodificar, args=(cache,), name="audio-transcodificar",
+                             daemon=True).start()
+
+    def _transcodificar(self, cache):
+        """Decodificar la música a un WAV recortado (la decodificación suelta el GIL)"""
+        try:
+            import wave
+
+            import numpy as np
+            vista = self.paquete.vista(self.ruta_musica)
+            origen = io.BytesIO(vista) if vista is not None else str(self.ruta_musica)
+            sonido = self._mixer.Sound(file=origen)
+            frecuencia, _, canales = self._mixer.get_init()
+            pcm = np.frombuffer(sonido.get_raw(), dtype=np.int16).reshape(-1, canales)
+            del sonido
+            audibles = np.flatnonzero(((pcm > UMBRAL_SILENCIO) | (pcm < -UMBRAL_SILENCIO)).any(axis=1))
+            if len(audibles):
+                pcm = pcm[audibles[0]:audibles[-1] + 1]
+
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            for antiguo in self.directorio.glob(f"{self.ruta_musica.stem}-*.wav"):
+                antiguo.unlink()
+            tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+            with wave.open(str(tmp), "wb") as salida:
+                salida.setnchannels(canales)
+                salida.setsampwidth(2)
+                salida.setframerate(frecuencia)
+                salida.writeframes(pcm.tobytes())
+            os.replace(tmp, cache)
+            self._ordenes.put(("encolar_bucle", str(cache)))
+        except Exception as e:
+            print(f"Error preparando la música en la caché: {e}")
+            self._ordenes.put(("encolar_bucle", None))
+
+    def _aplicar_volumen(self):
+        self._mixer.music.set_volume(self.volumen_musica * self.volumen_global)
+        volumen_efectos = self.volumen_efectos * self.volumen_global
+        for sonido in self.banco.values():
+            sonido.set_volume(volumen_efectos)
+
+    def _orden_configurar(self, volumen_global, volumen_musica, volumen_efectos, directorio_efectos, formatos):
+        self.volumen_global = min(max(float(volumen_global), 0.0), 1.0)
+        self.volumen_musica = min(max(float(volumen_musica), 0.0), 1.0)
+        self.volumen_efectos = min(max(float(volumen_efectos), 0.0), 1.0)
+        self._aplicar_volumen()
+        if directorio_efectos != self._directorio_efectos or formatos != self._formatos:
+            self._directorio_efectos, self._formatos = directorio_efectos, formatos
+            # Al final de la cola: que la música empiece antes de decodificar los efectos
+            self._ordenes.put(("cargar_efectos",))
+
+    def _orden_cargar_efectos(self):
+        if self._directorio_efectos is None:
+            return
+        banco = {}
+        faltan = []
+        for nombre in EFECTOS:
+            for extension in self._formatos:
+                ruta = self._directorio_efectos / f"{nombre}{extension}"
+                if not self.paquete.existe(ruta):
+                    continue
+                try:
+                    vista = self.paquete.vista(ruta)
+                    banco[nombre] = self._mixer.Sound(file=io.BytesIO(vista) if vista is not None else str(ruta))
+                    break
+                except Exception as e:
+                    print(f"Error cargando el efecto {ruta.name}: {e}")
+            else:
+                faltan.append(nombre)
+        self.banco = banco
+        self._aplicar_volumen()
+        if faltan:
+            print(f"Efectos de sonido no encontrados en {self._directorio_efectos}: {', '.join(faltan)}")
+
+    def _orden_efecto(self, nombre):
+        sonido = self.banco.get(nombre)
+        if sonido is not None:
+            # Con force=True, si no hay canal libre devuelve el que más tiempo lleva sonando
+            self._mixer.find_channel(True).play(sonido)
+
+    def _orden_reproducir(self):
+        if self._estado == PAUSADA:
+            self._mixer.music.unpause()
+        elif self._estado == DETENIDA:
+            self._aplicar_volumen()
+            self._mixer.music.play(-1 if self._en_bucle else 0)
+        self._estado = SONANDO
+
+    def _orden_pausar(self):
+        if self._estado == SONANDO:
+            self._mixer.music.pause()
+            self._estado = PAUSADA
+
+    def _orden_encolar_bucle(self, ruta):
+        """Tras la primera vuelta del MP3, seguir en bucle desde el WAV (o el MP3 si falló)"""
+        if ruta is None:
+            vista = self.paquete.vista(self.ruta_musica)
+            origen = io.BytesIO(vista) if vista is not None else str(self.ruta_musica)
+            pista = self.ruta_musica.suffix.lstrip(".")
+        else:
+            origen, pista = ruta, ""
+        if self._estado == DETENIDA:
+            self._mixer.music.load(origen, pista)
+        else:
+            self._mixer.music.queue(origen, pista, -1)
+        self._en_bucle = True
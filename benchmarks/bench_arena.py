@@ -0,0 +1,366 @@
+"""Suite de benchmarks de la arena: arranque, imágenes, relayout, log, torneo y Streamlit.
+
+Casos (todos con la plataforma Qt offscreen):
+
+- arranque_frio / arranque_caliente: proceso nuevo hasta que ArenaApp es
+  interactiva, con la caché en disco vacía o ya poblada.
+- cargar_imagen_* / escalar_imagen_*: una llamada, sin y con la imagen en la
+  caché de pixmaps (en frío, escalar_imagen lee de la caché en disco).
+- relayout: un relayout completo tras cambiar el tamaño de la ventana.
+- log_1000: 1000 mensajes en el log, hasta que están en el documento.
+- torneo: iniciar_arena y siguiente_ronda x3.
+- streamlit_rerun: un rerun de streamli_app.py con AppTest.
+
+Cada caso se repite y se guardan la mediana, el mínimo y el máximo en ms.
+Con --baseline se compara con un JSON guardado con --guardar-baseline, y el
+proceso termina con código 1 si el mínimo de algún caso supera el de la
+baseline por más de su umbral (y por más de `margen_ms`, para no saltar por
+ruido en los casos de microsegundos). Se compara el mínimo y no la mediana
+porque el ruido de la máquina (otros procesos, frecuencia de la CPU) solo
+suma tiempo: la mediana de unas pocas repeticiones varía x2 entre ejecuciones
+sin cambiar el código, el mínimo de muchas apenas se mueve.
+
+Los tiempos absolutos solo valen para la máquina en la que se midieron:
+baseline.json se debe regenerar con --guardar-baseline en cada máquina (o
+runner de CI) que vaya a usarlo como referencia. Para tolerar algo de
+diferencia entre máquinas y entre momentos de carga, cada ejecución mide
+también una calibración fija de Python puro y escala los tiempos de la
+baseline por el cociente entre su calibración y la guardada.
+
+Uso:
+    python benchmarks/bench_arena.py [--repeticiones 5] [--casos log_1000,torneo]
+        [--salida resultados.json] [--baseline benchmarks/baseline.json]
+        [--guardar-baseline benchmarks/baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+VERSION_RESULTADOS = 2
+UMBRAL_POR_DEFECTO = 1.30
+MARGEN_MS = 0.5
+REPETICIONES = 10
+IMAGEN = "pergamino.png"
+# El coste de pintar crece mucho con el tamaño de la ventana: todos los casos parten de aquí
+TAMAÑO_BASE = (1280, 720)
+# Hilos que la aplicación lanza al volverse interactiva; se esperan antes de medir
+HILOS_ARRANQUE = ("audio-transcodificar", "verificar-paquete")
+
+# Proceso hijo para el arranque: imprime los tiempos en una línea JSON
+_ARRANQUE = """
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+from PyQt6.QtWidgets import QApplication
+import main
+app = QApplication(sys.argv)
+ventana = main.ArenaApp()
+ventana.show()
+limite = time.perf_counter() + 30
+while ventana.tiempo_interactivo is None and time.perf_counter() < limite:
+    app.processEvents()
+    time.sleep(0.001)
+print(json.dumps({{"interactivo_ms": (ventana.tiempo_interactivo or float("nan")) * 1000,
+                   "primer_pintado_ms": (ventana.tiempo_primer_pintado or float("nan")) * 1000}}))
+ventana.close()
+"""
+
+
+def _resumen(muestras_ms):
+    return {
+        "mediana_ms": round(statistics.median(muestras_ms), 4),
+        "min_ms": round(min(muestras_ms), 4),
+        "max_ms": round(max(muestras_ms), 4),
+        "repeticiones": len(muestras_ms),
+    }
+
+
+def _medir(funcion, repeticiones, preparar=None, calentamiento=1):
+    """Resumen de `repeticiones` llamadas, tras `calentamiento` llamadas sin medir"""
+    muestras = []
+    for i in range(calentamiento + repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        if i >= calentamiento:
+            muestras.append((time.perf_counter() - inicio) * 1000)
+    return _resumen(muestras)
+
+
+def calibrar(repeticiones=15):
+    """Mínimo en ms de una carga fija de Python puro, para normalizar entre máquinas"""
+    def carga():
+        tabla = {}
+        for i in range(100_000):
+            tabla[i % 1000] = tabla.get(i % 1000, 0) + i * 3 // 7
+        return sorted(tabla.values())
+    return _medir(carga, repeticiones)["min_ms"]
+
+
+# ----- casos -----
+
+def _arranque(repeticiones, caliente):
+    muestras = []
+    with tempfile.TemporaryDirectory(prefix="arena-bench-") as directorio:
+        entorno = dict(os.environ, ARENA_CACHE_DIR=directorio)
+        codigo = _ARRANQUE.format(raiz=str(RAIZ))
+        if caliente:
+            # Una primera ejecución para poblar la caché en disco y la del catálogo
+            subprocess.run([sys.executable, "-c", codigo], env=entorno, capture_output=True, timeout=120)
+        for i in range(repeticiones):
+            if not caliente:
+                entorno["ARENA_CACHE_DIR"] = os.path.join(directorio, f"frio-{i}")
+            salida = subprocess.run([sys.executable, "-c", codigo], env=entorno,
+                                    capture_output=True, text=True, timeout=120)
+            # Los hilos lanzados al volverse interactiva pueden escribir después del JSON
+            lineas = [linea for linea in salida.stdout.splitlines() if linea.startswith("{")]
+            if salida.returncode != 0 or not lineas:
+                raise RuntimeError(f"El arranque falló:\n{salida.stderr[-2000:]}")
+            muestras.append(json.loads(lineas[-1])["interactivo_ms"])
+    return _resumen(muestras)
+
+
+class _Ventana:
+    """Una ArenaApp compartida por los casos que se miden en este proceso"""
+
+    def __init__(self):
+        from PyQt6.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication(sys.argv)
+        import main
+        self.main = main
+        self.ventana = main.ArenaApp()
+        self.ventana.resize(*TAMAÑO_BASE)
+        self.ventana.show()
+        # Sin decodificaciones en segundo plano que se cuelen en las medidas
+        limite = time.perf_counter() + 30
+        while self.ventana.tiempo_interactivo is None and time.perf_counter() < limite:
+            self.app.processEvents()
+            time.sleep(0.001)
+        # Ni el arranque del audio ni la verificación del paquete, que empiezan al ser interactiva
+        self.ventana.audio.listo.wait(timeout=30)
+        for hilo in threading.enumerate():
+            if hilo.name in HILOS_ARRANQUE:
+                hilo.join(timeout=30)
+        self.app.processEvents()
+
+    def restablecer(self):
+        """Mismo punto de partida para cada caso: tamaño base, log vacío y partida nueva"""
+        ventana = self.ventana
+        ventana.resize(*TAMAÑO_BASE)
+        if ventana.relayout_timer is not None:
+            ventana.relayout_timer.stop()
+        ventana._ejecutar_relayout()
+        ventana.registro_log.limpiar()
+        ventana.motor.reiniciar()
+        self.app.processEvents()
+
+
+def _imagenes(v, repeticiones):
+    from PyQt6.QtGui import QPixmapCache
+    ventana, cache = v.ventana, v.main.CACHE_PIXMAPS
+
+    def vaciar():
+        # QPixmap(ruta) pasa también por la QPixmapCache de Qt
+        cache.invalidar()
+        QPixmapCache.clear()
+    return {
+        "cargar_imagen_frio": _medir(lambda: ventana.cargar_imagen(IMAGEN), repeticiones, vaciar),
+        "cargar_imagen_caliente": _medir(lambda: ventana.cargar_imagen(IMAGEN), repeticiones),
+        "escalar_imagen_frio": _medir(lambda: ventana.escalar_imagen(IMAGEN, (400, 300)), repeticiones, vaciar),
+        "escalar_imagen_caliente": _medir(lambda: ventana.escalar_imagen(IMAGEN, (400, 300)), repeticiones),
+    }
+
+
+def _relayout(v, repeticiones):
+    ventana = v.ventana
+    tamaños = [TAMAÑO_BASE, (1600, 900)]
+
+    def preparar():
+        tamaños.reverse()
+        ventana.resize(*tamaños[0])
+        if ventana.relayout_timer is not None:
+            ventana.relayout_timer.stop()
+    return {"relayout": _medir(ventana._ejecutar_relayout, repeticiones, preparar)}
+
+
+def _log(v, repeticiones):
+    ventana = v.ventana
+    mensajes = [(f"Mensaje de prueba número {i} con algo de texto para el log", "efecto") for i in range(1000)]
+
+    def añadir():
+        for mensaje, tag in mensajes:
+            ventana.mostrar_mensaje_log(mensaje, tag)
+        ventana.registro_log.volcar()
+        v.app.processEvents()
+    return {"log_1000": _medir(añadir, repeticiones, ventana.registro_log.limpiar)}
+
+
+def _torneo(v, repeticiones):
+    ventana = v.ventana
+
+    def preparar():
+        ventana.motor.reiniciar()
+        ventana.registro_log.limpiar()
+
+    def torneo():
+        ventana.iniciar_arena()
+        for _ in range(3):
+            ventana.siguiente_ronda()
+        v.app.processEvents()
+    return {"torneo": _medir(torneo, repeticiones, preparar)}
+
+
+def _streamlit(repeticiones):
+    from streamlit.testing.v1 import AppTest
+    prueba = AppTest.from_file(str(RAIZ / "streamli_app.py"), default_timeout=60).run()
+    if prueba.exception:
+        raise RuntimeError(f"streamli_app.py falló: {prueba.exception}")
+    return {"streamlit_rerun": _medir(prueba.run, repeticiones)}
+
+
+CASOS = ("arranque_frio", "arranque_caliente", "imagenes", "relayout", "log_1000", "torneo", "streamlit_rerun")
+
+
+def ejecutar(casos, repeticiones):
+    resultados, omitidos = {}, {}
+    ventana = None
+    for caso in casos:
+        try:
+            if caso == "arranque_frio":
+                resultados[caso] = _arranque(repeticiones, caliente=False)
+            elif caso == "arranque_caliente":
+                resultados[caso] = _arranque(repeticiones, caliente=True)
+            elif caso == "streamlit_rerun":
+                resultados.update(_streamlit(repeticiones))
+            else:
+                ventana = ventana or _Ventana()
+                ventana.restablecer()
+                funcion = {"imagenes": _imagenes, "relayout": _relayout,
+                           "log_1000": _log, "torneo": _torneo}[caso]
+                # Los casos baratos se repiten más para que el mínimo sea estable
+                resultados.update(funcion(ventana, repeticiones * 4))
+        except Exception as e:
+            omitidos[caso] = str(e)
+            print(f"Error en el caso {caso}: {e}")
+    return resultados, omitidos
+
+
+def _entorno():
+    entorno = {"python": platform.python_version(), "plataforma": platform.platform(),
+               "procesador": platform.processor() or platform.machine()}
+    try:
+        from PyQt6.QtCore import QT_VERSION_STR
+        entorno["qt"] = QT_VERSION_STR
+    except ImportError:
+        pass
+    try:
+        import streamlit
+        entorno["streamlit"] = streamlit.__version__
+    except ImportError:
+        pass
+    return entorno
+
+
+def comparar(resultados, baseline, calibracion=None):
+    """Lista de (caso, mínimo, mínimo de referencia escalado, umbral) que empeoran"""
+    umbral_defecto = baseline.get("umbral_por_defecto", UMBRAL_POR_DEFECTO)
+    margen = baseline.get("margen_ms", MARGEN_MS)
+    # Máquina (o momento) más lenta o más rápida que la de la baseline
+    escala = 1.0
+    if calibracion and baseline.get("calibracion_ms"):
+        escala = calibracion / baseline["calibracion_ms"]
+    regresiones = []
+    for caso, referencia in baseline.get("casos", {}).items():
+        actual = resultados.get(caso)
+        if actual is None or "min_ms" not in referencia:
+            continue
+        umbral = referencia.get("umbral", umbral_defecto)
+        base = referencia["min_ms"] * escala
+        limite = max(base * umbral, base + margen)
+        if actual["min_ms"] > limite:
+            regresiones.append((caso, actual["min_ms"], base, umbral))
+    return regresiones
+
+
+def guardar_baseline(ruta, resultados, calibracion):
+    """Guardar los mínimos actuales conservando los umbrales ya ajustados a mano"""
+    ruta = Path(ruta)
+    anterior = json.loads(ruta.read_text(encoding="utf-8")) if ruta.exists() else {}
+    casos = anterior.get("casos", {})
+    for caso, resultado in resultados.items():
+        umbral = casos.get(caso, {}).get("umbral")
+        casos[caso] = {"min_ms": resultado["min_ms"], **({"umbral": umbral} if umbral else {})}
+    baseline = {
+        "umbral_por_defecto": anterior.get("umbral_por_defecto", UMBRAL_POR_DEFECTO),
+        "margen_ms": anterior.get("margen_ms", MARGEN_MS),
+        "calibracion_ms": calibracion,
+        "entorno": _entorno(),
+        "casos": dict(sorted(casos.items())),
+    }
+    ruta.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--casos", default=",".join(CASOS),
+                        help=f"casos separados por comas ({', '.join(CASOS)})")
+    parser.add_argument("--salida", help="JSON con los resultados")
+    parser.add_argument("--baseline", help="JSON de referencia con el que comparar")
+    parser.add_argument("--guardar-baseline", metavar="RUTA", help="guardar los resultados como referencia")
+    args = parser.parse_args()
+
+    casos = [caso.strip() for caso in args.casos.split(",") if caso.strip()]
+    desconocidos = set(casos) - set(CASOS)
+    if desconocidos:
+        parser.error(f"Casos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    calibracion = calibrar()
+    resultados, omitidos = ejecutar(casos, args.repeticiones)
+
+    print(f"{'caso':<26}{'mediana ms':>12}{'mín ms':>10}{'máx ms':>10}")
+    for caso, r in resultados.items():
+        print(f"{caso:<26}{r['mediana_ms']:>12.3f}{r['min_ms']:>10.3f}{r['max_ms']:>10.3f}")
+
+    print(f"{'calibración':<26}{calibracion:>32.3f}")
+
+    informe = {"version": VERSION_RESULTADOS, "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "entorno": _entorno(), "calibracion_ms": calibracion, "casos": resultados, "omitidos": omitidos}
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(informe, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    if args.guardar_baseline:
+        guardar_baseline(args.guardar_baseline, resultados, calibracion)
+
+    codigo = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if baseline.get("entorno") != _entorno():
+            print("Aviso: la baseline se generó en otro entorno; regenérala en esta máquina con "
+                  "--guardar-baseline para que la comparación tenga sentido")
+        regresiones = comparar(resultados, baseline, calibracion)
+        for caso, actual, referencia, umbral in regresiones:
+            print(f"REGRESIÓN {caso}: mínimo {actual:.3f} ms frente a {referencia:.3f} ms (umbral x{umbral})")
+        if regresiones:
+            codigo = 1
+        else:
+            print("Sin regresiones respecto a la baseline")
+    if omitidos:
+        codigo = codigo or 2
+    sys.exit(codigo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Coste por tirada de las expresiones de dados.
+
+Compara rng.randint directo, el antiguo split("d") del descanso, las
+expresiones compiladas (con y sin pasar por la caché de compilar) y las
+tiradas por lotes con NumPy.
+
+Uso:
+    python benchmarks/bench_dados.py [--tiradas 200000]
+"""
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import dados  # noqa: E402
+
+EXPRESIONES = ("1d3", "1d4+1", "4d6kh3", "2-5")
+
+
+def _split_antiguo(expresion, rng):
+    # Lo que hacía _mostrar_descanso antes del compilador
+    if "d" in expresion:
+        return rng.randint(1, int(expresion.split("d")[1]))
+    return int(expresion)
+
+
+def _ns_por_llamada(funcion, tiradas):
+    repeticiones = timeit.repeat(funcion, number=tiradas, repeat=5)
+    return min(repeticiones) / tiradas * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiradas", type=int, default=200_000)
+    args = parser.parse_args()
+    n = args.tiradas
+
+    rng = random.Random(1)
+    generador = np.random.default_rng(1)
+
+    print(f"{'caso':<34}{'ns/tirada':>12}")
+    print(f"{'rng.randint(1, 3)':<34}{_ns_por_llamada(lambda: rng.randint(1, 3), n):>12.0f}")
+    print(f"{'split antiguo 1d3':<34}{_ns_por_llamada(lambda: _split_antiguo('1d3', rng), n):>12.0f}")
+    for texto in EXPRESIONES:
+        expresion = dados.compilar(texto)
+        tirar = expresion.tirar
+        print(f"{'compilada ' + texto:<34}{_ns_por_llamada(lambda: tirar(rng), n):>12.0f}")
+        print(f"{'dados.tirar ' + texto + ' (caché)':<34}"
+              f"{_ns_por_llamada(lambda: dados.tirar(texto, rng), n):>12.0f}")
+        segundos = min(timeit.repeat(lambda: expresion.lote(n, generador), number=1, repeat=5))
+        print(f"{'lote NumPy ' + texto:<34}{segundos / n * 1e9:>12.1f}")
+
+    dados.compilar.cache_clear()
+    segundos = min(timeit.repeat(lambda: (dados.compilar.cache_clear(), dados.compilar("4d6kh3")),
+                                 number=1000, repeat=5))
+    print(f"{'compilar 4d6kh3 (sin caché)':<34}{segundos / 1000 * 1e9:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Informe de tiempos de importación de main.py y presupuesto para el arranque.
+
+Ejecuta `python -X importtime -c "import main"` en procesos nuevos, se queda
+con el subárbol de main y resume por módulo (tiempo propio y acumulado, en
+mediana de las repeticiones): el total, cada importación directa de main y
+los módulos más lentos. Termina con código 1 si se supera el presupuesto:
+
+- total_ms: tiempo acumulado de `import main`.
+- modulos: tiempo acumulado máximo de algunas importaciones directas.
+- prohibidos: módulos que no deben importarse al arrancar (pygame, numpy,
+  subprocess...); esta comprobación no depende del ruido de la máquina.
+
+Uso:
+    python benchmarks/presupuesto_importacion.py [--repeticiones 5] [--salida informe.json]
+        [--presupuesto benchmarks/presupuesto_importacion.json]
+        [--guardar-presupuesto benchmarks/presupuesto_importacion.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+PRESUPUESTO_PREDETERMINADO = Path(__file__).resolve().parent / "presupuesto_importacion.json"
+# Al guardar el presupuesto: margen sobre las medianas medidas
+HOLGURA = 1.5
+MODULO = "main"
+
+
+def _medir_una_vez():
+    """{módulo: (propio ms, acumulado ms, profundidad)} del subárbol de `import main`"""
+    entorno = {**os.environ, "QT_QPA_PLATFORM": "offscreen"}
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {MODULO}"],
+                             cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True)
+    modulos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        profundidad = (len(nombre) - len(nombre.lstrip(" ")) - 1) // 2
+        nombre = nombre.strip()
+        if profundidad == 0 and nombre != MODULO:
+            # Importado antes que main (site, sitecustomize...): no cuenta
+            modulos.clear()
+            continue
+        modulos[nombre] = (int(propio) / 1000, int(acumulado) / 1000, profundidad)
+        if nombre == MODULO:
+            break
+    return modulos
+
+
+def medir(repeticiones):
+    muestras = [_medir_una_vez() for _ in range(repeticiones)]
+    # Un módulo ausente en alguna repetición cuenta como 0 en esa repetición
+    nombres = set().union(*muestras)
+    resumen = {}
+    for nombre in nombres:
+        propios = [m[nombre][0] if nombre in m else 0.0 for m in muestras]
+        acumulados = [m[nombre][1] if nombre in m else 0.0 for m in muestras]
+        profundidad = next(m[nombre][2] for m in muestras if nombre in m)
+        resumen[nombre] = {"propio_ms": round(statistics.median(propios), 3),
+                           "acumulado_ms": round(statistics.median(acumulados), 3),
+                           "profundidad": profundidad}
+    return resumen
+
+
+def comparar(resumen, presupuesto):
+    """Lista de mensajes, uno por cada parte del presupuesto que se supera"""
+    fallos = []
+    total = resumen[MODULO]["acumulado_ms"]
+    if "total_ms" in presupuesto and total > presupuesto["total_ms"]:
+        fallos.append(f"import {MODULO}: {total:.1f} ms, presupuesto {presupuesto['total_ms']:.1f} ms")
+    for nombre, limite in presupuesto.get("modulos", {}).items():
+        actual = resumen.get(nombre, {}).get("acumulado_ms", 0.0)
+        if actual > limite:
+            fallos.append(f"{nombre}: {actual:.1f} ms, presupuesto {limite:.1f} ms")
+    for nombre in presupuesto.get("prohibidos", []):
+        if nombre in resumen:
+            fallos.append(f"{nombre} se importa al arrancar ({resumen[nombre]['acumulado_ms']:.1f} ms)")
+    return fallos
+
+
+def guardar_presupuesto(ruta, resumen):
+    """Presupuesto con HOLGURA sobre lo medido, conservando la lista de prohibidos"""
+    ruta = Path(ruta)
+    anterior = json.loads(ruta.read_text(encoding="utf-8")) if ruta.exists() else {}
+    directas = {nombre: datos for nombre, datos in resumen.items() if datos["profundidad"] == 1}
+    presupuesto = {
+        "total_ms": round(resumen[MODULO]["acumulado_ms"] * HOLGURA, 1),
+        "modulos": {nombre: round(max(datos["acumulado_ms"] * HOLGURA, 1.0), 1)
+                    for nombre, datos in sorted(directas.items())
+                    if nombre in anterior.get("modulos", {}) or datos["acumulado_ms"] >= 1.0},
+        "prohibidos": anterior.get("prohibidos", []),
+    }
+    ruta.write_text(json.dumps(presupuesto, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--mas-lentos", type=int, default=15, help="módulos a listar por tiempo propio")
+    parser.add_argument("--salida", help="JSON con el informe por módulo")
+    parser.add_argument("--presupuesto", default=PRESUPUESTO_PREDETERMINADO, help="JSON con el presupuesto")
+    parser.add_argument("--guardar-presupuesto", metavar="RUTA", help="guardar lo medido (con holgura) como presupuesto")
+    args = parser.parse_args()
+
+    resumen = medir(args.repeticiones)
+
+    print(f"import {MODULO}: {resumen[MODULO]['acumulado_ms']:.1f} ms (mediana de {args.repeticiones})")
+    print(f"\n{'importación directa':<36}{'acumulado ms':>14}")
+    directas = sorted(((n, d) for n, d in resumen.items() if d["profundidad"] == 1),
+                      key=lambda item: -item[1]["acumulado_ms"])
+    for nombre, datos in directas:
+        print(f"{nombre:<36}{datos['acumulado_ms']:>14.2f}")
+    print(f"\n{'módulo':<36}{'propio ms':>14}")
+    for nombre, datos in sorted(resumen.items(), key=lambda item: -item[1]["propio_ms"])[:args.mas_lentos]:
+        print(f"{nombre:<36}{datos['propio_ms']:>14.2f}")
+
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(dict(sorted(resumen.items())), indent=2, ensure_ascii=False) + "\n",
+                                     encoding="utf-8")
+    if args.guardar_presupuesto:
+        guardar_presupuesto(args.guardar_presupuesto, resumen)
+
+    codigo = 0
+    ruta_presupuesto = Path(args.presupuesto)
+    if ruta_presupuesto.exists():
+        fallos = comparar(resumen, json.loads(ruta_presupuesto.read_text(encoding="utf-8")))
+        for fallo in fallos:
+            print(f"PRESUPUESTO SUPERADO {fallo}")
+        if fallos:
+            codigo = 1
+        else:
+            print("\nDentro del presupuesto de importación")
+    sys.exit(codigo)
+
+
+if __name__ == "__main__":
+    main()
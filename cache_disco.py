@@ -0,0 +1,224 @@
+"""Caché persistente en disco de imágenes ya decodificadas y escaladas.
+
+Cada entrada guarda los píxeles crudos de una imagen escalada precedidos de
+una cabecera fija, de modo que en el siguiente arranque se puede proyectar el
+archivo con mmap y construir un QImage sobre él sin decodificar el PNG ni
+copiar los píxeles. Las entradas se agrupan por cubeta de escala y
+device pixel ratio, y su nombre incluye el hash del archivo original, por lo
+que un cambio en el PNG invalida automáticamente las entradas antiguas.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+# magia, versión, ancho, alto, bytes por línea, formato de píxel
+CABECERA = struct.Struct("<4sHHIIII")
+MAGIA = b"ARNI"
+VERSION = 1
+EXTENSION = ".img"
+
+
+def directorio_cache_predeterminado():
+    """Directorio raíz de las cachés en disco (configurable con ARENA_CACHE_DIR)"""
+    return Path(os.environ.get("ARENA_CACHE_DIR", Path.home() / ".cache" / "detion_arena"))
+
+
+def cubeta_escala(scale_factor, dpr=1.0):
+    """Nombre de la cubeta de escala y device pixel ratio (pasos de 0.05)"""
+    return f"escala_{round(scale_factor * 20) / 20:.2f}_dpr_{dpr:.2f}"
+
+
+def huella_origen(ruta):
+    """Identificador corto de un directorio de origen.
+
+    Las cachés que sustituyen sus entradas antiguas solo borran las del mismo
+    origen: dos copias del proyecto (o la app de escritorio y la de Streamlit
+    sobre datos distintos) comparten el directorio de caché sin pisarse.
+    """
+    return hashlib.sha1(str(Path(ruta).resolve()).encode()).hexdigest()[:12]
+
+
+def leer_json(ruta, paquete=None):
+    """Leer un JSON de datos, del PaqueteRecursos si se pasa uno"""
+    if paquete is not None:
+        return json.loads(paquete.leer(ruta))
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cargar_compilado(directorio, nombre, origen, clave, compilar, descripcion):
+    """Objeto compilado desde su instantánea pickle, o compilarlo y guardarlo.
+
+    La instantánea se llama <nombre>-<huella del origen>-<clave>.pickle; al
+    guardar una nueva solo se borran las antiguas del mismo origen.
+    `descripcion` completa los mensajes de error ("la caché de ...").
+    """
+    # pickle no hace falta para la caché de imágenes: se importa al cargar la configuración
+    import pickle
+    directorio = Path(directorio)
+    prefijo = f"{nombre}-{huella_origen(origen)}"
+    ruta_cache = directorio / f"{prefijo}-{clave[:20]}.pickle"
+
+    try:
+        with open(ruta_cache, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error leyendo {descripcion}: {e}")
+
+    compilado = compilar()
+    try:
+        directorio.mkdir(parents=True, exist_ok=True)
+        for antiguo in directorio.glob(f"{prefijo}-*.pickle"):
+            antiguo.unlink()
+        tmp = ruta_cache.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(compilado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, ruta_cache)
+    except OSError as e:
+        print(f"Error guardando {descripcion}: {e}")
+    return compilado
+
+
+def hash_archivo(ruta):
+    """SHA-1 del contenido de un archivo"""
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class CacheImagenesDisco:
+    """Caché en disco de imágenes decodificadas, proyectadas en memoria con mmap"""
+
+    def __init__(self, directorio=None, paquete=None):
+        self.directorio = Path(directorio or directorio_cache_predeterminado()) / "imagenes"
+        # Con un PaqueteRecursos los hashes salen de su índice, sin stat del original
+        self.paquete = paquete
+        self._indice_path = self.directorio / "hashes.json"
+        self._lock = threading.Lock()
+        self._indice = None
+        self._indice_modificado = False
+        self.aciertos = 0
+        self.fallos = 0
+
+    # ----- hashes de los archivos originales -----
+
+    def _cargar_indice(self):
+        if self._indice is None:
+            try:
+                with open(self._indice_path, "r", encoding="utf-8") as f:
+                    self._indice = json.load(f)
+            except (OSError, ValueError):
+                self._indice = {}
+        return self._indice
+
+    def hash_origen(self, ruta):
+        """Hash del archivo original, recalculado solo si cambian su mtime o tamaño"""
+        if self.paquete is not None:
+            digest = self.paquete.hash(ruta)
+            if digest is not None:
+                return digest
+        ruta = Path(ruta)
+        st = ruta.stat()
+        firma = [st.st_mtime_ns, st.st_size]
+
+        with self._lock:
+            indice = self._cargar_indice()
+            entrada = indice.get(str(ruta))
+            if entrada and entrada[:2] == firma:
+                return entrada[2]
+
+        digest = hash_archivo(ruta)
+        with self._lock:
+            anterior = indice.get(str(ruta))
+            indice[str(ruta)] = firma + [digest]
+            self._indice_modificado = True
+        if anterior and anterior[2] != digest:
+            self._purgar_origen(ruta, anterior[2])
+        return digest
+
+    def guardar_indice(self):
+        """Persistir el índice de hashes si ha cambiado"""
+        with self._lock:
+            if not self._indice_modificado:
+                return
+            try:
+                self.directorio.mkdir(parents=True, exist_ok=True)
+                tmp = self._indice_path.with_suffix(".tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._indice, f)
+                os.replace(tmp, self._indice_path)
+                self._indice_modificado = False
+            except OSError as e:
+                print(f"Error guardando índice de caché: {e}")
+
+    def _purgar_origen(self, ruta, digest_antiguo):
+        """Eliminar las entradas generadas a partir de una versión antigua del archivo"""
+        patron = f"{Path(ruta).stem}-{digest_antiguo[:16]}-*{EXTENSION}"
+        for archivo in self.directorio.glob(f"*/{patron}"):
+            try:
+                archivo.unlink()
+            except OSError:
+                pass
+
+    # ----- entradas -----
+
+    def _ruta_entrada(self, ruta_origen, tamaño, cubeta):
+        digest = self.hash_origen(ruta_origen)
+        nombre = f"{Path(ruta_origen).stem}-{digest[:16]}-{tamaño[0]}x{tamaño[1]}{EXTENSION}"
+        return self.directorio / cubeta / nombre
+
+    def cargar(self, ruta_origen, tamaño, cubeta):
+        """Proyectar una entrada en memoria.
+
+        Devuelve (memoryview de los píxeles, ancho, alto, bytes_por_linea, formato)
+        o None si no existe. La memoryview mantiene vivo el mmap subyacente.
+        """
+        try:
+            ruta = self._ruta_entrada(ruta_origen, tamaño, cubeta)
+            with open(ruta, "rb") as f:
+                mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.fallos += 1
+            return None
+
+        # Un archivo truncado (escritura a medias de otra herramienta) no tiene ni cabecera
+        if len(mapa) < CABECERA.size:
+            return self._descartar(mapa, ruta)
+
+        magia, version, _, ancho, alto, bpl, formato = CABECERA.unpack_from(mapa, 0)
+        if magia != MAGIA or version != VERSION or len(mapa) < CABECERA.size + bpl * alto:
+            return self._descartar(mapa, ruta)
+
+        self.aciertos += 1
+        return memoryview(mapa)[CABECERA.size:CABECERA.size + bpl * alto], ancho, alto, bpl, formato
+
+    def _descartar(self, mapa, ruta):
+        """Contar un fallo y borrar una entrada inválida para que se regenere"""
+        mapa.close()
+        self.fallos += 1
+        try:
+            ruta.unlink()
+        except OSError:
+            pass
+        return None
+
+    def guardar(self, ruta_origen, tamaño, cubeta, datos, ancho, alto, bpl, formato):
+        """Escribir una entrada de forma atómica"""
+        try:
+            ruta = self._ruta_entrada(ruta_origen, tamaño, cubeta)
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            tmp = ruta.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(CABECERA.pack(MAGIA, VERSION, 0, ancho, alto, bpl, formato))
+                f.write(datos)
+            os.replace(tmp, ruta)
+        except OSError as e:
+            print(f"Error guardando {ruta_origen} en la caché de disco: {e}")
@@ -0,0 +1,81 @@
+"""Caché LRU en memoria compartida por todos los cargadores de imágenes del proceso"""
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Caché LRU acotada por un presupuesto de memoria en bytes.
+
+    Cada valor tiene un coste (calculado con la función ``coste``) y cuando la
+    suma supera el presupuesto se expulsan las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, presupuesto_bytes, coste):
+        self.presupuesto_bytes = presupuesto_bytes
+        self._coste = coste
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def obtener(self, clave):
+        """Devuelve el valor cacheado o None, marcándolo como usado recientemente"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave, valor):
+        """Guarda un valor y expulsa lo necesario para respetar el presupuesto"""
+        coste = self._coste(valor)
+        if coste > self.presupuesto_bytes:
+            # Un valor más grande que todo el presupuesto nunca se cachea
+            return valor
+
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self.bytes_usados -= anterior[1]
+
+            self._entradas[clave] = (valor, coste)
+            self.bytes_usados += coste
+
+            while self.bytes_usados > self.presupuesto_bytes:
+                _, (_, coste_expulsado) = self._entradas.popitem(last=False)
+                self.bytes_usados -= coste_expulsado
+                self.expulsiones += 1
+        return valor
+
+    def invalidar(self, predicado=None):
+        """Elimina las entradas cuya clave cumple el predicado (todas si no se indica)"""
+        with self._lock:
+            claves = [c for c in self._entradas if predicado is None or predicado(c)]
+            for clave in claves:
+                _, coste = self._entradas.pop(clave)
+                self.bytes_usados -= coste
+
+    def estadisticas(self):
+        """Resumen de uso de la caché para diagnósticos"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "bytes_usados": self.bytes_usados,
+                "presupuesto_bytes": self.presupuesto_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        return clave in self._entradas
@@ -0,0 +1,153 @@
+"""Decodificación de imágenes en segundo plano con QThreadPool"""
+import time
+
+from PyQt6.QtCore import QBuffer, QByteArray, QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QImageIOHandler
+
+import trazas
+
+
+def escalar(imagen, tamaño):
+    """Escalar un QImage con el mismo criterio que los pixmaps de la interfaz"""
+    return imagen.scaled(tamaño[0], tamaño[1], Qt.AspectRatioMode.KeepAspectRatio,
+                         Qt.TransformationMode.SmoothTransformation)
+
+
+def abrir_lector(ruta, paquete=None):
+    """QImageReader sobre el recurso empaquetado o, si no está en el paquete, sobre el archivo"""
+    vista = paquete.vista(ruta) if paquete is not None else None
+    if vista is None:
+        return QImageReader(str(ruta))
+    # PyQt6 no expone QByteArray::fromRawData: los bytes comprimidos se copian una
+    # vez a memoria de Qt, pero sin abrir ni leer el archivo suelto
+    buffer = QBuffer()
+    buffer.setData(QByteArray(vista))
+    buffer.open(QBuffer.OpenModeFlag.ReadOnly)
+    lector = QImageReader(buffer, ruta.suffix.lstrip(".").encode())
+    # El lector no es dueño del dispositivo: mantenerlo vivo mientras viva el lector
+    lector.buffer = buffer
+    return lector
+
+
+class _TareaDecodificacion(QRunnable):
+    """Decodifica una imagen (desde la caché en disco o el PNG) en un hilo del pool"""
+
+    def __init__(self, cargador, ruta, tamaño, cubeta):
+        super().__init__()
+        self.cargador = cargador
+        self.ruta = ruta
+        self.tamaño = tamaño
+        self.cubeta = cubeta
+
+    def run(self):
+        try:
+            imagen, original = self._decodificar()
+        except Exception as e:
+            print(f"Error decodificando imagen {self.ruta}: {e}")
+            imagen, original = QImage(), QImage()
+        try:
+            self.cargador.imagen_decodificada.emit(self.ruta, self.tamaño, imagen, original)
+        except RuntimeError:
+            # El cargador ya se destruyó (la aplicación se está cerrando)
+            pass
+
+    @trazas.span
+    def _decodificar(self):
+        cache_disco = self.cargador.cache_disco
+        paquete = self.cargador.paquete
+        existe = paquete.existe(self.ruta) if paquete is not None else self.ruta.exists()
+        usar_disco = cache_disco is not None and self.tamaño is not None and existe
+
+        if usar_disco:
+            entrada = cache_disco.cargar(self.ruta, self.tamaño, self.cubeta)
+            if entrada is not None:
+                datos, ancho, alto, bytes_por_linea, formato = entrada
+                # Copia para que el QImage no dependa del mmap al cruzar de hilo
+                return QImage(datos, ancho, alto, bytes_por_linea, QImage.Format(formato)).copy(), QImage()
+
+        lector = abrir_lector(self.ruta, paquete)
+        original = QImage()
+        if self.tamaño is not None and lector.supportsOption(QImageIOHandler.ImageOption.ScaledSize):
+            # Decodificación escalada nativa: nunca se materializa la imagen completa
+            objetivo = lector.size().scaled(self.tamaño[0], self.tamaño[1], Qt.AspectRatioMode.KeepAspectRatio)
+            lector.setScaledSize(objetivo)
+            imagen = lector.read()
+        else:
+            # PNG no admite decodificación escalada: se devuelve también el original
+            # para que otros tamaños de la misma imagen solo tengan que reescalar
+            original = lector.read()
+            imagen = escalar(original, self.tamaño) if self.tamaño and not original.isNull() else original
+        if imagen.isNull():
+            raise ValueError(lector.errorString())
+
+        if usar_disco:
+            imagen = imagen.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+            cache_disco.guardar(self.ruta, self.tamaño, self.cubeta,
+                                imagen.constBits().asstring(imagen.sizeInBytes()),
+                                imagen.width(), imagen.height(), imagen.bytesPerLine(),
+                                imagen.format().value)
+        return imagen, original
+
+
+class CargadorImagenes(QObject):
+    """Reparte decodificaciones entre los hilos del pool y avisa en el hilo de la GUI.
+
+    Solo hay una decodificación en vuelo por archivo: las peticiones de otros
+    tamaños que llegan mientras tanto se resuelven reescalando el original.
+    """
+
+    imagen_decodificada = pyqtSignal(object, object, QImage, QImage)
+    original_decodificado = pyqtSignal(object, QImage)
+    todas_listas = pyqtSignal()
+
+    def __init__(self, cache_disco=None, pool=None, parent=None, paquete=None):
+        super().__init__(parent)
+        self.cache_disco = cache_disco
+        self.paquete = paquete
+        self.pool = pool or QThreadPool(self)
+        self._pendientes = {}
+        self.decodificadas = 0
+        self.tiempo_ultima = None
+        self.imagen_decodificada.connect(self._al_decodificar)
+
+    @property
+    def pendientes(self):
+        return sum(len(esperas) for esperas in self._pendientes.values())
+
+    def solicitar(self, ruta, tamaño, cubeta, callback):
+        """Encolar una decodificación; callback(QImage o None) se llama en el hilo de la GUI"""
+        if ruta in self._pendientes:
+            self._pendientes[ruta].append((tamaño, cubeta, callback))
+            return
+        self._pendientes[ruta] = [(tamaño, cubeta, callback)]
+        self.pool.start(_TareaDecodificacion(self, ruta, tamaño, cubeta))
+
+    def detener(self):
+        """Descartar las tareas que no han empezado y esperar a las que están en curso"""
+        self.pool.clear()
+        self.pool.waitForDone()
+        self._pendientes.clear()
+
+    def _al_decodificar(self, ruta, tamaño_tarea, imagen, original):
+        esperas = self._pendientes.pop(ruta, [])
+        self.decodificadas += 1
+        self.tiempo_ultima = time.perf_counter()
+        if not original.isNull():
+            self.original_decodificado.emit(ruta, original)
+
+        reintentos = []
+        for tamaño, cubeta, callback in esperas:
+            if imagen.isNull():
+                callback(None)
+            elif tamaño == tamaño_tarea:
+                callback(imagen)
+            elif not original.isNull():
+                callback(escalar(original, tamaño) if tamaño else original)
+            else:
+                # Vino de la caché en disco con otro tamaño: hace falta otra tarea
+                reintentos.append((tamaño, cubeta, callback))
+
+        for tamaño, cubeta, callback in reintentos:
+            self.solicitar(ruta, tamaño, cubeta, callback)
+        if not self._pendientes:
+            self.todas_listas.emit()
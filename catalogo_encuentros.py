@@ -0,0 +1,204 @@
+"""Catálogo de encuentros analizado y compilado una sola vez.
+
+Cada texto de encuentro ("1d6 Goblins (Espada corta, Escudo) y 1 Goblin
+Chamán (...)") se descompone en grupos de enemigos con su cantidad (expresión
+de dados), el monstruo en singular y plural según monstruos-exp.json, el
+equipo, las habilidades, el rol y el icono. También se guardan ya preparadas
+las líneas que se muestran en el log.
+
+El catálogo compilado (tablas d100 de todos los tiers) se guarda con pickle en
+el directorio de caché, con una clave formada por los hashes de los JSON de
+origen: si cambia cualquiera de ellos se vuelve a compilar.
+"""
+import hashlib
+import re
+from collections import namedtuple
+from pathlib import Path
+
+import dados
+from cache_disco import cargar_compilado, directorio_cache_predeterminado, hash_archivo, leer_json
+from tablas_aleatorias import TablaD100
+
+# Cambiar al modificar Encuentro, GrupoEnemigos o el análisis de los textos
+VERSION_CATALOGO = 1
+ARCHIVO_MONSTRUOS = "monstruos-exp.json"
+
+# Iconos por tipo de enemigo, en orden de prioridad
+ICONOS_ENEMIGOS = (
+    ("Hechicero", "🧙"),
+    ("Escudo", "🛡️"),
+    ("Espada", "⚔️"),
+    ("Hacha", "⚔️"),
+)
+ICONO_POR_DEFECTO = "🐺"
+
+ROL_LANZADOR = "lanzador"
+ROL_DISTANCIA = "distancia"
+ROL_DEFENSOR = "defensor"
+ROL_CUERPO_A_CUERPO = "cuerpo a cuerpo"
+
+_LANZADORES = ("Brujo", "Hechicero", "Chamán", "Nigromante")
+_ARMAS_DISTANCIA = ("Arco", "Ballesta", "Jabalina", "Honda")
+
+_GRUPO = re.compile(r"(?P<cantidad>\d+(?:d\d+(?:[+-]\d+)?)?)\s+(?P<nombre>[^(]+?)\s*(?:\((?P<detalle>.*)\))?")
+
+Encuentro = namedtuple("Encuentro", "rango texto grupos lineas")
+
+
+class GrupoEnemigos(namedtuple("GrupoEnemigos",
+                               "texto cantidad singular plural equipo habilidades rol icono monstruo_id exp")):
+    """Un grupo de enemigos de un encuentro"""
+
+    __slots__ = ()
+
+    @property
+    def dados(self):
+        """Expresión de dados compilada de la cantidad"""
+        return dados.compilar(self.cantidad)
+
+    @property
+    def nombre(self):
+        return self.singular if self.cantidad == "1" else self.plural
+
+
+def icono_enemigo(enemigo):
+    """Icono que se muestra junto a un grupo de enemigos"""
+    for tipo, emoji in ICONOS_ENEMIGOS:
+        if tipo in enemigo:
+            return emoji
+    return ICONO_POR_DEFECTO
+
+
+def _dividir_nivel_superior(texto):
+    """Separar por ", " y " y " fuera de paréntesis"""
+    partes, profundidad, inicio, i = [], 0, 0, 0
+    while i < len(texto):
+        caracter = texto[i]
+        if caracter == "(":
+            profundidad += 1
+        elif caracter == ")":
+            profundidad -= 1
+        elif profundidad == 0:
+            for separador in (", ", " y "):
+                if texto.startswith(separador, i):
+                    partes.append(texto[inicio:i])
+                    i += len(separador)
+                    inicio = i
+                    break
+            else:
+                i += 1
+            continue
+        i += 1
+    partes.append(texto[inicio:])
+    return [parte.strip() for parte in partes if parte.strip()]
+
+
+def _rol(nombre, equipo, habilidades):
+    if habilidades or "Bastón" in equipo or any(tipo in nombre for tipo in _LANZADORES):
+        return ROL_LANZADOR
+    if any(arma in pieza for pieza in equipo for arma in _ARMAS_DISTANCIA):
+        return ROL_DISTANCIA
+    if "Escudo" in equipo:
+        return ROL_DEFENSOR
+    return ROL_CUERPO_A_CUERPO
+
+
+def analizar_grupo(texto, monstruos):
+    """Descomponer "1d4 Gnolls (Ballesta, Daga)" en un GrupoEnemigos"""
+    encontrado = _GRUPO.fullmatch(texto)
+    if not encontrado:
+        raise ValueError(f"Grupo de enemigos no reconocido: {texto!r}")
+
+    cantidad = encontrado.group("cantidad")
+    dados.compilar(cantidad)
+    nombre = encontrado.group("nombre")
+
+    equipo, habilidades = [], ""
+    detalle = encontrado.group("detalle") or ""
+    # "He:" abre la lista de habilidades, que llega hasta el final del paréntesis
+    posicion_he = detalle.find("He:")
+    if posicion_he >= 0:
+        habilidades = detalle[posicion_he + 3:].strip()
+        detalle = detalle[:posicion_he]
+    equipo = [pieza.strip() for pieza in detalle.split(",") if pieza.strip()]
+
+    monstruo = monstruos.get(nombre.lower())
+    if monstruo:
+        monstruo_id, singular, plural, exp = monstruo
+    else:
+        monstruo_id, singular, plural, exp = None, nombre, nombre, None
+
+    return GrupoEnemigos(
+        texto=texto, cantidad=cantidad, singular=singular, plural=plural,
+        equipo=tuple(equipo), habilidades=habilidades, rol=_rol(nombre, equipo, habilidades),
+        icono=icono_enemigo(texto), monstruo_id=monstruo_id, exp=exp,
+    )
+
+
+def analizar_encuentro(entrada, monstruos):
+    texto = entrada["enemigos"]
+    grupos = tuple(analizar_grupo(grupo, monstruos) for grupo in _dividir_nivel_superior(texto))
+    # Las mismas líneas que mostraba el log: una por cada " y "
+    lineas = tuple(f"{icono_enemigo(parte)} {parte.strip()}" for parte in texto.split(" y "))
+    return Encuentro(entrada["rango"], texto, grupos, lineas)
+
+
+def indice_monstruos(datos_monstruos):
+    """nombre en minúsculas (singular o plural) -> (id, singular, plural, exp)"""
+    indice = {}
+    for monstruo in datos_monstruos.get("monstruos", []):
+        singular, plural = monstruo["nombre"]
+        registro = (monstruo["id"], singular, plural, monstruo.get("exp"))
+        indice[singular.lower()] = registro
+        indice[plural.lower()] = registro
+    return indice
+
+
+def _archivos_tier(encuentros_dir):
+    return sorted(ruta for ruta in Path(encuentros_dir).glob("nivel_*.json"))
+
+
+def archivos_catalogo(encuentros_dir):
+    """Archivos de los que depende el catálogo (monstruos-exp.json puede no existir)"""
+    return _archivos_tier(encuentros_dir) + [Path(encuentros_dir) / ARCHIVO_MONSTRUOS]
+
+
+def compilar_catalogo(encuentros_dir, paquete=None):
+    """archivo de tier -> {"ronda_N": TablaD100 de Encuentro}"""
+    encuentros_dir = Path(encuentros_dir)
+    ruta_monstruos = encuentros_dir / ARCHIVO_MONSTRUOS
+    monstruos = {}
+    if paquete.existe(ruta_monstruos) if paquete is not None else ruta_monstruos.exists():
+        monstruos = indice_monstruos(leer_json(ruta_monstruos, paquete))
+
+    catalogo = {}
+    for ruta in _archivos_tier(encuentros_dir):
+        tier = leer_json(ruta, paquete)
+        catalogo[ruta.name] = {
+            ronda: TablaD100([analizar_encuentro(entrada, monstruos) for entrada in entradas],
+                             nombre=f"{ruta.name}.{ronda}")
+            for ronda, entradas in tier.items()
+        }
+    return catalogo
+
+
+def clave_catalogo(encuentros_dir, paquete=None):
+    h = hashlib.sha1(f"v{VERSION_CATALOGO}".encode())
+    for ruta in archivos_catalogo(encuentros_dir):
+        # Con un PaqueteRecursos el hash sale de su índice, sin leer el JSON
+        digest = paquete.hash(ruta) if paquete is not None else None
+        if digest is None and ruta.exists():
+            digest = hash_archivo(ruta)
+        if digest is not None:
+            h.update(ruta.name.encode())
+            h.update(digest.encode())
+    return h.hexdigest()
+
+
+def cargar_catalogo(encuentros_dir, directorio_cache=None, paquete=None):
+    """Catálogo compilado, desde la caché en disco si los JSON no han cambiado"""
+    return cargar_compilado(
+        Path(directorio_cache or directorio_cache_predeterminado()) / "catalogo", "encuentros", encuentros_dir,
+        clave_catalogo(encuentros_dir, paquete), lambda: compilar_catalogo(encuentros_dir, paquete),
+        "la caché del catálogo de encuentros",
+    )
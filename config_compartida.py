@@ -0,0 +1,85 @@
+"""Configuración del juego compartida, de solo lectura, entre sesiones.
+
+Es la misma ConfiguracionApp que carga la aplicación de escritorio
+(modelo_configuracion.cargar_configuracion, con su instantánea en disco): las
+reglas ya compiladas y los JSON de interfaz, que aquí se congelan en
+MappingProxyType y tuplas para que todas las sesiones de Streamlit puedan
+compartir el mismo objeto sin copiarlo. AlmacenConfiguracion vuelve a cargarla
+cuando cambia el mtime o el tamaño de alguno de sus archivos de origen, para
+poder editar los datos en caliente.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+
+from modelo_configuracion import ConfiguracionApp, archivos_origen, cargar_configuracion
+
+
+def congelar(valor):
+    """Copia inmutable de un valor JSON (dict -> MappingProxyType, list -> tuple)"""
+    if isinstance(valor, dict):
+        return MappingProxyType({clave: congelar(v) for clave, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+def configuracion_compartida(data_dir, directorio_cache=None):
+    """ConfiguracionApp con los JSON de interfaz congelados (las reglas ya son inmutables)"""
+    configuracion = cargar_configuracion(data_dir, directorio_cache)
+    return ConfiguracionApp(configuracion.reglas, congelar(configuracion.ui_config),
+                            congelar(configuracion.video_config), congelar(configuracion.sonido_config))
+
+
+def firma_archivos(data_dir):
+    """(nombre, mtime_ns, tamaño) de cada archivo del que depende la configuración"""
+    firma = []
+    for ruta in archivos_origen(data_dir):
+        try:
+            st = os.stat(ruta)
+            firma.append((ruta.name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            firma.append((ruta.name, None, None))
+    return tuple(firma)
+
+
+class AlmacenConfiguracion:
+    """Configuración vigente de un proceso, recargada si cambian los archivos.
+
+    obtener() comprueba los mtimes como mucho una vez cada
+    `intervalo_comprobacion` segundos; mientras no cambian devuelve siempre el
+    mismo objeto.
+    """
+
+    def __init__(self, data_dir, intervalo_comprobacion=1.0, directorio_cache=None):
+        self.data_dir = Path(data_dir)
+        self.intervalo_comprobacion = intervalo_comprobacion
+        self.directorio_cache = directorio_cache
+        self._lock = threading.Lock()
+        self._configuracion = None
+        self._firma = None
+        self._ultima_comprobacion = 0.0
+        self.recargas = 0
+
+    def obtener(self):
+        ahora = time.monotonic()
+        configuracion = self._configuracion
+        if configuracion is not None and ahora - self._ultima_comprobacion < self.intervalo_comprobacion:
+            return configuracion
+
+        with self._lock:
+            self._ultima_comprobacion = ahora
+            firma = firma_archivos(self.data_dir)
+            if self._configuracion is None or self._firma != firma:
+                try:
+                    self._configuracion = configuracion_compartida(self.data_dir, self.directorio_cache)
+                    self._firma = firma
+                    self.recargas += 1
+                except Exception as e:
+                    # Una edición a medias no debe tumbar las sesiones abiertas
+                    if self._configuracion is None:
+                        raise
+                    print(f"Error recargando la configuración, se mantiene la anterior: {e}")
+            return self._configuracion
@@ -0,0 +1,237 @@
+"""Expresiones de dados de los datos del juego ("1d3", "1d4+1", "4d6kh3", "2-5").
+
+Cada expresión se analiza una sola vez (compilar está cacheada) y se convierte
+en una ExpresionDados con:
+
+- tirar(rng): una tirada con un random.Random, con una función generada al
+  compilar para que tirar un dado cueste lo mismo que llamar a rng.randint.
+- dados_lote / lote: tiradas por lotes con un numpy.random.Generator.
+- distribucion(): la distribución exacta de probabilidades (Fraction).
+
+Sintaxis: términos separados por + o -, cada uno NdM (N opcional), NdMkhK /
+NdMklK (quedarse con los K dados más altos / más bajos) o un entero. Una
+expresión "a-b" con dos enteros es un rango uniforme entre a y b.
+"""
+import functools
+import itertools
+import math
+import re
+from fractions import Fraction
+
+_RANGO = re.compile(r"(\d+)-(\d+)")
+_TERMINO = re.compile(r"([+-]?)(?:(\d*)d(\d+)(?:k([hl])(\d+))?|(\d+))")
+
+# Límite de combinaciones al calcular distribuciones exactas
+MAX_COMBINACIONES = 2_000_000
+
+
+class _Dados:
+    """Término NdM con signo y, opcionalmente, quedarse con los K más altos o bajos"""
+
+    __slots__ = ("signo", "cantidad", "caras", "conservar", "mas_altos")
+
+    def __init__(self, signo, cantidad, caras, conservar=None, mas_altos=True):
+        self.signo = signo
+        self.cantidad = cantidad
+        self.caras = caras
+        self.conservar = conservar
+        self.mas_altos = mas_altos
+
+    def valores(self):
+        """Distribución exacta del término sin signo: {valor: veces}"""
+        cuentas = {}
+        if self.conservar is None:
+            # Convolución dado a dado
+            cuentas = {0: 1}
+            for _ in range(self.cantidad):
+                siguiente = {}
+                for total, veces in cuentas.items():
+                    for cara in range(1, self.caras + 1):
+                        siguiente[total + cara] = siguiente.get(total + cara, 0) + veces
+                cuentas = siguiente
+            return cuentas
+
+        if math.comb(self.caras + self.cantidad - 1, self.cantidad) > MAX_COMBINACIONES:
+            raise ValueError("Demasiadas combinaciones para calcular la distribución exacta")
+        # Multiconjuntos ordenados con su número de permutaciones
+        factorial = math.factorial(self.cantidad)
+        for tirada in itertools.combinations_with_replacement(range(1, self.caras + 1), self.cantidad):
+            veces = factorial
+            for _, grupo in itertools.groupby(tirada):
+                veces //= math.factorial(len(tuple(grupo)))
+            elegidos = tirada[-self.conservar:] if self.mas_altos else tirada[:self.conservar]
+            total = sum(elegidos)
+            cuentas[total] = cuentas.get(total, 0) + veces
+        return cuentas
+
+
+class ExpresionDados:
+    """Expresión de dados compilada (usar compilar() en lugar del constructor)"""
+
+    __slots__ = ("texto", "terminos", "constante", "rango", "tiradas", "minimo", "maximo",
+                 "tirar", "_distribucion")
+
+    def __init__(self, texto, terminos=(), constante=0, rango=None):
+        self.texto = texto
+        self.terminos = tuple(terminos)
+        self.constante = constante
+        self.rango = rango
+        self._distribucion = None
+
+        if rango is not None:
+            self.tiradas = 1
+            self.minimo, self.maximo = rango
+        else:
+            # Número de llamadas a rng.randint por tirada, en orden de los términos
+            self.tiradas = sum(t.cantidad for t in self.terminos)
+            self.minimo = self.maximo = constante
+            for t in self.terminos:
+                usados = t.conservar or t.cantidad
+                extremos = (t.signo * usados, t.signo * usados * t.caras)
+                self.minimo += min(extremos)
+                self.maximo += max(extremos)
+        self.tirar = self._generar_tirada()
+
+    def _generar_tirada(self):
+        constante = self.constante
+        if self.rango is not None:
+            minimo, maximo = self.rango
+            return lambda rng: rng.randint(minimo, maximo)
+        if not self.terminos:
+            return lambda rng: constante
+        if len(self.terminos) == 1 and self.terminos[0].cantidad == 1:
+            # Caso más habitual ("1d3", "1d4+1"): una sola llamada
+            termino = self.terminos[0]
+            signo, caras = termino.signo, termino.caras
+            if signo == 1 and constante == 0:
+                return lambda rng: rng.randint(1, caras)
+            return lambda rng: signo * rng.randint(1, caras) + constante
+
+        terminos = tuple((t.signo, t.cantidad, t.caras, t.conservar, t.mas_altos) for t in self.terminos)
+
+        def tirar(rng):
+            total = constante
+            for signo, cantidad, caras, conservar, mas_altos in terminos:
+                dados = [rng.randint(1, caras) for _ in range(cantidad)]
+                if conservar is not None:
+                    dados.sort(reverse=mas_altos)
+                    dados = dados[:conservar]
+                total += signo * sum(dados)
+            return total
+        return tirar
+
+    # ----- tiradas por lotes -----
+
+    def dados_lote(self, tamaño, generador):
+        """Dados individuales por lotes: array de forma tamaño + (tiradas,).
+
+        Los dados salen en el mismo orden en que tirar() llama a rng.randint,
+        así que una fila se puede reproducir exactamente con un rng guionizado.
+        """
+        import numpy as np
+        tamaño = (tamaño,) if isinstance(tamaño, int) else tuple(tamaño)
+        if self.rango is not None:
+            minimo, maximo = self.rango
+            return generador.integers(minimo, maximo + 1, size=tamaño + (1,), dtype=np.int16)
+        bloques = [generador.integers(1, t.caras + 1, size=tamaño + (t.cantidad,), dtype=np.int16)
+                   for t in self.terminos]
+        if not bloques:
+            return np.empty(tamaño + (0,), dtype=np.int16)
+        return bloques[0] if len(bloques) == 1 else np.concatenate(bloques, axis=-1)
+
+    def total_lote(self, dados):
+        """Totales a partir de un array devuelto por dados_lote"""
+        import numpy as np
+        if self.rango is not None:
+            return dados[..., 0]
+        total = np.full(dados.shape[:-1], self.constante, dtype=np.int32)
+        inicio = 0
+        for t in self.terminos:
+            bloque = dados[..., inicio:inicio + t.cantidad]
+            inicio += t.cantidad
+            if t.conservar is not None:
+                bloque = np.sort(bloque, axis=-1)
+                bloque = bloque[..., -t.conservar:] if t.mas_altos else bloque[..., :t.conservar]
+            total += t.signo * bloque.sum(axis=-1, dtype=np.int32)
+        return total
+
+    def lote(self, tamaño, generador):
+        """Totales de `tamaño` tiradas con un numpy.random.Generator"""
+        return self.total_lote(self.dados_lote(tamaño, generador))
+
+    # ----- distribución exacta -----
+
+    def distribucion(self):
+        """{valor: probabilidad} exacta, con probabilidades Fraction"""
+        if self._distribucion is not None:
+            return self._distribucion
+
+        if self.rango is not None:
+            minimo, maximo = self.rango
+            cuentas = {valor: 1 for valor in range(minimo, maximo + 1)}
+        else:
+            cuentas = {self.constante: 1}
+            for t in self.terminos:
+                valores = t.valores()
+                siguiente = {}
+                for total, veces in cuentas.items():
+                    for valor, veces_valor in valores.items():
+                        clave = total + t.signo * valor
+                        siguiente[clave] = siguiente.get(clave, 0) + veces * veces_valor
+                cuentas = siguiente
+
+        casos = sum(cuentas.values())
+        self._distribucion = {valor: Fraction(cuentas[valor], casos) for valor in sorted(cuentas)}
+        return self._distribucion
+
+    @property
+    def media(self):
+        return sum(valor * p for valor, p in self.distribucion().items())
+
+    def __repr__(self):
+        return f"ExpresionDados({self.texto!r})"
+
+    def __str__(self):
+        return self.texto
+
+
+@functools.lru_cache(maxsize=None)
+def compilar(expresion):
+    """Analizar y compilar una expresión de dados (cacheado por texto)"""
+    texto = str(expresion).strip()
+    # Se permiten espacios alrededor de los signos, no dentro de un término
+    limpia = re.sub(r"\s*([+-])\s*", r"\1", texto.lower())
+
+    rango = _RANGO.fullmatch(limpia)
+    if rango:
+        minimo, maximo = int(rango.group(1)), int(rango.group(2))
+        if minimo > maximo:
+            raise ValueError(f"Rango de dados invertido: {texto!r}")
+        return ExpresionDados(texto, rango=(minimo, maximo))
+
+    terminos, constante, posicion = [], 0, 0
+    while posicion < len(limpia):
+        encontrado = _TERMINO.match(limpia, posicion)
+        if not encontrado or encontrado.end() == posicion or (posicion > 0 and not encontrado.group(1)):
+            raise ValueError(f"Expresión de dados inválida: {texto!r}")
+        posicion = encontrado.end()
+        signo_txt, cantidad, caras, tipo_conservar, conservar, entero = encontrado.groups()
+        signo = -1 if signo_txt == "-" else 1
+        if entero is not None:
+            constante += signo * int(entero)
+            continue
+        cantidad = int(cantidad) if cantidad else 1
+        caras = int(caras)
+        conservar = int(conservar) if conservar else None
+        if cantidad < 1 or caras < 1 or (conservar is not None and not 1 <= conservar <= cantidad):
+            raise ValueError(f"Expresión de dados inválida: {texto!r}")
+        terminos.append(_Dados(signo, cantidad, caras, conservar, tipo_conservar != "l"))
+
+    if not limpia:
+        raise ValueError("Expresión de dados vacía")
+    return ExpresionDados(texto, terminos, constante)
+
+
+def tirar(expresion, rng):
+    """Atajo: compilar (cacheado) y tirar una vez"""
+    return compilar(expresion).tirar(rng)
@@ -0,0 +1,113 @@
+"""HUD de rendimiento de la aplicación de escritorio (F3 para mostrarlo u ocultarlo).
+
+Muestra el tiempo de pintado por fotograma frente al presupuesto que marca
+fps_objetivo en config/video.json, los relayouts, la latencia del bucle de
+eventos, la caché de imágenes (tasa de aciertos y memoria decodificada) y el
+tamaño del documento del log. Se refresca con un temporizador lento que solo
+corre mientras está visible; oculto no mide nada.
+"""
+import time
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QLabel
+
+COLOR_BIEN = "#7CFC00"
+COLOR_MAL = "#FF6347"
+
+
+class HudRendimiento(QLabel):
+    """Panel superpuesto con métricas de rendimiento de una ArenaApp"""
+
+    def __init__(self, ventana, parent, cache_pixmaps, intervalo_ms=500):
+        super().__init__(parent)
+        self.ventana = ventana
+        self.cache_pixmaps = cache_pixmaps
+        # Atributo de Python: ArenaApp.event lo consulta en cada evento
+        self.visible = False
+
+        self.setTextFormat(Qt.TextFormat.RichText)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet("""
+            QLabel {
+                background-color: rgba(0, 0, 0, 180);
+                color: #E0E0E0;
+                font: 12px "DejaVu Sans Mono", Consolas, monospace;
+                padding: 6px;
+                border-radius: 4px;
+            }
+        """)
+        self.move(10, 10)
+        self.hide()
+
+        self._temporizador = QTimer(self)
+        self._temporizador.setInterval(intervalo_ms)
+        self._temporizador.timeout.connect(self.actualizar)
+        self._pintados = []
+        self._latencia_ms = 0.0
+        self._relayouts_previos = 0
+
+    def alternar(self):
+        self.visible = not self.visible
+        if self.visible:
+            self._pintados.clear()
+            self._relayouts_previos = self.ventana.relayouts_ejecutados
+            self.actualizar()
+            self.show()
+            self.raise_()
+            self._temporizador.start()
+        else:
+            self._temporizador.stop()
+            self.hide()
+
+    def registrar_pintado(self, segundos):
+        self._pintados.append(segundos)
+
+    def _medir_latencia(self, enviado):
+        self._latencia_ms = (time.perf_counter() - enviado) * 1000
+
+    def actualizar(self):
+        # Latencia: lo que tarda en atenderse una llamada encolada ahora
+        enviado = time.perf_counter()
+        QTimer.singleShot(0, lambda: self._medir_latencia(enviado))
+
+        ventana = self.ventana
+        fps = (ventana.video_config or {}).get("fps_objetivo", 60)
+        presupuesto_ms = 1000 / fps
+        pintados_ms = [s * 1000 for s in self._pintados]
+        self._pintados.clear()
+        if pintados_ms:
+            media, maximo = sum(pintados_ms) / len(pintados_ms), max(pintados_ms)
+            lentos = sum(1 for ms in pintados_ms if ms > presupuesto_ms)
+        else:
+            media = maximo = 0.0
+            lentos = 0
+        color_pintado = COLOR_MAL if maximo > presupuesto_ms else COLOR_BIEN
+
+        relayouts = ventana.estadisticas_relayout()
+        nuevos_relayouts = relayouts["ejecutados"] - self._relayouts_previos
+        self._relayouts_previos = relayouts["ejecutados"]
+
+        cache = self.cache_pixmaps.estadisticas()
+        documento = ventana.event_log.document() if ventana.event_log is not None else None
+        registro = ventana.registro_log
+
+        lineas = [
+            f"<b>Rendimiento</b> (objetivo {fps} fps)",
+            f"Pintado: <span style='color:{color_pintado}'>media {media:.1f} ms · máx {maximo:.1f} ms</span>"
+            f" / {presupuesto_ms:.1f} ms · {len(pintados_ms)} fotogramas, {lentos} lentos",
+            f"Relayouts: {nuevos_relayouts} ahora · {relayouts['ejecutados']} de {relayouts['solicitados']}"
+            f" pedidos ({relayouts['coalescidos']} agrupados)",
+            f"Latencia del bucle: <span style='color:"
+            f"{COLOR_MAL if self._latencia_ms > presupuesto_ms else COLOR_BIEN}'>{self._latencia_ms:.1f} ms</span>",
+            f"Caché de imágenes: {cache['tasa_aciertos'] * 100:.0f}% aciertos · "
+            f"{cache['bytes_usados'] / 2**20:.1f} de {cache['presupuesto_bytes'] / 2**20:.0f} MB · "
+            f"{cache['entradas']} imágenes",
+        ]
+        if documento is not None:
+            linea_log = f"Log: {documento.blockCount()} bloques · {documento.characterCount() / 1024:.0f} KB"
+            if registro is not None:
+                linea_log += f" · {len(registro.archivo)} en el archivo"
+            lineas.append(linea_log)
+        self.setText("<br>".join(lineas))
+        self.adjustSize()
+        self.raise_()
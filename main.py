@@ -1,15 +1,49 @@
-import random
 import os
 import sys
-import subprocess
-import json
-import pygame
+import math
+import time
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QLabel, QPushButton, 
-                             QTextEdit, QMessageBox, QScrollArea, QFrame, QVBoxLayout)
-from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import QPixmap, QFont, QColor, QTextCursor, QTextCharFormat, QIcon
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QLabel, QPushButton, QTextEdit, QMessageBox
+from PyQt6.QtCore import Qt, QTimer, QEvent
+from PyQt6.QtGui import QPixmap, QImage, QFont, QColor, QTextCursor, QTextCharFormat, QIcon, QKeySequence, QShortcut
 from PyQt6.QtCore import QSize
+from cache_imagenes import CacheLRU
+from cache_disco import CacheImagenesDisco, cubeta_escala
+from carga_asincrona import CargadorImagenes
+from paquete_recursos import abrir_paquete
+from registro_qt import RegistroQt, TAG_CRITICO
+from audio import MotorAudio
+from arena_engine import ArenaEngine, EVENTO_LOG, EVENTO_REACCION, EVENTO_RECOMPENSAS, EVENTO_RONDA
+from modelo_configuracion import cargar_configuracion
+import trazas
+from vigilante import VigilanteBloqueos, umbral_configurado
+from hud import HudRendimiento
+
+# Referencia para medir el tiempo hasta el primer pintado y hasta que la app es interactiva
+_T_INICIO = time.perf_counter()
+
+
+def _coste_pixmap(pixmap):
+    """Bytes aproximados que ocupa un pixmap decodificado"""
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+# Caché de pixmaps compartida por todos los cargadores de imágenes del proceso.
+# Clave: (ruta, tamaño destino o None para el original, modo de transformación)
+CACHE_PIXMAPS = CacheLRU(
+    presupuesto_bytes=int(os.environ.get("ARENA_CACHE_IMAGENES_MB", "128")) * 1024 * 1024,
+    coste=_coste_pixmap
+)
+
+# Recursos de assets empaquetados en assets.pak (python paquete_recursos.py); sin
+# paquete se leen los archivos sueltos
+PAQUETE = abrir_paquete(Path(__file__).parent)
+
+# Caché persistente de imágenes ya escaladas, proyectada con mmap en el siguiente arranque
+CACHE_DISCO = CacheImagenesDisco(paquete=PAQUETE)
+atexit.register(CACHE_DISCO.guardar_indice)
 
 
 class ArenaApp(QMainWindow):
@@ -17,12 +51,15 @@ class ArenaApp(QMainWindow):
         super().__init__()
         # Predefinir atributos para mejor organización
         self._setup_attributes()
-        self.cargar_configuraciones()
+        self._definir_rutas()
+        # El audio vive en su propio hilo, que se lanza cuando la interfaz ya es interactiva
+        self.audio = MotorAudio(PAQUETE, self.AUDIO_DIR / "musica_fondo.mp3")
+        # La configuración se carga en un hilo mientras se crean los widgets y se encolan las imágenes
+        self._configuracion_pendiente = self._cargar_configuracion_en_segundo_plano()
         self.inicializar_ui()
+        self.cargar_configuraciones()
         self.inicializar_estados()
         self.mostrar_mensaje_bienvenida()
-        self.iniciar_efecto_parpadeo()
-        self.inicializar_musica()
 
     def _setup_attributes(self):
         """Predefinir atributos para mejor organización y legibilidad"""
@@ -32,26 +69,17 @@ class ArenaApp(QMainWindow):
         self.IMAGES_DIR = None
         self.AUDIO_DIR = None
         self.ui_config = None
-        self.estados_config = None
-        self.descansos = None
-        self.recompensas = None
-        self.comportamiento = None
+        self.video_config = None
+        self.sonido_config = None
+        # Reglas compiladas de modelo_configuracion que usa el motor
+        self.reglas = None
         
-        # Estado del juego
-        self.heroes_nivel = None
-        self.ronda_actual = 1
-        self.encuentro_actual = None
-        self.encuentros = {}
-        self.acciones_heroicas = 0
-        self.acciones_deshonrosas = 0
-        self.moral_grupo = 0
-        self.cordura = 0
-        self.bonif_critico = False
-        self.apuesta_activa = False
-        self.apuesta_monedas = 0
+        # Estado del juego (las reglas y el estado de la partida viven en el motor)
+        self.motor = None
         self.reward_log_visible = False
         
         # Control de música
+        self.audio = None
         self.musica_activada = True
         self.btn_musica_on = None
         self.btn_musica_off = None
@@ -65,6 +93,7 @@ class ArenaApp(QMainWindow):
         self.apuesta_label = None
         self.btn_apuesta_up = None
         self.event_log = None
+        self.registro_log = None
         self.reward_log = None
         self.botones = []
         self.text_formats = {}
@@ -74,57 +103,222 @@ class ArenaApp(QMainWindow):
         self.apuesta_valor = 0
         
         # Efectos
-        self.blink_state = False
-        self.blink_timer = None
+        self.parpadeo = None
+
+        # Vigilante de bloqueos del bucle de eventos (solo si se activa)
+        self.vigilante = None
+
+        # HUD de rendimiento (F3); oculto no mide nada
+        self.hud = None
 
         # Factores de escala para responsive design
         self.width_scale = 1.0
         self.height_scale = 1.0
         self.scale_factor = 1.0
 
+        # Relayout agrupado: un único pase por fotograma y solo de lo que ha cambiado
+        self.relayout_timer = None
+        self.relayouts_solicitados = 0
+        self.relayouts_ejecutados = 0
+        self.relayouts_omitidos = 0
+        self._tamaño_layout = None
+        self._cubeta_formatos = None
+        self._tamaño_botones = None
+
+        # Carga asíncrona de recursos
+        self._configuracion_pendiente = None
+        self.cargador_imagenes = CargadorImagenes(CACHE_DISCO, parent=self, paquete=PAQUETE)
+        self.cargador_imagenes.original_decodificado.connect(self._guardar_original)
+        self.cargador_imagenes.todas_listas.connect(self._comprobar_interactivo)
+        self._fondo_solicitado = None
+        self.tiempo_primer_pintado = None
+        self.tiempo_interactivo = None
+
+    def _definir_rutas(self):
+        self.BASE_DIR = Path(__file__).parent
+        self.DATA_DIR = self.BASE_DIR / "assets" / "data"
+        self.IMAGES_DIR = self.BASE_DIR / "assets" / "imagenes"
+        self.AUDIO_DIR = self.BASE_DIR / "assets" / "audio"
+
+    def _cargar_configuracion_en_segundo_plano(self):
+        """Cargar la configuración compilada (su instantánea si los JSON no cambiaron) en un hilo"""
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="config")
+        futuro = pool.submit(cargar_configuracion, self.DATA_DIR, paquete=PAQUETE)
+        pool.shutdown(wait=False)
+        return futuro
+
+    @trazas.span
     def cargar_configuraciones(self):
         try:
-            self.BASE_DIR = Path(__file__).parent
-            self.DATA_DIR = self.BASE_DIR / "assets" / "data"
-            self.IMAGES_DIR = self.BASE_DIR / "assets" / "imagenes"
-            self.AUDIO_DIR = self.BASE_DIR / "assets" / "audio"
-
-            # Cargar todos los archivos de configuración
-            config_files = {
-                "ui_config": "ui_config.json",
-                "estados_config": "estados.json",
-                "descansos": "descansos.json",
-                "recompensas": "recompensas.json",
-                "comportamiento": "comportamiento.json"
-            }
-            
-            for attr, file_name in config_files.items():
-                with open(self.DATA_DIR / file_name, "r", encoding="utf-8") as f:
-                    setattr(self, attr, json.load(f))
+            self._definir_rutas()
+
+            # Recoger la configuración (ya en carga si se lanzó antes)
+            futuro = self._configuracion_pendiente or self._cargar_configuracion_en_segundo_plano()
+            self._configuracion_pendiente = None
+
+            configuracion = futuro.result()
+            self.reglas = configuracion.reglas
+            self.ui_config = configuracion.ui_config
+            self.video_config = configuracion.video_config
+            # Un resize previo (showMaximized) pudo crear el temporizador con los fps por defecto
+            if self.relayout_timer is not None:
+                self.relayout_timer.setInterval(self._intervalo_relayout())
+            self.sonido_config = configuracion.sonido_config
+            # Las rutas de sonido.json son relativas a su carpeta (assets/data/config)
+            self.audio.configurar(self.sonido_config, self.DATA_DIR / "config")
+
+            if self.registro_log is not None:
+                config_log = self.ui_config.get("log", {})
+                self.registro_log.configurar(retencion=config_log.get("retencion"),
+                                             max_bloques=config_log.get("bloques_documento"),
+                                             pagina=config_log.get("pagina"))
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudieron cargar las configuraciones:\n{str(e)}")
             sys.exit(1)
             
-    def cargar_imagen(self, nombre_archivo, tamaño=None):
-        try:
-            ruta = self.IMAGES_DIR / nombre_archivo
-            if not ruta.exists():
+    def _obtener_pixmap(self, nombre_archivo, tamaño=None,
+                        modo=Qt.TransformationMode.SmoothTransformation):
+        """Obtener un pixmap de la caché compartida, decodificando solo si no está"""
+        ruta = self.IMAGES_DIR / nombre_archivo
+        clave = (str(ruta), tuple(tamaño) if tamaño else None, modo)
+
+        pixmap = CACHE_PIXMAPS.obtener(clave)
+        if pixmap is not None:
+            return pixmap
+
+        if tamaño:
+            usar_disco = modo == Qt.TransformationMode.SmoothTransformation and PAQUETE.existe(ruta)
+            pixmap = self._cargar_de_disco(ruta, tamaño) if usar_disco else None
+            if pixmap is None:
+                # El original también se cachea para que reescalar no vuelva a decodificar el PNG
+                original = self._obtener_pixmap(nombre_archivo, None, modo)
+                if original is None:
+                    return None
+                pixmap = original.scaled(tamaño[0], tamaño[1], Qt.AspectRatioMode.KeepAspectRatio, modo)
+                if usar_disco:
+                    self._guardar_en_disco(ruta, tamaño, pixmap)
+        else:
+            if not PAQUETE.existe(ruta):
                 print(f"Archivo no encontrado: {ruta}")
                 return None
-                
-            pixmap = QPixmap(str(ruta))
+
+            vista = PAQUETE.vista(ruta)
+            if vista is None:
+                pixmap = QPixmap(str(ruta))
+            else:
+                pixmap = QPixmap()
+                pixmap.loadFromData(vista)
             if pixmap.isNull():
                 print(f"Error: No se pudo cargar la imagen {nombre_archivo}")
                 return None
-                
-            if tamaño:
-                pixmap = pixmap.scaled(tamaño[0], tamaño[1], Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-            return pixmap
+
+        return CACHE_PIXMAPS.guardar(clave, pixmap)
+
+    def _cubeta_disco(self):
+        """Cubeta de la caché en disco para la escala y el device pixel ratio actuales"""
+        return cubeta_escala(self.scale_factor, self.devicePixelRatioF())
+
+    def _cargar_de_disco(self, ruta, tamaño):
+        """Construir un pixmap sobre la entrada proyectada en memoria, sin decodificar el PNG"""
+        entrada = CACHE_DISCO.cargar(ruta, tamaño, self._cubeta_disco())
+        if entrada is None:
+            return None
+        datos, ancho, alto, bytes_por_linea, formato = entrada
+        imagen = QImage(datos, ancho, alto, bytes_por_linea, QImage.Format(formato))
+        return QPixmap.fromImage(imagen)
+
+    def _guardar_en_disco(self, ruta, tamaño, pixmap):
+        """Guardar los píxeles ya escalados para los siguientes arranques"""
+        imagen = pixmap.toImage().convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+        datos = imagen.constBits().asstring(imagen.sizeInBytes())
+        CACHE_DISCO.guardar(ruta, tamaño, self._cubeta_disco(), datos, imagen.width(),
+                            imagen.height(), imagen.bytesPerLine(), imagen.format().value)
+
+    def solicitar_imagen(self, nombre_archivo, tamaño, callback):
+        """Entregar un pixmap a callback: al momento si está en caché, si no al decodificarse en el pool"""
+        ruta = self.IMAGES_DIR / nombre_archivo
+        modo = Qt.TransformationMode.SmoothTransformation
+        tamaño = tuple(tamaño) if tamaño else None
+        clave = (str(ruta), tamaño, modo)
+
+        pixmap = CACHE_PIXMAPS.obtener(clave)
+        if pixmap is None and tamaño and (str(ruta), None, modo) in CACHE_PIXMAPS:
+            # Con el original ya decodificado basta con reescalar, sin pasar por el pool
+            pixmap = self._obtener_pixmap(nombre_archivo, tamaño, modo)
+        if pixmap is not None:
+            callback(pixmap)
+            return
+
+        def al_decodificar(imagen):
+            if imagen is None:
+                print(f"Error: No se pudo cargar la imagen {nombre_archivo}")
+                callback(None)
+                return
+            callback(CACHE_PIXMAPS.guardar(clave, QPixmap.fromImage(imagen)))
+
+        self.cargador_imagenes.solicitar(ruta, tamaño, self._cubeta_disco(), al_decodificar)
+
+    def _guardar_original(self, ruta, imagen):
+        """Cachear el original que devuelve el pool para reescalar sin volver a decodificar"""
+        clave = (str(ruta), None, Qt.TransformationMode.SmoothTransformation)
+        CACHE_PIXMAPS.guardar(clave, QPixmap.fromImage(imagen))
+
+    def _asignar_icono(self, btn, nombre_archivo, lado):
+        """Asignar el icono de un botón en cuanto su imagen esté lista"""
+        solicitud = (nombre_archivo, lado)
+        btn.icono_solicitado = solicitud
+        btn.setIconSize(QSize(lado, lado))
+
+        def aplicar(pixmap):
+            # Ignorar respuestas de tamaños que ya no están vigentes
+            if getattr(btn, "icono_solicitado", None) != solicitud:
+                return
+            if pixmap:
+                btn.setIcon(QIcon(pixmap))
+                btn.setText("")
+                btn.pixmap = pixmap  # Guardar referencia al pixmap
+            else:
+                btn.setText("?")
+
+        self.solicitar_imagen(nombre_archivo, (lado, lado), aplicar)
+
+    def event(self, evento):
+        hud = getattr(self, 'hud', None)
+        if hud is not None and hud.visible and evento.type() == QEvent.Type.UpdateRequest:
+            # UpdateRequest de la ventana pinta todos los widgets pendientes: un fotograma
+            inicio = time.perf_counter()
+            resultado = super().event(evento)
+            hud.registrar_pintado(time.perf_counter() - inicio)
+        else:
+            resultado = super().event(evento)
+        # event() también se llama durante QMainWindow.__init__, antes de _setup_attributes
+        if evento.type() == QEvent.Type.UpdateRequest and getattr(self, 'tiempo_primer_pintado', 0) is None:
+            self.tiempo_primer_pintado = time.perf_counter() - _T_INICIO
+            print(f"Tiempo hasta el primer pintado: {self.tiempo_primer_pintado * 1000:.0f} ms")
+            self._comprobar_interactivo()
+        return resultado
+
+    def _comprobar_interactivo(self):
+        """Registrar el tiempo hasta interactivo: primer pintado hecho y sin imágenes pendientes"""
+        if (self.tiempo_interactivo is not None or self.tiempo_primer_pintado is None
+                or self.cargador_imagenes.pendientes):
+            return
+        self.tiempo_interactivo = time.perf_counter() - _T_INICIO
+        print(f"Tiempo hasta interactivo: {self.tiempo_interactivo * 1000:.0f} ms")
+        # Con la interfaz ya lista, comprobar el paquete y arrancar el audio sin competir con el arranque
+        PAQUETE.verificar_en_segundo_plano()
+        self.inicializar_musica()
+
+    @trazas.span
+    def cargar_imagen(self, nombre_archivo, tamaño=None):
+        try:
+            return self._obtener_pixmap(nombre_archivo, tamaño)
         except Exception as e:
             print(f"Error cargando imagen {nombre_archivo}: {e}")
             return None
         
+    @trazas.span
     def escalar_imagen(self, nombre_archivo, tamaño_base):
         """Cargar y escalar una imagen según el factor de escala"""
         try:
@@ -132,42 +326,16 @@ class ArenaApp(QMainWindow):
             nuevo_ancho = int(tamaño_base[0] * self.scale_factor)
             nuevo_alto = int(tamaño_base[1] * self.scale_factor)
             
-            ruta = self.IMAGES_DIR / nombre_archivo
-            if not ruta.exists():
-                print(f"Archivo no encontrado: {ruta}")
-                return None
-                
-            pixmap = QPixmap(str(ruta))
-            if pixmap.isNull():
-                print(f"Error: No se pudo cargar la imagen {nombre_archivo}")
-                return None
-                
-            pixmap = pixmap.scaled(nuevo_ancho, nuevo_alto, 
-                                Qt.AspectRatioMode.KeepAspectRatio, 
-                                Qt.TransformationMode.SmoothTransformation)
-            return pixmap
+            return self._obtener_pixmap(nombre_archivo, (nuevo_ancho, nuevo_alto))
         except Exception as e:
             print(f"Error escalando imagen {nombre_archivo}: {e}")
             return None
 
     def inicializar_musica(self):
-        """Inicializar música con pygame al iniciar la aplicación"""
-        try:
-            pygame.mixer.init()
-            musica_path = self.AUDIO_DIR / "musica_fondo.mp3"
-            
-            if musica_path.exists():
-                pygame.mixer.music.load(str(musica_path))
-                pygame.mixer.music.set_volume(0.7)
-                
-                # Siempre reproducir al iniciar (por defecto está activada)
-                pygame.mixer.music.play(-1)  # -1 para loop infinito
-                print("Música iniciada con pygame")
-            else:
-                print("Archivo de música no encontrado")
-                
-        except Exception as e:
-            print(f"Error inicializando música con pygame: {e}")
+        """Lanzar el hilo de audio y empezar la música (por defecto está activada)"""
+        self.audio.iniciar()
+        if self.musica_activada:
+            self.audio.reproducir()
 
     def activar_musica(self):
         """Activar música - llamado por btn_sin_musica"""
@@ -175,11 +343,9 @@ class ArenaApp(QMainWindow):
         self.btn_musica_off.hide()  # Oculta el botón de música OFF
         self.btn_musica_on.show()   # Muestra el botón de música ON
         
-        if hasattr(pygame, 'mixer') and pygame.mixer.get_init():
-            pygame.mixer.music.unpause()
-            print("Música activada")
-        else:
-            self.inicializar_musica()
+        # Si el audio no arrancó, pulsar el botón es la ocasión de volver a intentarlo
+        self.audio.reproducir(reintentar=True)
+        print("Música activada")
 
     def desactivar_musica(self):
         """Desactivar música - llamado por btn_con_musica"""
@@ -187,21 +353,30 @@ class ArenaApp(QMainWindow):
         self.btn_musica_on.hide()   # Oculta el botón de música ON
         self.btn_musica_off.show()  # Muestra el botón de música OFF
         
-        if hasattr(pygame, 'mixer') and pygame.mixer.get_init():
-            pygame.mixer.music.pause()
-            print("Música pausada")
+        self.audio.pausar()
+        print("Música pausada")
     
     def actualizar_fondo(self):
         """Actualiza el fondo cuando la ventana cambia de tamaño"""
         if hasattr(self, 'background_label') and self.background_label is not None:
-            fondo_pixmap = self.cargar_imagen("fondo.png", (self.width(), self.height()))
-            if fondo_pixmap:
-                self.background_label.setPixmap(fondo_pixmap)
-                self.background_label.setScaledContents(True)
-                self.background_label.setGeometry(0, 0, self.width(), self.height())
-            else:
-                # Respaldo: establecer un fondo de color sólido si falla la carga de la imagen
-                self.background_label.setStyleSheet("background-color: #2D2D2D;")
+            # El label estira el fondo (setScaledContents), así que basta con redondear el
+            # tamaño a múltiplos de 128 px para no generar una entrada de caché por píxel
+            tamaño_fondo = (math.ceil(self.width() / 128) * 128, math.ceil(self.height() / 128) * 128)
+            self.background_label.setGeometry(0, 0, self.width(), self.height())
+            self._fondo_solicitado = tamaño_fondo
+            self.solicitar_imagen("fondo.png", tamaño_fondo,
+                                  lambda pixmap: self._aplicar_fondo(pixmap, tamaño_fondo))
+
+    def _aplicar_fondo(self, fondo_pixmap, tamaño_fondo):
+        """Colocar el fondo decodificado si sigue correspondiendo al tamaño actual"""
+        if tamaño_fondo != self._fondo_solicitado:
+            return
+        if fondo_pixmap:
+            self.background_label.setPixmap(fondo_pixmap)
+            self.background_label.setScaledContents(True)
+        else:
+            # Respaldo: establecer un fondo de color sólido si falla la carga de la imagen
+            self.background_label.setStyleSheet("background-color: #2D2D2D;")
 
     def inicializar_ui(self):
         self.setWindowTitle("DETION ARENA: LEAGUE OF DUNGEONEERS")
@@ -215,6 +390,8 @@ class ArenaApp(QMainWindow):
         # Crear un QLabel para el fondo
         self.background_label = QLabel(central_widget)
         self.background_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        # Color de relleno mientras se decodifica la imagen de fondo
+        self.background_label.setStyleSheet("background-color: #2D2D2D;")
         
         # Cargar y establecer el fondo
         self.actualizar_fondo()
@@ -224,6 +401,13 @@ class ArenaApp(QMainWindow):
 
         # Configurar elementos UI
         self._configurar_ui_elementos(central_widget)
+        CACHE_DISCO.guardar_indice()
+
+        # HUD de rendimiento por encima de todo, se muestra y oculta con F3
+        self.hud = HudRendimiento(self, central_widget, CACHE_PIXMAPS)
+        QShortcut(QKeySequence("F3"), self, self.hud.alternar)
+        if os.environ.get("ARENA_HUD", "0") != "0":
+            self.hud.alternar()
 
     def _configurar_ui_elementos(self, parent):
         """Configurar todos los elementos UI en un método organizado"""
@@ -254,27 +438,74 @@ class ArenaApp(QMainWindow):
         # Para elementos que necesitan escalado uniforme
         self.uniform_scale = min(self.width_scale, self.height_scale) * 0.9  # Pequeño margen
 
+    def closeEvent(self, event):
+        # No dejar decodificaciones en vuelo que notifiquen a una ventana destruida
+        self.cargador_imagenes.detener()
+        if self.vigilante is not None:
+            self.vigilante.detener()
+        self.audio.detener()
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
-        # Actualizar el fondo al redimensionar
         super().resizeEvent(event)
-        self.actualizar_fondo()
-        
-        # Recalcular factores de escala
-        self.calcular_factores_escala()
-        
-        # Aplicar nuevo escalado
+        # Agrupar las ráfagas de redimensionado en un único relayout por fotograma
+        self.programar_relayout()
+
+    def programar_relayout(self):
+        """Programar un relayout para el próximo fotograma, fusionando peticiones repetidas"""
+        self.relayouts_solicitados += 1
+        if self.relayout_timer is None:
+            self.relayout_timer = QTimer(self)
+            self.relayout_timer.setSingleShot(True)
+            self.relayout_timer.setInterval(self._intervalo_relayout())
+            self.relayout_timer.timeout.connect(self._ejecutar_relayout)
+        if not self.relayout_timer.isActive():
+            self.relayout_timer.start()
+
+    def _intervalo_relayout(self):
+        """Milisegundos por fotograma según fps_objetivo de video.json (60 por defecto)"""
+        fps = (self.video_config or {}).get("fps_objetivo", 60)
+        return max(1, int(1000 / fps))
+
+    @trazas.span
+    def _ejecutar_relayout(self):
+        """Relayout programado: no hace nada si el tamaño no ha cambiado"""
+        if (self.width(), self.height()) == self._tamaño_layout:
+            self.relayouts_omitidos += 1
+            return
+        self.relayouts_ejecutados += 1
         self.aplicar_escalado_completo()
 
+    def estadisticas_relayout(self):
+        """Contadores del planificador de relayout"""
+        return {
+            "solicitados": self.relayouts_solicitados,
+            "ejecutados": self.relayouts_ejecutados,
+            "omitidos": self.relayouts_omitidos,
+            "coalescidos": self.relayouts_solicitados - self.relayouts_ejecutados - self.relayouts_omitidos
+        }
+
+    @trazas.span
     def aplicar_escalado_completo(self):
-        """Aplicar escalado a todos los elementos de la UI"""
-        # Recalcular factores de escala
+        """Aplicar escalado a todos los elementos de la UI, saltando lo que no ha cambiado"""
         self.calcular_factores_escala()
         
-        # Actualizar formatos de texto
-        self.actualizar_formatos_texto(self.scale_factor)
+        # Actualizar formatos de texto solo si cambia la escala
+        cubeta_formatos = round(self.scale_factor, 2)
+        if cubeta_formatos != self._cubeta_formatos:
+            self._cubeta_formatos = cubeta_formatos
+            self.actualizar_formatos_texto(self.scale_factor)
+        
+        # Actualizar TODOS los botones solo si cambia su tamaño
+        tamaño_botones = int(80 * self.scale_factor)
+        if tamaño_botones != self._tamaño_botones:
+            self._tamaño_botones = tamaño_botones
+            self.actualizar_imagenes_botones()
         
-        # Actualizar TODOS los botones (reemplaza los dos métodos anteriores)
-        self.actualizar_imagenes_botones()
+        tamaño = (self.width(), self.height())
+        if tamaño == self._tamaño_layout:
+            return
+        self._tamaño_layout = tamaño
         
         # Actualizar etiquetas
         self.actualizar_etiquetas()
@@ -297,41 +528,22 @@ class ArenaApp(QMainWindow):
             if btn is not None:
                 btn.setFixedSize(btn_size, btn_size)
                 if hasattr(btn, 'image_name'):
-                    pixmap = self.escalar_imagen(btn.image_name, (80, 80))
-                    if pixmap:
-                        btn.setIcon(QIcon(pixmap))
-                        btn.setIconSize(QSize(btn_size, btn_size))
+                    self._asignar_icono(btn, btn.image_name, btn_size)
         
-        # Actualizar botones de configuración
-        config_buttons = [
+        # Actualizar botones de configuración y de música
+        otros_botones = [
             (self.btn_nivel_down, "btn_nivel_down.png"),
             (self.btn_nivel_up, "btn_nivel_up.png"),
             (self.btn_apuesta_down, "btn_apuesta_down.png"),
-            (self.btn_apuesta_up, "btn_apuesta_up.png")
-        ]
-        
-        for btn, image_name in config_buttons:
-            if btn is not None:
-                btn.setFixedSize(btn_size, btn_size)
-                pixmap = self.escalar_imagen(image_name, (80, 80))
-                if pixmap:
-                    btn.setIcon(QIcon(pixmap))
-                    btn.setIconSize(QSize(btn_size, btn_size))
-        
-        # Actualizar botones de música
-        music_buttons = [
+            (self.btn_apuesta_up, "btn_apuesta_up.png"),
             (self.btn_musica_on, "btn_con_musica.png"),
             (self.btn_musica_off, "btn_sin_musica.png")
         ]
         
-        for btn, image_name in music_buttons:
+        for btn, image_name in otros_botones:
             if btn is not None:
                 btn.setFixedSize(btn_size, btn_size)
-                pixmap = self.escalar_imagen(image_name, (80, 80))
-                if pixmap:
-                    btn.setIcon(QIcon(pixmap))
-                    btn.setIconSize(QSize(btn_size, btn_size))
-                
+                self._asignar_icono(btn, image_name, btn_size)
 
     def actualizar_etiquetas(self):
         """Actualizar etiquetas de configuración según el factor de escala"""
@@ -410,24 +622,6 @@ class ArenaApp(QMainWindow):
             self.btn_musica_off.move(self.btn_musica_on.pos())
 
     def configurar_paneles_configuracion(self, parent):
-            btn_size = (int(80 * self.scale_factor), int(80 * self.scale_factor))
-        
-        # Cargar imágenes con verificación de errores
-            btn_images = {
-                "nivel_up": "btn_nivel_up.png",
-                "nivel_down": "btn_nivel_down.png", 
-                "apuesta_up": "btn_apuesta_up.png",
-                "apuesta_down": "btn_apuesta_down.png"
-            }
-            
-            for key, image in btn_images.items():
-                pixmap = self.cargar_imagen(image, btn_size)
-                if pixmap:
-                    setattr(self, f"pixmap_{key}", pixmap)
-                else:
-                    print(f"Error: No se pudo cargar la imagen {image}")
-                    setattr(self, f"pixmap_{key}", None)
-            
             # Estilo común para botones
             button_style = """
                 QPushButton {
@@ -441,7 +635,7 @@ class ArenaApp(QMainWindow):
             
             # Configurar botones de NIVEL con verificación
             self.btn_nivel_down = self._crear_boton_configuracion(
-                parent, getattr(self, "pixmap_nivel_down", None), self.decrementar_nivel, button_style
+                parent, "btn_nivel_down.png", self.decrementar_nivel, button_style
             )
             
             self.nivel_label = QLabel("1", parent)
@@ -461,12 +655,12 @@ class ArenaApp(QMainWindow):
                 print("Error: No se pudo crear nivel_label")
             
             self.btn_nivel_up = self._crear_boton_configuracion(
-                parent, getattr(self, "pixmap_nivel_up", None), self.incrementar_nivel, button_style
+                parent, "btn_nivel_up.png", self.incrementar_nivel, button_style
             )
             
             # Configurar botones de APUESTA con verificación
             self.btn_apuesta_down = self._crear_boton_configuracion(
-                parent, getattr(self, "pixmap_apuesta_down", None), self.decrementar_apuesta, button_style
+                parent, "btn_apuesta_down.png", self.decrementar_apuesta, button_style
             )
 
             self.apuesta_label = QLabel("0", parent)
@@ -486,16 +680,15 @@ class ArenaApp(QMainWindow):
                 print("Error: No se pudo crear apuesta_label")
 
             self.btn_apuesta_up = self._crear_boton_configuracion(
-                parent, getattr(self, "pixmap_apuesta_up", None), self.incrementar_apuesta, button_style
+                parent, "btn_apuesta_up.png", self.incrementar_apuesta, button_style
             )
 
-    def _crear_boton_configuracion(self, parent, pixmap, callback, style):
+    def _crear_boton_configuracion(self, parent, imagen, callback, style):
         """Método helper para crear botones de configuración"""
         try:
             btn = QPushButton(parent)
-            if pixmap:
-                btn.setIcon(QIcon(pixmap))
-                btn.setIconSize(QSize(int(80 * self.scale_factor), int(80 * self.scale_factor)))
+            # El icono llega cuando termina su decodificación en segundo plano
+            self._asignar_icono(btn, imagen, int(80 * self.scale_factor))
             btn.setFixedSize(int(80 * self.scale_factor), int(80 * self.scale_factor))
             btn.setStyleSheet(style)
             btn.clicked.connect(callback)
@@ -533,6 +726,9 @@ class ArenaApp(QMainWindow):
         
         # Configurar formatos de texto
         self._configurar_formatos_texto()
+
+        # Los mensajes se escriben por ráfagas en un documento acotado
+        self.registro_log = RegistroQt(self.event_log, self.text_formats)
     
     def _configurar_formatos_texto(self):
         """Configurar todos los formatos de texto en un método organizado"""
@@ -614,15 +810,8 @@ class ArenaApp(QMainWindow):
         # Guardar el nombre de la imagen para poder recargarla si es necesario
         btn.image_name = imagen
         
-        # Cargar imagen con el tamaño base
-        pixmap = self.cargar_imagen(imagen, tamaño)
-        
-        if pixmap:
-            btn.setIcon(QIcon(pixmap))
-            btn.setIconSize(QSize(tamaño[0], tamaño[1]))
-            btn.pixmap = pixmap  # Guardar referencia al pixmap
-        else:
-            btn.setText("?")
+        # Cargar imagen con el tamaño base (en segundo plano si no está en caché)
+        self._asignar_icono(btn, imagen, tamaño[0])
             
         btn.setFixedSize(tamaño[0], tamaño[1])
         btn.setStyleSheet("""
@@ -700,32 +889,19 @@ class ArenaApp(QMainWindow):
             self.apuesta_valor = max(0, self.apuesta_valor - 10)
             self.apuesta_label.setText(str(self.apuesta_valor))
 
-    def iniciar_efecto_parpadeo(self):
-        self.blink_state = False
-        self.blink_timer = QTimer()
-        self.blink_timer.timeout.connect(self.blink_effect)
-        self.blink_timer.start(500)
-
-    def blink_effect(self):
-        if hasattr(self, 'text_formats'):
-            current_color = self.text_formats["critical"].foreground().color()
-            new_color = QColor("#FFCCCB") if current_color.name() == "#8b0000" else QColor("#8b0000")
-            self.text_formats["critical"].setForeground(new_color)
-            self.blink_state = not self.blink_state
-
+    @trazas.span
     def mostrar_mensaje_log(self, mensaje, tag=None):
-        cursor = self.event_log.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        
-        if tag == "critical":
-            cursor.insertText("¡" * 10 + " ATENCIÓN " + "¡" * 10 + "\n", self.text_formats["blink"])
-            cursor.insertText(mensaje + "\n", self.text_formats[tag])
-            cursor.insertText("¡" * 30 + "\n", self.text_formats["blink"])
-        else:
-            cursor.insertText(mensaje + "\n", self.text_formats.get(tag, self.text_formats["center"]))
-        
-        self.event_log.setTextCursor(cursor)
-        self.event_log.ensureCursorVisible()
+        if tag == TAG_CRITICO and self.parpadeo is None:
+            self._crear_parpadeo()
+        # Se vuelca junto con el resto de la ráfaga en el siguiente giro del bucle
+        self.registro_log.agregar(mensaje, tag)
+
+    def _crear_parpadeo(self):
+        """Animación de los mensajes críticos, importada con el primero que llega"""
+        from parpadeo import ParpadeoCritico
+        # Solo anima mientras hay mensajes críticos a la vista
+        self.parpadeo = ParpadeoCritico(self.event_log, self)
+        self.registro_log.contenido_cambiado.connect(self.parpadeo.revisar)
 
     def mostrar_mensaje_bienvenida(self):
         self.mostrar_mensaje_log("\n=== BIENVENIDO A LA ARENA DE LORAINIA ===", "titulo")
@@ -734,25 +910,27 @@ class ArenaApp(QMainWindow):
         self.mostrar_mensaje_log("Reglamento escrito por José Manuel Arena v1.3 y aplicacion por Omar Nieto (DETION)","enemigo")
 
     def inicializar_estados(self):
-        # Usar valores de configuración si están disponibles
-        limites = self.estados_config.get("limites", {})
-        self.moral_grupo = limites.get("moral_max", 10)
-        self.cordura = limites.get("cordura_max", 10)
-        
-        # Reiniciar otros estados
-        self.heroes_nivel = None
-        self.ronda_actual = 1
-        self.encuentro_actual = None
-        self.encuentros = {}
-        self.acciones_heroicas = 0
-        self.acciones_deshonrosas = 0
-        self.bonif_critico = False
-        self.apuesta_activa = False
-        self.apuesta_monedas = 0
+        if self.motor is None:
+            self.motor = ArenaEngine(self.reglas)
+        else:
+            self.motor.reiniciar()
         self.reward_log_visible = False
 
+    def renderizar_eventos(self, eventos):
+        """Pintar los eventos devueltos por el motor"""
+        for evento in eventos:
+            if evento.tipo == EVENTO_LOG:
+                self.mostrar_mensaje_log(evento.mensaje, evento.tag)
+            elif evento.tipo == EVENTO_RONDA:
+                self.audio.efecto("gong")
+            elif evento.tipo == EVENTO_REACCION:
+                self.audio.efecto("aplausos" if evento.datos["tipo_accion"] == "heroica" else "abucheos")
+            elif evento.tipo == EVENTO_RECOMPENSAS:
+                self.audio.efecto("fanfarria")
+                self.mostrar_recompensas(evento.datos)
+
     def reiniciar_arena(self):
-        self.event_log.clear()
+        self.registro_log.limpiar()
         self.event_log.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         self.inicializar_estados()
@@ -768,15 +946,12 @@ class ArenaApp(QMainWindow):
         self.btn_heroico.setEnabled(False)
         self.btn_deshonroso.setEnabled(False)
         
-        # Reiniciar estado de música con pygame (activada por defecto)
+        # Reiniciar estado de música (activada por defecto)
         self.musica_activada = True
         self.btn_musica_off.hide()  # Asegurar que el botón OFF está oculto
         self.btn_musica_on.show()   # Asegurar que el botón ON está visible
         
-        if hasattr(pygame, 'mixer') and pygame.mixer.get_init():
-            pygame.mixer.music.unpause()
-        else:
-            self.inicializar_musica()
+        self.audio.reproducir()
         
         # Reposicionar elementos
         self.aplicar_escalado_completo()
@@ -784,247 +959,42 @@ class ArenaApp(QMainWindow):
         self.mostrar_mensaje_bienvenida()
         self.mostrar_mensaje_log("\n=== ARENA REINICIADA ===", "titulo")
 
+    @trazas.span
     def iniciar_arena(self):
-        nivel = self.nivel_valor
-        apuesta = self.apuesta_valor
-        
         try:
-            if apuesta < 0 or apuesta > 500:
-                raise ValueError("La apuesta debe estar entre 0 y 500")
-
-            # Determinar archivo según nivel y clave para recompensas
-            nivel_config = {
-                (1, 2): {"archivo": "nivel_1_2.json", "clave_recompensa": "nivel_1_2"},
-                (3, 4): {"archivo": "nivel_3_4.json", "clave_recompensa": "nivel_3_4"},
-                (5, 6): {"archivo": "nivel_5_6.json", "clave_recompensa": "nivel_5_6"},
-                (7, 10): {"archivo": "nivel_7_8.json", "clave_recompensa": "nivel_7_8"}
-            }
-            
-            config_seleccionada = None
-            for rango, config in nivel_config.items():
-                if rango[0] <= nivel <= rango[1]:
-                    self.heroes_nivel = f"{rango[0]}_{rango[1]}"
-                    config_seleccionada = config
-                    break
-            
-            if not config_seleccionada:
-                raise ValueError("Nivel debe estar entre 1 y 10")
-
-            # Cargar encuentros
-            encuentros_dir = self.DATA_DIR / "encuentros"
-            if not encuentros_dir.exists():
-                raise ValueError(f"Directorio de encuentros no encontrado: {encuentros_dir}")
-                
-            encuentros_path = encuentros_dir / config_seleccionada["archivo"]
-            if not encuentros_path.exists():
-                raise ValueError(f"Archivo de encuentros no encontrado: {encuentros_path}")
-                
-            with open(encuentros_path, "r", encoding="utf-8") as f:
-                self.encuentros = json.load(f)
-
-            self.apuesta_monedas = apuesta
-            self.apuesta_activa = apuesta > 0
-
-            # Obtener el multiplicador de recompensas usando la clave correcta
-            recompensa = self.recompensas.get(config_seleccionada["clave_recompensa"], {})
-            multiplicador = recompensa.get("multiplicador_monedas", 1.0)
-            
-            # MOSTRAR MENSAJE DEL SPEAKER SOBRE LA APUESTA
-            self.mostrar_mensaje_log("\n«¡Atención, nobles espectadores!»", "speaker")
-            
-            if self.apuesta_activa:
-                ganancia_potencial = int(self.apuesta_monedas * multiplicador)
-                self.mostrar_mensaje_log(f"«¡Nuestros valientes héroes han apostado {self.apuesta_monedas} monedas!»", "speaker")
-                self.mostrar_mensaje_log(f"«Si logran la victoria, obtendrán {ganancia_potencial} monedas adicionales!»", "speaker")
-            else:
-                self.mostrar_mensaje_log("«¡Jajaja nuestros héroes no han apostado o eso quiere decir que solo les queda la vida!»", "speaker")
-                self.mostrar_mensaje_log("«¡Una muestra de valentía o tal vez de locura!»", "speaker")
-            
-            self.mostrar_mensaje_log("«¡Que comience el espectáculo!»", "speaker")
-
-            # Habilitar botones apropiados
-            self.btn_iniciar.setEnabled(False)
-            self.btn_ronda.setEnabled(True)
-            self.btn_heroico.setEnabled(True)
-            self.btn_deshonroso.setEnabled(True)
-            
-            self.mostrar_mensaje_log(f"\n=== HÉROES DE NIVEL {self.heroes_nivel.replace('_', '-')} ===", "titulo")
-            if self.apuesta_activa:
-                self.mostrar_mensaje_log(f"¡Has apostado {self.apuesta_monedas} monedas!", "apuesta")
-            else:
-                self.mostrar_mensaje_log("¡No has realizado ninguna apuesta!", "apuesta")
-                
-            self.ejecutar_ronda(1)
-
+            eventos = self.motor.iniciar_arena(self.nivel_valor, self.apuesta_valor)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo iniciar la arena:\n{str(e)}")
             # Reactivar botón en caso de error
             self.btn_iniciar.setEnabled(True)
+            return
 
-    def ejecutar_ronda(self, ronda):
-            self.ronda_actual = ronda
-            tipo_ronda = "Calentamiento" if ronda == 1 else "Desafío" if ronda == 2 else "Jefe Final"
-
-            encuentros_ronda = self.encuentros[f"ronda_{ronda}"]
-            tirada = random.randint(1, 100)
-
-            for encuentro in encuentros_ronda:
-                rango_min, rango_max = map(int, encuentro["rango"].split("-"))
-                if rango_min <= tirada <= rango_max:
-                    self.encuentro_actual = encuentro["enemigos"]
-                    break
-            else:
-                # Si no se encuentra encuentro, usar el último por defecto
-                self.encuentro_actual = encuentros_ronda[-1]["enemigos"]
-
-            self.mostrar_mensaje_log(f"\n=== RONDA {ronda}: {tipo_ronda.upper()} ===", "ronda")
-            self.mostrar_mensaje_log(f"Tirada: {tirada}", "enemigo")
-            self.mostrar_enemigos()
-            self.bonif_critico = False
-
-    def mostrar_enemigos(self):
-        enemigos = self.encuentro_actual.split(" y ")
-        self.mostrar_mensaje_log("\nENEMIGOS EN LA ARENA:", "enemigo")
-        
-        # Diccionario de iconos para tipos de enemigos
-        iconos_enemigos = {
-            "Hechicero": "🧙",
-            "Escudo": "🛡️", 
-            "Espada": "⚔️",
-            "Hacha": "⚔️"
-        }
+        # Habilitar botones apropiados
+        self.btn_iniciar.setEnabled(False)
+        self.btn_ronda.setEnabled(True)
+        self.btn_heroico.setEnabled(True)
+        self.btn_deshonroso.setEnabled(True)
         
-        for enemigo in enemigos:
-            icono = "🐺"  # Por defecto
-            for tipo, emoji in iconos_enemigos.items():
-                if tipo in enemigo:
-                    icono = emoji
-                    break
-                    
-            self.mostrar_mensaje_log(f"{icono} {enemigo.strip()}", "enemigo")
+        self.renderizar_eventos(eventos)
 
+    @trazas.span
     def evaluar_accion(self, tipo_accion):
-        if tipo_accion == "heroica":
-            self.acciones_heroicas += 1
-            tag = "heroico"
-            tipo_reaccion = "apoyo"
-            self.actualizar_estados("heroica")
-        else:
-            self.acciones_deshonrosas += 1
-            tag = "deshonroso"
-            tipo_reaccion = "desprecio"
-            self.actualizar_estados("deshonrosa")
-
-        reacciones = self.comportamiento["reacciones_publico"][tipo_reaccion]
-        reaccion = random.choice(reacciones)
-
-        self.mostrar_mensaje_log(f"\nLos héroes realizan una acción {tipo_accion}:", tag)
-        self.mostrar_mensaje_log(f"» {reaccion['efecto']}", "critical" if reaccion['id'] > 15 else "efecto")
-
-        self.aplicar_efecto_publico(reaccion['id'], tipo_accion == "heroica")
+        self.renderizar_eventos(self.motor.evaluar_accion(tipo_accion))
         self.btn_heroico.setEnabled(False)
         self.btn_deshonroso.setEnabled(False)
 
-    def aplicar_efecto_publico(self, id_efecto, es_apoyo):
-        if es_apoyo:
-            if id_efecto == 4:
-                self.bonif_critico = True
-            elif id_efecto == 19:
-                self.moral_grupo = min(self.estados_config["limites"]["moral_max"], self.moral_grupo + 1)
-        else:
-            if id_efecto == 4:
-                self.moral_grupo = max(0, self.moral_grupo - 1)
-            elif id_efecto == 5:
-                self.cordura = max(0, self.cordura - 1)
-        self.actualizar_estados()
-
-    def actualizar_estados(self, accion=None):
-        if accion == "heroica":
-            self.moral_grupo = min(
-                self.estados_config["limites"]["moral_max"],
-                self.moral_grupo + self.estados_config["efectos"]["heroico"]["moral"]
-            )
-        elif accion == "deshonrosa":
-            self.cordura = max(
-                0,
-                self.cordura + self.estados_config["efectos"]["deshonroso"]["cordura"]
-            )
-
-        self.mostrar_mensaje_log(
-            f"\nMoral del Grupo: {self.moral_grupo}/{self.estados_config['limites']['moral_max']} "
-            f"| Cordura: {self.cordura}/{self.estados_config['limites']['cordura_max']}",
-            "efecto"
-        )
-
-    def mostrar_descanso(self):
-        # Cambiar esto para que siempre sea descanso corto
-        tipo = "corto"  # Eliminar la condición que determina el tipo
-        descanso = self.descansos[tipo]
-
-        self.mostrar_mensaje_log(f"\n=== {descanso['descripcion']} ===", "titulo")
-        for beneficio in descanso["beneficios"]:
-            self.mostrar_mensaje_log(beneficio, "lista")
-
-        self.moral_grupo = min(
-            self.estados_config["limites"]["moral_max"],
-            self.moral_grupo + descanso["efectos"]["moral"]
-        )
-        
-        # Parsear y aplicar efecto de cordura
-        cordura_efecto = descanso["efectos"]["cordura"]
-        if "d" in cordura_efecto:
-            dado_cordura = int(cordura_efecto.split("d")[1])
-            cordura_sumada = random.randint(1, dado_cordura)
-        else:
-            cordura_sumada = int(cordura_efecto)
-            
-        self.cordura = min(
-            self.estados_config["limites"]["cordura_max"],
-            self.cordura + cordura_sumada
-        )
-        self.actualizar_estados()
-
+    @trazas.span
     def siguiente_ronda(self):
-        if self.ronda_actual < 3:
-            # Primero mostrar descanso después de la ronda actual
-            if self.ronda_actual > 0:  # Mostrar descanso después de ronda 1 y 2
-                self.mostrar_descanso()
-            
-            self.ronda_actual += 1
-            self.ejecutar_ronda(self.ronda_actual)
-            self.btn_heroico.setEnabled(True)
-            self.btn_deshonroso.setEnabled(True)
-        else:
-            self.mostrar_recompensas()
+        self.renderizar_eventos(self.motor.siguiente_ronda())
+        if self.motor.estado.terminado:
             self.btn_heroico.setEnabled(False)
             self.btn_deshonroso.setEnabled(False)
             self.btn_ronda.setEnabled(False)
+        else:
+            self.btn_heroico.setEnabled(True)
+            self.btn_deshonroso.setEnabled(True)
 
-    def mostrar_recompensas(self):
-        # Mapear el nivel a la clave correcta del JSON
-        nivel_config = {
-            "1_2": "nivel_1_2",
-            "3_4": "nivel_3_4", 
-            "5_6": "nivel_5_6",
-            "7_10": "nivel_7_8"  # Los niveles 7-10 usan la clave "nivel_7_8"
-        }
-        
-        clave_recompensa = nivel_config.get(self.heroes_nivel, "nivel_1_2")
-        recompensa = self.recompensas.get(clave_recompensa, {})
-        multiplicador = recompensa.get("multiplicador_monedas", 1.0)
-        monedas_base = recompensa.get("monedas", 0)
-        
-        # Calcular monedas ganadas
-        monedas_ganadas = monedas_base
-        
-        # Solo aplicar multiplicador si el usuario apostó algo
-        if self.apuesta_activa and self.apuesta_monedas > 0:
-            ganancia_apuesta = int(self.apuesta_monedas * multiplicador)
-            monedas_ganadas += ganancia_apuesta
-
-        experiencia_ganada = recompensa.get("experiencia", 0)
-        tesoros_ganados = recompensa.get("tesoros", [])
-
+    def mostrar_recompensas(self, recompensas):
         # MOSTRAR EN EL LOG DE RECOMPENSAS
         if hasattr(self, 'reward_log'):
             self.reward_log.clear()
@@ -1033,17 +1003,17 @@ class ArenaApp(QMainWindow):
             
             cursor = self.reward_log.textCursor()
             cursor.insertText("=== VICTORIA ===\n", self.text_formats["titulo"])
-            cursor.insertText(f"» {monedas_ganadas} monedas de oro\n", self.text_formats["lista"])
+            cursor.insertText(f"» {recompensas['monedas']} monedas de oro\n", self.text_formats["lista"])
             
             # Mostrar desglose de la apuesta si hubo apuesta
-            if self.apuesta_activa and self.apuesta_monedas > 0:
-                cursor.insertText(f"   - Base: {monedas_base} monedas\n", self.text_formats["lista"])
-                cursor.insertText(f"   - Apuesta: +{int(self.apuesta_monedas * multiplicador)} monedas\n", self.text_formats["lista"])
+            if recompensas["ganancia_apuesta"]:
+                cursor.insertText(f"   - Base: {recompensas['monedas_base']} monedas\n", self.text_formats["lista"])
+                cursor.insertText(f"   - Apuesta: +{recompensas['ganancia_apuesta']} monedas\n", self.text_formats["lista"])
             
-            cursor.insertText(f"» {experiencia_ganada} puntos de experiencia\n", self.text_formats["lista"])
+            cursor.insertText(f"» {recompensas['experiencia']} puntos de experiencia\n", self.text_formats["lista"])
             
             # Añadir los tesoros ganados
-            for tesoro in tesoros_ganados:
+            for tesoro in recompensas["tesoros"]:
                 cursor.insertText(f"» {tesoro}\n", self.text_formats["lista"])
                 
             self.reward_log.setTextCursor(cursor)
@@ -1064,10 +1034,13 @@ class ArenaApp(QMainWindow):
                 # Abrir PDF según el sistema operativo
                 if sys.platform == "win32":
                     os.startfile(str(reglas_path))
-                elif sys.platform == "darwin":
-                    subprocess.run(["open", str(reglas_path)])
                 else:
-                    subprocess.run(["xdg-open", str(reglas_path)])
+                    # Solo hace falta aquí: fuera de las importaciones del arranque
+                    import subprocess
+                    # Popen: el visor (o xdg-open) no bloquea el bucle de eventos
+                    visor = "open" if sys.platform == "darwin" else "xdg-open"
+                    subprocess.Popen([visor, str(reglas_path)], stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.DEVNULL, start_new_session=True)
                 
                 self.mostrar_mensaje_log("\nAbriendo reglas de la arena...", "publico")
             else:
@@ -1078,9 +1051,15 @@ class ArenaApp(QMainWindow):
 
 
 def main():
-    app = QApplication(sys.argv)
+    # --traza[=ruta] guarda una traza Chrome de los caminos calientes al salir
+    argumentos = trazas.activar_desde_argumentos(sys.argv)
+    # --vigilante[=ms] informa de los bloqueos del bucle de eventos
+    argumentos, umbral_vigilante = umbral_configurado(argumentos)
+    app = QApplication(argumentos)
     window = ArenaApp()
     window.show()
+    if umbral_vigilante:
+        window.vigilante = VigilanteBloqueos(umbral_vigilante).iniciar()
     sys.exit(app.exec())
 
 
@@ -0,0 +1,246 @@
+"""Modelo de configuración compilado e inmutable, con instantánea en disco.
+
+Los JSON de reglas (estados, descansos, recompensas y comportamiento) se
+validan y se compilan en objetos de solo lectura con __slots__, de modo que el
+motor lee atributos (reglas.heroico.moral, tier.recompensa.monedas) en lugar
+de recorrer diccionarios con claves de texto en cada acción. La tabla de tiers
+está precalculada por nivel y cada tier lleva ya su recompensa y sus tablas de
+encuentros.
+
+cargar_configuracion() guarda el resultado con pickle en el directorio de
+caché, con una clave formada por los hashes de los JSON de origen y de los
+encuentros: mientras no cambien, el arranque no analiza ningún JSON.
+"""
+import hashlib
+from pathlib import Path
+
+import dados
+from cache_disco import cargar_compilado, directorio_cache_predeterminado, hash_archivo, leer_json
+from catalogo_encuentros import archivos_catalogo, cargar_catalogo, clave_catalogo
+from tablas_aleatorias import compilar_reacciones
+
+# Cambiar al modificar las clases del modelo o la forma de compilarlas
+VERSION_MODELO = 2
+
+# (nivel mínimo, nivel máximo), archivo de encuentros, clave en recompensas.json
+NIVELES = (
+    ((1, 2), "nivel_1_2.json", "nivel_1_2"),
+    ((3, 4), "nivel_3_4.json", "nivel_3_4"),
+    ((5, 6), "nivel_5_6.json", "nivel_5_6"),
+    ((7, 10), "nivel_7_8.json", "nivel_7_8"),
+)
+
+# atributo -> archivo dentro de assets/data
+ARCHIVOS_REGLAS = {
+    "estados_config": "estados.json",
+    "descansos": "descansos.json",
+    "recompensas": "recompensas.json",
+    "comportamiento": "comportamiento.json",
+}
+ARCHIVOS_INTERFAZ = {
+    "ui_config": "ui_config.json",
+    "video_config": "config/video.json",
+    "sonido_config": "config/sonido.json",
+}
+
+
+class _Congelado:
+    """Base de los objetos del modelo: de solo lectura y serializables con pickle"""
+
+    __slots__ = ()
+    # Argumentos del constructor, en orden; el resto de los slots se derivan de ellos
+    _campos = ()
+
+    def __init__(self, *valores):
+        for campo, valor in zip(self._campos, valores):
+            object.__setattr__(self, campo, valor)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError(f"{type(self).__name__} es de solo lectura")
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, campo) for campo in self._campos)
+
+    def __repr__(self):
+        campos = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in self._campos)
+        return f"{type(self).__name__}({campos})"
+
+
+class Efecto(_Congelado):
+    """Cambio de moral y cordura de una acción"""
+
+    __slots__ = _campos = ("moral", "cordura")
+
+
+class Descanso(_Congelado):
+    _campos = ("descripcion", "duracion", "beneficios", "moral", "cordura")
+    __slots__ = _campos + ("expresion_cordura",)
+
+    def __init__(self, *valores):
+        super().__init__(*valores)
+        # Las funciones de tirada no se serializan: se compilan al crear (y al cargar) el objeto
+        object.__setattr__(self, "expresion_cordura", dados.compilar(self.cordura))
+
+
+class Recompensa(_Congelado):
+    __slots__ = _campos = ("nivel", "monedas", "experiencia", "tesoros", "multiplicador_monedas")
+
+
+RECOMPENSA_VACIA = Recompensa("", 0, 0, (), 1.0)
+
+
+class Tier(_Congelado):
+    """Tier de niveles de héroes con su recompensa y sus tablas d100 por ronda"""
+
+    _campos = ("minimo", "maximo", "archivo", "clave_recompensa", "recompensa", "rondas")
+    __slots__ = _campos + ("heroes_nivel",)
+
+    def __init__(self, *valores):
+        super().__init__(*valores)
+        object.__setattr__(self, "heroes_nivel", f"{self.minimo}_{self.maximo}")
+
+
+class Reglas(_Congelado):
+    """Reglas del torneo ya validadas; tier_por_nivel[n] es el tier del nivel n"""
+
+    _campos = ("moral_max", "cordura_max", "heroico", "deshonroso", "descanso_corto",
+               "descanso_largo", "tiers", "apoyo", "desprecio")
+    __slots__ = _campos + ("tier_por_nivel",)
+
+    def __init__(self, *valores):
+        super().__init__(*valores)
+        por_nivel = [None] * (max(tier.maximo for tier in self.tiers) + 1)
+        for tier in self.tiers:
+            for nivel in range(tier.minimo, tier.maximo + 1):
+                por_nivel[nivel] = tier
+        object.__setattr__(self, "tier_por_nivel", tuple(por_nivel))
+
+
+class ConfiguracionApp(_Congelado):
+    """Lo que carga la aplicación de escritorio: reglas compiladas y JSON de interfaz"""
+
+    __slots__ = _campos = ("reglas", "ui_config", "video_config", "sonido_config")
+
+
+# ----- validación -----
+
+def _valor(datos, clave, donde):
+    try:
+        return datos[clave]
+    except (KeyError, TypeError):
+        raise ValueError(f"{donde}: falta '{clave}'") from None
+
+
+def _entero(valor, donde):
+    if isinstance(valor, bool) or not isinstance(valor, int):
+        raise ValueError(f"{donde}: se esperaba un número entero, no {valor!r}")
+    return valor
+
+
+def _numero(valor, donde):
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise ValueError(f"{donde}: se esperaba un número, no {valor!r}")
+    return valor
+
+
+def _efecto(datos, donde):
+    return Efecto(_entero(_valor(datos, "moral", donde), f"{donde}.moral"),
+                  _entero(_valor(datos, "cordura", donde), f"{donde}.cordura"))
+
+
+def _descanso(datos, donde):
+    efectos = _valor(datos, "efectos", donde)
+    cordura = str(_valor(efectos, "cordura", f"{donde}.efectos"))
+    try:
+        dados.compilar(cordura)
+    except ValueError as e:
+        raise ValueError(f"{donde}.efectos.cordura: {e}") from None
+    return Descanso(str(_valor(datos, "descripcion", donde)), str(datos.get("duracion", "")),
+                    tuple(str(beneficio) for beneficio in _valor(datos, "beneficios", donde)),
+                    _entero(_valor(efectos, "moral", f"{donde}.efectos"), f"{donde}.efectos.moral"),
+                    cordura)
+
+
+def _recompensa(datos, donde):
+    return Recompensa(str(datos.get("nivel", "")),
+                      _entero(datos.get("monedas", 0), f"{donde}.monedas"),
+                      _entero(datos.get("experiencia", 0), f"{donde}.experiencia"),
+                      tuple(str(tesoro) for tesoro in datos.get("tesoros", ())),
+                      _numero(datos.get("multiplicador_monedas", 1.0), f"{donde}.multiplicador_monedas"))
+
+
+def compilar_reglas(estados_config, descansos, recompensas, comportamiento, catalogo, reacciones=None):
+    """Validar los JSON de reglas y compilarlos en un objeto Reglas.
+
+    catalogo es el de catalogo_encuentros (archivo de tier -> {"ronda_N": TablaD100});
+    las reacciones se pueden pasar ya compiladas para compartirlas.
+    """
+    limites = estados_config.get("limites", {})
+    efectos = _valor(estados_config, "efectos", "estados")
+
+    tiers = []
+    for (minimo, maximo), archivo, clave in NIVELES:
+        datos = recompensas.get(clave)
+        recompensa = _recompensa(datos, f"recompensas.{clave}") if datos is not None else RECOMPENSA_VACIA
+        tablas = catalogo.get(archivo)
+        # Sin archivo de encuentros el tier existe, pero iniciar_arena lo rechaza
+        rondas = {int(ronda.rsplit("_", 1)[1]): tabla for ronda, tabla in tablas.items()} if tablas else None
+        tiers.append(Tier(minimo, maximo, archivo, clave, recompensa, rondas))
+
+    if reacciones is None:
+        reacciones = compilar_reacciones(comportamiento)
+    largo = descansos.get("largo")
+    return Reglas(
+        _entero(limites.get("moral_max", 10), "estados.limites.moral_max"),
+        _entero(limites.get("cordura_max", 10), "estados.limites.cordura_max"),
+        _efecto(_valor(efectos, "heroico", "estados.efectos"), "estados.efectos.heroico"),
+        _efecto(_valor(efectos, "deshonroso", "estados.efectos"), "estados.efectos.deshonroso"),
+        _descanso(_valor(descansos, "corto", "descansos"), "descansos.corto"),
+        _descanso(largo, "descansos.largo") if largo is not None else None,
+        tuple(tiers),
+        _valor(reacciones, "apoyo", "comportamiento.reacciones_publico"),
+        _valor(reacciones, "desprecio", "comportamiento.reacciones_publico"),
+    )
+
+
+# ----- carga con instantánea -----
+
+def compilar_configuracion(data_dir, paquete=None):
+    """Leer los JSON de assets/data y compilar la configuración completa"""
+    data_dir = Path(data_dir)
+    datos = {attr: leer_json(data_dir / file_name, paquete)
+             for attr, file_name in {**ARCHIVOS_REGLAS, **ARCHIVOS_INTERFAZ}.items()}
+    catalogo = cargar_catalogo(data_dir / "encuentros", paquete=paquete)
+    reglas = compilar_reglas(datos["estados_config"], datos["descansos"], datos["recompensas"],
+                             datos["comportamiento"], catalogo)
+    return ConfiguracionApp(reglas, datos["ui_config"], datos["video_config"], datos["sonido_config"])
+
+
+def archivos_origen(data_dir):
+    """Todos los archivos de los que depende la configuración compilada"""
+    data_dir = Path(data_dir)
+    archivos = [data_dir / file_name for file_name in (*ARCHIVOS_REGLAS.values(), *ARCHIVOS_INTERFAZ.values())]
+    return archivos + archivos_catalogo(data_dir / "encuentros")
+
+
+def clave_configuracion(data_dir, paquete=None):
+    """Hash de todos los archivos de origen de la configuración"""
+    data_dir = Path(data_dir)
+    h = hashlib.sha1(f"v{VERSION_MODELO}".encode())
+    for file_name in (*ARCHIVOS_REGLAS.values(), *ARCHIVOS_INTERFAZ.values()):
+        ruta = data_dir / file_name
+        # Con un PaqueteRecursos el hash sale de su índice, sin leer el JSON
+        digest = paquete.hash(ruta) if paquete is not None else None
+        h.update(file_name.encode())
+        h.update((digest or hash_archivo(ruta)).encode())
+    h.update(clave_catalogo(data_dir / "encuentros", paquete).encode())
+    return h.hexdigest()
+
+
+def cargar_configuracion(data_dir, directorio_cache=None, paquete=None):
+    """Configuración compilada, desde la instantánea en disco si los JSON no han cambiado"""
+    return cargar_compilado(
+        Path(directorio_cache or directorio_cache_predeterminado()) / "configuracion", "configuracion", data_dir,
+        clave_configuracion(data_dir, paquete), lambda: compilar_configuracion(data_dir, paquete),
+        "la instantánea de la configuración",
+    )
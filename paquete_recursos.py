@@ -0,0 +1,255 @@
+"""Paquete único de recursos proyectado en memoria.
+
+`python paquete_recursos.py` junta assets/imagenes, assets/tokens, assets/audio
+y assets/data en un solo archivo (assets.pak) con una cabecera, un índice JSON
+(desplazamiento, tamaño, SHA-1, mtime y tamaño en disco de cada archivo) y los
+datos alineados. Al arrancar se proyecta con mmap: abrirlo cuesta unas pocas
+llamadas al sistema (open, fstat, mmap y un stat por directorio de origen) en
+lugar de abrir más de cien archivos sueltos, y cada recurso es una memoryview
+sobre la proyección.
+
+La primera vez que se pide un recurso se compara con un stat del archivo suelto
+(más barato que abrirlo y leerlo): si se ha editado después de construir el
+paquete, ese recurso se lee del archivo suelto. Si el paquete no existe, está
+desactivado (ARENA_PAQUETE=0) o algún directorio de origen ha cambiado
+(archivos añadidos, borrados o renombrados), todo se lee de los archivos
+sueltos como antes.
+
+La integridad se comprueba en un hilo en segundo plano una vez arrancada la
+aplicación; un recurso que no coincide con su hash se sirve a partir de
+entonces desde el archivo suelto.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+# magia, versión, reservado, longitud del índice
+CABECERA = struct.Struct("<4sHHQ")
+MAGIA = b"ARNP"
+VERSION = 2
+# Los datos de cada archivo empiezan en un múltiplo de ALINEACION
+ALINEACION = 64
+DIRECTORIOS = ("imagenes", "tokens", "audio", "data")
+# El PDF de reglas lo abre un visor externo: tiene que seguir siendo un archivo suelto
+EXTENSIONES_EXCLUIDAS = {".pdf"}
+NOMBRE_PAQUETE = "assets.pak"
+VARIABLE_ENTORNO = "ARENA_PAQUETE"
+
+
+def _archivos_origen(raiz):
+    for directorio in DIRECTORIOS:
+        for ruta in sorted((raiz / directorio).rglob("*")):
+            if ruta.is_file() and ruta.suffix.lower() not in EXTENSIONES_EXCLUIDAS:
+                yield ruta
+
+
+def _directorios_origen(raiz):
+    """Directorios cuyo mtime delata archivos añadidos, borrados o reemplazados"""
+    directorios = []
+    for directorio in DIRECTORIOS:
+        base = raiz / directorio
+        if base.is_dir():
+            directorios.append(base)
+            directorios.extend(sorted(ruta for ruta in base.rglob("*") if ruta.is_dir()))
+    return directorios
+
+
+def construir(raiz, destino):
+    """Empaquetar los recursos de `raiz` (la carpeta assets) en `destino`"""
+    raiz, destino = Path(raiz), Path(destino)
+    archivos = {}
+    desplazamiento = 0
+    contenidos = []
+    for ruta in _archivos_origen(raiz):
+        estado = ruta.stat()
+        datos = ruta.read_bytes()
+        relativa = ruta.relative_to(raiz).as_posix()
+        archivos[relativa] = [desplazamiento, len(datos), hashlib.sha1(datos).hexdigest(),
+                              estado.st_mtime_ns, estado.st_size]
+        contenidos.append(datos)
+        desplazamiento += -(-len(datos) // ALINEACION) * ALINEACION
+
+    directorios = {ruta.relative_to(raiz).as_posix(): ruta.stat().st_mtime_ns
+                   for ruta in _directorios_origen(raiz)}
+    indice = json.dumps({"directorios": directorios, "archivos": archivos},
+                        ensure_ascii=False).encode("utf-8")
+    inicio_datos = -(-(CABECERA.size + len(indice)) // ALINEACION) * ALINEACION
+
+    tmp = destino.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, 0, len(indice)))
+        f.write(indice)
+        f.write(b"\0" * (inicio_datos - CABECERA.size - len(indice)))
+        for datos in contenidos:
+            f.write(datos)
+            f.write(b"\0" * (-len(datos) % ALINEACION))
+    os.replace(tmp, destino)
+    return len(archivos), destino.stat().st_size
+
+
+class PaqueteRecursos:
+    """Acceso a los recursos de assets, desde el paquete si está disponible.
+
+    Todas las rutas son las de los archivos sueltos (assets/imagenes/x.png);
+    las que no están en el paquete se leen del disco, así que quien lo usa no
+    necesita saber si hay paquete.
+    """
+
+    def __init__(self, raiz, ruta_paquete=None):
+        self.raiz = Path(raiz)
+        self.ruta = Path(ruta_paquete) if ruta_paquete else None
+        self.mapa = None
+        self._inicio_datos = 0
+        self._archivos = {}
+        self.corruptos = set()
+        # Recursos editados después de construir el paquete: se leen del archivo suelto
+        self.desactualizados = set()
+        # relativa -> True si el archivo suelto sigue igual que al empaquetar (un stat por recurso)
+        self._comprobados = {}
+        self.verificados = 0
+        self._verificador = None
+        if self.ruta is not None:
+            self._abrir()
+
+    def _abrir(self):
+        try:
+            with open(self.ruta, "rb") as f:
+                mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+
+        try:
+            magia, version, _, longitud = CABECERA.unpack_from(mapa, 0)
+            if magia != MAGIA or version != VERSION:
+                raise ValueError("cabecera desconocida")
+            indice = json.loads(mapa[CABECERA.size:CABECERA.size + longitud])
+            for relativa, mtime in indice["directorios"].items():
+                if os.stat(self.raiz / relativa).st_mtime_ns != mtime:
+                    print(f"Paquete de recursos desactualizado ({relativa} ha cambiado): "
+                          f"se usan los archivos sueltos")
+                    mapa.close()
+                    return
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            print(f"Paquete de recursos no válido ({self.ruta}): {e}")
+            mapa.close()
+            return
+
+        self.mapa = mapa
+        self._inicio_datos = -(-(CABECERA.size + longitud) // ALINEACION) * ALINEACION
+        self._archivos = indice["archivos"]
+
+    @property
+    def disponible(self):
+        return self.mapa is not None
+
+    def _entrada(self, ruta):
+        if self.mapa is None:
+            return None
+        try:
+            relativa = Path(ruta).relative_to(self.raiz).as_posix()
+        except ValueError:
+            return None
+        if relativa in self.corruptos:
+            return None
+        entrada = self._archivos.get(relativa)
+        if entrada is None:
+            return None
+        vigente = self._comprobados.get(relativa)
+        if vigente is None:
+            vigente = self._comprobados[relativa] = self._vigente(relativa, entrada)
+        return entrada if vigente else None
+
+    def _vigente(self, relativa, entrada):
+        """¿Coincide el archivo suelto (mtime y tamaño) con el que se empaquetó?"""
+        try:
+            estado = os.stat(self.raiz / relativa)
+        except OSError:
+            estado = None
+        if estado is not None and (estado.st_mtime_ns, estado.st_size) == (entrada[3], entrada[4]):
+            return True
+        self.desactualizados.add(relativa)
+        print(f"Recurso modificado después de construir el paquete: {relativa} (se usa el archivo suelto)")
+        return False
+
+    def vista(self, ruta):
+        """memoryview del contenido empaquetado (sin copia) o None si no está en el paquete"""
+        entrada = self._entrada(ruta)
+        if entrada is None:
+            return None
+        inicio = self._inicio_datos + entrada[0]
+        return memoryview(self.mapa)[inicio:inicio + entrada[1]]
+
+    def existe(self, ruta):
+        return self._entrada(ruta) is not None or Path(ruta).exists()
+
+    def leer(self, ruta):
+        """Contenido completo como bytes, del paquete o del archivo suelto"""
+        vista = self.vista(ruta)
+        if vista is not None:
+            return bytes(vista)
+        with open(ruta, "rb") as f:
+            return f.read()
+
+    def hash(self, ruta):
+        """SHA-1 registrado en el índice, o None si el recurso no está en el paquete"""
+        entrada = self._entrada(ruta)
+        return entrada[2] if entrada is not None else None
+
+    # ----- integridad -----
+
+    def verificar_en_segundo_plano(self):
+        """Comprobar los hashes de todo el paquete en un hilo (una sola vez)"""
+        if self.mapa is None or self._verificador is not None:
+            return
+        self._verificador = threading.Thread(target=self._verificar, name="verificar-paquete", daemon=True)
+        self._verificador.start()
+
+    def _verificar(self):
+        inicio = time.perf_counter()
+        for relativa, (desplazamiento, tamaño, digest, *_) in list(self._archivos.items()):
+            posicion = self._inicio_datos + desplazamiento
+            # hashlib suelta el GIL con bloques grandes: no frena al hilo de la GUI
+            with memoryview(self.mapa)[posicion:posicion + tamaño] as vista:
+                correcto = hashlib.sha1(vista).hexdigest() == digest
+            if not correcto:
+                self.corruptos.add(relativa)
+                print(f"Recurso dañado en el paquete: {relativa} (se usará el archivo suelto)")
+            self.verificados += 1
+        print(f"Paquete de recursos verificado en {(time.perf_counter() - inicio) * 1000:.0f} ms: "
+              f"{self.verificados} recursos, {len(self.corruptos)} dañados")
+
+
+def abrir_paquete(base_dir):
+    """Paquete de base_dir/assets.pak (o el de ARENA_PAQUETE); sin él todo va a los archivos sueltos"""
+    base_dir = Path(base_dir)
+    valor = os.environ.get(VARIABLE_ENTORNO, "")
+    if valor == "0":
+        ruta = None
+    else:
+        ruta = Path(valor) if valor and valor != "1" else base_dir / NOMBRE_PAQUETE
+    return PaqueteRecursos(base_dir / "assets", ruta)
+
+
+def main():
+    # Solo para la línea de órdenes: la aplicación importa este módulo al arrancar
+    import argparse
+
+    base_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Empaquetar los recursos de assets en un único archivo")
+    parser.add_argument("--raiz", default=base_dir / "assets", type=Path, help="Carpeta assets")
+    parser.add_argument("--salida", default=base_dir / NOMBRE_PAQUETE, type=Path, help="Paquete a generar")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    archivos, tamaño = construir(args.raiz, args.salida)
+    print(f"{args.salida}: {archivos} archivos, {tamaño / 2**20:.1f} MB "
+          f"en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
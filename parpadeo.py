@@ -0,0 +1,128 @@
+"""Parpadeo de los mensajes críticos del log de la aplicación de escritorio.
+
+RegistroQt marca con ESTADO_CRITICO el bloque de cada mensaje crítico. Mientras
+alguno de esos bloques está a la vista y la ventana no está minimizada, una
+QPropertyAnimation en bucle mueve la propiedad `fase` entre 0 y 1, y el color
+se aplica como selección extra del QTextEdit: no se modifica el documento (no
+hay relayout) y solo se repintan los rectángulos de esos bloques. Cuando no
+queda ninguno visible la animación se para, así que sin parpadeo no hay ningún
+temporizador despertando al proceso.
+
+El color se cuantiza en `niveles` pasos y solo se repinta al cambiar de paso,
+y como mucho `fps` veces por segundo.
+"""
+import time
+
+from PyQt6.QtCore import QEasingCurve, QEvent, QObject, QPoint, QPropertyAnimation, pyqtProperty
+from PyQt6.QtGui import QColor, QTextCharFormat, QTextCursor
+from PyQt6.QtWidgets import QTextEdit
+
+from registro_qt import ESTADO_CRITICO
+
+
+class ParpadeoCritico(QObject):
+    """Anima el color de los mensajes críticos visibles de un QTextEdit"""
+
+    def __init__(self, editor, ventana, color_base="#8B0000", color_destello="#FFCCCB",
+                 periodo_ms=1000, niveles=8, fps=30):
+        super().__init__(editor)
+        self.editor = editor
+        self.ventana = ventana
+        self.color_base = QColor(color_base)
+        self.color_destello = QColor(color_destello)
+        self.niveles = niveles
+        self.intervalo_minimo = 1.0 / fps
+
+        self._fase = 0.0
+        self._nivel = 0
+        self._ultimo_repintado = 0.0
+        self.repintados = 0
+
+        self.animacion = QPropertyAnimation(self, b"fase", self)
+        self.animacion.setDuration(periodo_ms)
+        self.animacion.setStartValue(0.0)
+        self.animacion.setKeyValueAt(0.5, 1.0)
+        self.animacion.setEndValue(0.0)
+        self.animacion.setEasingCurve(QEasingCurve.Type.InOutSine)
+        self.animacion.setLoopCount(-1)
+
+        editor.verticalScrollBar().valueChanged.connect(self.revisar)
+        ventana.installEventFilter(self)
+
+    @pyqtProperty(float)
+    def fase(self):
+        return self._fase
+
+    @fase.setter
+    def fase(self, valor):
+        self._fase = valor
+        nivel = round(valor * self.niveles)
+        ahora = time.perf_counter()
+        if nivel == self._nivel or ahora - self._ultimo_repintado < self.intervalo_minimo:
+            return
+        bloques = self.bloques_visibles()
+        if not bloques:
+            self.detener()
+            return
+        self._nivel = nivel
+        self._ultimo_repintado = ahora
+        self._pintar(bloques)
+
+    @property
+    def activo(self):
+        return self.animacion.state() == QPropertyAnimation.State.Running
+
+    def eventFilter(self, objeto, evento):
+        if evento.type() in (QEvent.Type.WindowStateChange, QEvent.Type.Show, QEvent.Type.Hide):
+            try:
+                self.revisar()
+            except RuntimeError:
+                # La ventana se está destruyendo
+                pass
+        return False
+
+    def revisar(self, *_):
+        """Arrancar o parar la animación según haya mensajes críticos a la vista"""
+        visible = self.editor.isVisible() and not self.ventana.isMinimized()
+        if visible and self.bloques_visibles():
+            if not self.activo:
+                self.animacion.start()
+        elif self.activo or self.editor.extraSelections():
+            self.detener()
+
+    def detener(self):
+        self.animacion.stop()
+        self._nivel = 0
+        # Sin selecciones extra vuelve a verse el color del documento
+        self.editor.setExtraSelections([])
+
+    def bloques_visibles(self):
+        """Bloques críticos dentro del viewport del editor"""
+        alto = self.editor.viewport().height()
+        bloque = self.editor.cursorForPosition(QPoint(0, 0)).block()
+        ultimo = self.editor.cursorForPosition(QPoint(0, max(0, alto - 1))).blockNumber()
+        visibles = []
+        while bloque.isValid() and bloque.blockNumber() <= ultimo:
+            if bloque.userState() == ESTADO_CRITICO:
+                visibles.append(bloque)
+            bloque = bloque.next()
+        return visibles
+
+    def _pintar(self, bloques):
+        t = self._nivel / self.niveles
+        base, destello = self.color_base, self.color_destello
+        color = QColor(round(base.red() + (destello.red() - base.red()) * t),
+                       round(base.green() + (destello.green() - base.green()) * t),
+                       round(base.blue() + (destello.blue() - base.blue()) * t))
+        formato = QTextCharFormat()
+        formato.setForeground(color)
+
+        selecciones = []
+        for bloque in bloques:
+            seleccion = QTextEdit.ExtraSelection()
+            seleccion.cursor = QTextCursor(bloque)
+            seleccion.cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock, QTextCursor.MoveMode.KeepAnchor)
+            seleccion.format = formato
+            selecciones.append(seleccion)
+        self.editor.setExtraSelections(selecciones)
+        self.repintados += 1
@@ -0,0 +1,156 @@
+"""Log de eventos acotado, de solo añadir, con el HTML ya preparado por bloques.
+
+Los mensajes se guardan en una lista y sus tags como índices de un byte a una
+tabla de tags internados. Las entradas se agrupan en bloques: el bloque
+abierto es el único cuyo HTML se regenera al añadir, y cuando supera
+`bytes_bloque` se sella y su HTML queda fijo. Con un tamaño de bloque por
+encima de global.minCachedMessageSize de Streamlit, los bloques sellados
+viajan al navegador como una referencia a la caché de mensajes en lugar de su
+contenido, así que en cada clic solo se envía lo nuevo.
+
+Cuando se supera `retencion` entradas se descartan los bloques sellados más
+antiguos.
+
+La aplicación de escritorio lo usa como archivo de las entradas que ya no caben
+en el documento del QTextEdit (ver registro_qt), leyendo por índice absoluto
+con entradas().
+"""
+import bisect
+import sys
+from array import array
+
+
+class _Bloque:
+    __slots__ = ("primero", "mensajes", "tags", "html", "bytes")
+
+    def __init__(self, primero):
+        self.primero = primero
+        self.mensajes = []
+        self.tags = array("B")
+        self.html = None
+        self.bytes = 0
+
+
+class RegistroEventos:
+    """Log de eventos (mensaje, tag) con retención limitada y HTML cacheado por bloque"""
+
+    def __init__(self, retencion=5000, bytes_bloque=12_000, tag_por_defecto="efecto"):
+        self.retencion = retencion
+        self.bytes_bloque = bytes_bloque
+        self.tag_por_defecto = sys.intern(tag_por_defecto)
+        self._tags = [self.tag_por_defecto]
+        self._indice_tags = {self.tag_por_defecto: 0}
+        self._bloques = [_Bloque(0)]
+        self.total = 0
+        self.descartados = 0
+
+    # ----- escritura -----
+
+    def _id_tag(self, tag):
+        if tag is None:
+            return 0
+        indice = self._indice_tags.get(tag)
+        if indice is None:
+            if len(self._tags) >= 256:
+                raise ValueError("Demasiados tags distintos en el log")
+            indice = len(self._tags)
+            self._tags.append(sys.intern(tag))
+            self._indice_tags[self._tags[-1]] = indice
+        return indice
+
+    def agregar(self, mensaje, tag=None):
+        bloque = self._bloques[-1]
+        id_tag = self._id_tag(tag)
+        bloque.mensajes.append(mensaje)
+        bloque.tags.append(id_tag)
+        bloque.html = None
+        bloque.bytes += len(mensaje) + 24
+        self.total += 1
+
+        if bloque.bytes >= self.bytes_bloque:
+            # Sellar: su HTML ya no cambia
+            bloque.html = self._renderizar(bloque)
+            self._bloques.append(_Bloque(self.total))
+            self._aplicar_retencion()
+
+    def _aplicar_retencion(self):
+        while len(self) > self.retencion and len(self._bloques) > 1:
+            descartado = self._bloques.pop(0)
+            self.descartados += len(descartado.mensajes)
+
+    def limpiar(self):
+        self._bloques = [_Bloque(self.total)]
+
+    # ----- lectura -----
+
+    def __len__(self):
+        return self.total - self._bloques[0].primero
+
+    @property
+    def primero(self):
+        """Índice absoluto de la entrada retenida más antigua"""
+        return self._bloques[0].primero
+
+    def entradas(self, desde=None, hasta=None):
+        """(mensaje, tag) de las entradas retenidas con índice absoluto en [desde, hasta)"""
+        desde = self.primero if desde is None else max(desde, self.primero)
+        hasta = self.total if hasta is None else min(hasta, self.total)
+        if desde >= hasta:
+            return
+        inicios = [bloque.primero for bloque in self._bloques]
+        tags = self._tags
+        for i in range(bisect.bisect_right(inicios, desde) - 1, len(self._bloques)):
+            bloque = self._bloques[i]
+            if bloque.primero >= hasta:
+                break
+            inicio = max(desde - bloque.primero, 0)
+            fin = min(hasta - bloque.primero, len(bloque.mensajes))
+            for j in range(inicio, fin):
+                yield bloque.mensajes[j], tags[bloque.tags[j]]
+
+    def __iter__(self):
+        """Entradas retenidas como diccionarios {"mensaje", "tag"}"""
+        for bloque in self._bloques:
+            for mensaje, id_tag in zip(bloque.mensajes, bloque.tags):
+                yield {"mensaje": mensaje, "tag": self._tags[id_tag]}
+
+    def _renderizar(self, bloque):
+        tags = self._tags
+        return "".join(
+            f'<p class="{tags[id_tag]}">{mensaje.replace(chr(10), "<br>")}</p>'
+            for mensaje, id_tag in zip(bloque.mensajes, bloque.tags)
+        )
+
+    def bloques_html(self, ventana=None):
+        """[(id de bloque, html)] de los bloques visibles, del más antiguo al más nuevo.
+
+        ventana limita el número de entradas mostradas (se redondea a bloques
+        completos); el id de bloque es el índice de su primera entrada.
+        """
+        bloques = self._bloques
+        if ventana is not None:
+            visibles, entradas = [], 0
+            for bloque in reversed(bloques):
+                if entradas >= ventana and visibles:
+                    break
+                visibles.append(bloque)
+                entradas += len(bloque.mensajes)
+            bloques = visibles[::-1]
+
+        resultado = []
+        for bloque in bloques:
+            if not bloque.mensajes:
+                continue
+            if bloque.html is None:
+                bloque.html = self._renderizar(bloque)
+            resultado.append((bloque.primero, bloque.html))
+        return resultado
+
+    def ocultas(self, ventana):
+        """Entradas retenidas que quedan fuera de la ventana visible"""
+        mostradas = 0
+        for bloque in reversed(self._bloques):
+            if mostradas >= ventana:
+                break
+            mostradas += len(bloque.mensajes)
+        return max(0, len(self) - mostradas)
@@ -0,0 +1,307 @@
+"""Log de eventos de la aplicación de escritorio sobre un QTextEdit.
+
+agregar() solo guarda el mensaje y programa un volcado para el siguiente giro
+del bucle de eventos: todos los mensajes de una ráfaga (los de iniciar_arena,
+por ejemplo) se escriben en un único bloque de edición, con un solo pase de
+layout y un solo desplazamiento al final.
+
+El documento está acotado con setMaximumBlockCount, que lo convierte en un
+buffer circular: al añadir, Qt descarta los bloques más antiguos (bastante más
+barato que quitarlos a mano), y después se ajusta qué entradas siguen en él.
+Todas las entradas se guardan además en un RegistroEventos, con su propia
+retención; las que ya no están en el documento se vuelven a cargar por páginas
+al llevar el scroll arriba del todo, y al volver abajo se recuperan las más
+recientes.
+
+El bloque del texto de cada mensaje crítico queda marcado con ESTADO_CRITICO
+(QTextBlock.userState) para que el parpadeo encuentre los visibles sin
+recorrer el documento.
+"""
+from collections import deque
+
+from PyQt6.QtCore import QObject, QPoint, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+
+import trazas
+from registro_eventos import RegistroEventos
+
+TAG_CRITICO = "critical"
+ESTADO_CRITICO = 1
+CABECERA_CRITICO = "¡" * 10 + " ATENCIÓN " + "¡" * 10
+CIERRE_CRITICO = "¡" * 30
+
+
+class RegistroQt(QObject):
+    """Sink acotado y por lotes para el log de eventos de un QTextEdit"""
+
+    # El contenido del documento ha cambiado (volcado, paginación o limpieza)
+    contenido_cambiado = pyqtSignal()
+
+    def __init__(self, editor, formatos, retencion=5000, max_bloques=500, pagina=100):
+        super().__init__(editor)
+        self.editor = editor
+        self.documento = editor.document()
+        # Referencia al diccionario de formatos de la app: se reescala en su sitio
+        self.formatos = formatos
+        self.archivo = RegistroEventos(retencion=retencion)
+        self.pagina = pagina
+        self.max_bloques = max_bloques
+
+        # Entradas del archivo presentes en el documento: índices absolutos [inicio, fin)
+        self._inicio = self._fin = 0
+        self._bloques = deque()
+        self._bloques_total = 0
+        # La primera entrada del documento ha perdido sus primeras líneas
+        self._parcial = False
+
+        self._programado = False
+        self._paginando = False
+        self.volcados = 0
+        editor.verticalScrollBar().valueChanged.connect(self._al_desplazar)
+
+    @property
+    def max_bloques(self):
+        return self._max_bloques
+
+    @max_bloques.setter
+    def max_bloques(self, valor):
+        self._max_bloques = max(1, int(valor))
+        # Recortar cada vez que se pasa del máximo obliga a rehacer el layout de
+        # todo el documento; con holgura se recorta de golpe una vez cada varias ráfagas
+        self._holgura = self._max_bloques // 5
+        self._limitar(self._max_bloques + self._holgura)
+
+    def _limitar(self, bloques):
+        # +1 por el bloque vacío que queda tras el último salto de línea
+        self.documento.setMaximumBlockCount(bloques + 1)
+
+    def configurar(self, retencion=None, max_bloques=None, pagina=None):
+        if retencion is not None:
+            self.archivo.retencion = retencion
+        if max_bloques is not None:
+            self.max_bloques = max_bloques
+        if pagina is not None:
+            self.pagina = max(1, int(pagina))
+
+    # ----- escritura -----
+
+    def agregar(self, mensaje, tag=None):
+        self.archivo.agregar(mensaje, tag)
+        if not self._programado:
+            self._programado = True
+            QTimer.singleShot(0, self.volcar)
+
+    @trazas.span
+    def volcar(self):
+        """Escribir ya las entradas pendientes (normalmente lo hace el temporizador)"""
+        self._programado = False
+        total = self.archivo.total
+        if self._fin >= total:
+            return
+        desde = max(self._fin, self.archivo.primero)
+        nuevas = list(self.archivo.entradas(desde, total))
+        if not nuevas:
+            self._fin = total
+            return
+        bloques = [self._contar(mensaje, tag) for mensaje, tag in nuevas]
+
+        # Si la ráfaga sola no cabe, solo sus últimas entradas
+        primera, necesarios = len(nuevas), 0
+        while primera > 0 and necesarios + bloques[primera - 1] <= self._max_bloques:
+            primera -= 1
+            necesarios += bloques[primera]
+        primera = min(primera, len(nuevas) - 1)
+
+        cursor = QTextCursor(self.documento)
+        cursor.beginEditBlock()
+        if primera > 0 or desde > self._fin:
+            self._vaciar(cursor)
+            self._inicio = self._fin = desde + primera
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        for (mensaje, tag), n in zip(nuevas[primera:], bloques[primera:]):
+            self._insertar(cursor, mensaje, tag)
+            self._bloques.append(n)
+            self._bloques_total += n
+        self._fin = total
+        cursor.endEditBlock()
+        self._recortar()
+        self.volcados += 1
+
+        # Un único desplazamiento por ráfaga
+        self._paginando = True
+        try:
+            self.editor.setTextCursor(cursor)
+            self.editor.ensureCursorVisible()
+        finally:
+            self._paginando = False
+        self.contenido_cambiado.emit()
+
+    def limpiar(self):
+        self._programado = False
+        self.archivo.limpiar()
+        cursor = QTextCursor(self.documento)
+        cursor.beginEditBlock()
+        self._vaciar(cursor)
+        cursor.endEditBlock()
+        self._inicio = self._fin = self.archivo.total
+        self.contenido_cambiado.emit()
+
+    # ----- paginación del archivo -----
+
+    def _al_desplazar(self, valor):
+        if self._paginando:
+            return
+        barra = self.editor.verticalScrollBar()
+        if valor <= barra.minimum() and (self._parcial or self._inicio > self.archivo.primero):
+            self._paginar_atras()
+        elif valor >= barra.maximum() and self._fin < self.archivo.total:
+            self._paginar_adelante()
+
+    def _paginar_atras(self):
+        # Una entrada cortada por arriba se vuelve a insertar completa
+        hasta = self._inicio + 1 if self._parcial else self._inicio
+        desde = max(self.archivo.primero, hasta - self.pagina)
+        anteriores = list(self.archivo.entradas(desde, hasta))
+        bloques = [self._contar(mensaje, tag) for mensaje, tag in anteriores]
+        # Como mucho medio documento, para que siga viéndose lo que había
+        primera, necesarios = len(anteriores), 0
+        while primera > 0 and necesarios + bloques[primera - 1] <= max(1, self._max_bloques // 2):
+            primera -= 1
+            necesarios += bloques[primera]
+        if primera == len(anteriores):
+            return
+
+        def editar(cursor):
+            if self._parcial:
+                self._bloques_total -= self._bloques.popleft()
+                self._quitar_arriba(cursor)
+                self._parcial = False
+            cursor.setPosition(0)
+            for mensaje, tag in anteriores[primera:]:
+                self._insertar(cursor, mensaje, tag)
+            self._bloques.extendleft(reversed(bloques[primera:]))
+            self._bloques_total += necesarios
+            self._inicio = desde + primera
+            while len(self._bloques) > 1 and self._bloques_total > self._max_bloques:
+                self._bloques_total -= self._bloques.pop()
+                self._fin -= 1
+            self._quitar_abajo(cursor)
+
+        self._editar_conservando_vista(editar)
+
+    def _paginar_adelante(self):
+        hasta = min(self.archivo.total, self._fin + self.pagina)
+        siguientes = list(self.archivo.entradas(self._fin, hasta))
+        bloques = [self._contar(mensaje, tag) for mensaje, tag in siguientes]
+        ultima, necesarios = 0, 0
+        while ultima < len(siguientes) and necesarios + bloques[ultima] <= max(1, self._max_bloques // 2):
+            necesarios += bloques[ultima]
+            ultima += 1
+        if ultima == 0:
+            return
+
+        def editar(cursor):
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            for (mensaje, tag), n in zip(siguientes[:ultima], bloques[:ultima]):
+                self._insertar(cursor, mensaje, tag)
+                self._bloques.append(n)
+            self._bloques_total += necesarios
+            self._fin += ultima
+
+        self._editar_conservando_vista(editar)
+
+    def _editar_conservando_vista(self, editar):
+        """Aplicar una edición sin que se mueva el texto que se está leyendo"""
+        barra = self.editor.verticalScrollBar()
+        # Un cursor en el primer bloque visible sigue a su texto durante la edición
+        ancla = self.editor.cursorForPosition(QPoint(0, 0))
+        ancla.movePosition(QTextCursor.MoveOperation.StartOfBlock)
+        diseño = self.documento.documentLayout()
+        desfase = barra.value() - diseño.blockBoundingRect(ancla.block()).top()
+
+        self._paginando = True
+        try:
+            cursor = QTextCursor(self.documento)
+            cursor.beginEditBlock()
+            editar(cursor)
+            cursor.endEditBlock()
+            self._recortar()
+            barra.setValue(int(diseño.blockBoundingRect(ancla.block()).top() + desfase))
+        finally:
+            self._paginando = False
+        self.contenido_cambiado.emit()
+
+    # ----- documento -----
+
+    @staticmethod
+    def _contar(mensaje, tag):
+        """Bloques que ocupa una entrada en el documento"""
+        return mensaje.count("\n") + (3 if tag == TAG_CRITICO else 1)
+
+    def _insertar(self, cursor, mensaje, tag):
+        formatos = self.formatos
+        inicio = cursor.position()
+        # Al insertar delante de un bloque, su userState pasa al primer bloque nuevo
+        estado_siguiente = cursor.block().userState()
+        if tag == TAG_CRITICO:
+            cursor.insertText(CABECERA_CRITICO + "\n", formatos["blink"])
+            cursor.insertText(mensaje + "\n", formatos[tag])
+            cursor.insertText(CIERRE_CRITICO + "\n", formatos["blink"])
+        else:
+            cursor.insertText(mensaje + "\n", formatos.get(tag, formatos["center"]))
+
+        # Solo el texto de un mensaje crítico, sin la cabecera ni el cierre
+        bloques = self._contar(mensaje, tag)
+        bloque = self.documento.findBlock(inicio)
+        for i in range(bloques):
+            critico = tag == TAG_CRITICO and 0 < i < bloques - 1
+            bloque.setUserState(ESTADO_CRITICO if critico else -1)
+            bloque = bloque.next()
+        cursor.block().setUserState(estado_siguiente)
+
+    def _recortar(self):
+        """Volver a max_bloques si se ha pasado y descontar lo que Qt ha quitado por arriba"""
+        if self._holgura and self.documento.blockCount() - 1 >= self._max_bloques + self._holgura:
+            self._limitar(self._max_bloques)
+            self._limitar(self._max_bloques + self._holgura)
+        quitados = -self._sobrantes()
+        while quitados > 0 and self._bloques:
+            if self._bloques[0] <= quitados:
+                quitados -= self._bloques[0]
+                self._bloques_total -= self._bloques.popleft()
+                self._inicio += 1
+                self._parcial = False
+            else:
+                self._bloques[0] -= quitados
+                self._bloques_total -= quitados
+                self._parcial = True
+                quitados = 0
+
+    def _sobrantes(self):
+        """Bloques de contenido del documento que ya no están en _bloques"""
+        return self.documento.blockCount() - 1 - self._bloques_total
+
+    def _quitar_arriba(self, cursor):
+        bloques = self._sobrantes()
+        if bloques <= 0:
+            return
+        cursor.setPosition(0)
+        cursor.setPosition(self.documento.findBlockByNumber(bloques).position(),
+                           QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+
+    def _quitar_abajo(self, cursor):
+        bloques = self._sobrantes()
+        if bloques <= 0:
+            return
+        ultimo = self.documento.blockCount() - 1 - bloques
+        cursor.setPosition(self.documento.findBlockByNumber(ultimo).position())
+        cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+
+    def _vaciar(self, cursor):
+        cursor.select(QTextCursor.SelectionType.Document)
+        cursor.removeSelectedText()
+        self._bloques.clear()
+        self._bloques_total = 0
+        self._parcial = False
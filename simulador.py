@@ -0,0 +1,266 @@
+"""Simulador Monte Carlo vectorizado de torneos de la arena.
+
+Juega millones de torneos de un tier a la vez con NumPy siguiendo las mismas
+reglas que ArenaEngine: tirada d100 contra los rangos de encuentros de cada
+ronda, una acción heroica o deshonrosa por ronda según una política, reacción
+del público, descanso corto entre rondas y recompensas al final.
+
+Todas las tiradas se generan por adelantado con una semilla, así que cualquier
+partida se puede reproducir en el motor real (verificar_contra_motor) para
+comprobar que el simulador aplica exactamente la misma lógica.
+
+Uso:
+    python simulador.py --partidas 1000000 --semilla 42 --heroica 0.5 --deshonrosa 0.3
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from arena_engine import ArenaEngine
+from modelo_configuracion import cargar_configuracion
+
+DATA_DIR = Path(__file__).parent / "assets" / "data"
+APUESTAS = tuple(range(0, 501, 10))
+
+
+class ResultadoSimulacion:
+    """Resultados agregados de una simulación y las tiradas que la generaron"""
+
+    __slots__ = ("nivel", "partidas", "semilla", "politica", "segundos", "tiradas",
+                 "acciones", "reacciones", "descansos", "encuentros", "moral", "cordura",
+                 "bonificaciones_criticas", "textos_encuentros", "pagos")
+
+    def __init__(self, **campos):
+        for nombre, valor in campos.items():
+            setattr(self, nombre, valor)
+
+    @property
+    def partidas_por_segundo(self):
+        return self.partidas / self.segundos if self.segundos else float("inf")
+
+    def histograma_encuentros(self):
+        """Por ronda: lista de (enemigos, veces)"""
+        resultado = {}
+        for ronda, textos in enumerate(self.textos_encuentros, start=1):
+            cuentas = np.bincount(self.encuentros[:, ronda - 1], minlength=len(textos))
+            resultado[f"ronda_{ronda}"] = [(texto, int(c)) for texto, c in zip(textos, cuentas)]
+        return resultado
+
+    def histograma_final(self, valores):
+        return {int(v): int(c) for v, c in zip(*np.unique(valores, return_counts=True))}
+
+    def trayectorias(self, valores, maximo=10):
+        """Las trayectorias (valor tras ronda 1, 2 y 3) más frecuentes"""
+        filas, cuentas = np.unique(valores, axis=0, return_counts=True)
+        orden = np.argsort(cuentas)[::-1][:maximo]
+        return [(tuple(int(v) for v in filas[i]), int(cuentas[i])) for i in orden]
+
+    def resumen(self):
+        return {
+            "nivel": self.nivel,
+            "partidas": self.partidas,
+            "semilla": self.semilla,
+            "politica": {"heroica": self.politica[0], "deshonrosa": self.politica[1]},
+            "segundos": round(self.segundos, 4),
+            "partidas_por_segundo": round(self.partidas_por_segundo),
+            "encuentros": self.histograma_encuentros(),
+            "moral_final": self.histograma_final(self.moral[:, -1]),
+            "cordura_final": self.histograma_final(self.cordura[:, -1]),
+            "trayectorias_moral": self.trayectorias(self.moral),
+            "trayectorias_cordura": self.trayectorias(self.cordura),
+            "bonificaciones_criticas_por_partida": float(self.bonificaciones_criticas.mean()),
+            "pagos_por_apuesta": self.pagos,
+        }
+
+
+class SimuladorArena:
+    """Simulación por lotes de torneos a partir de las tablas de assets/data"""
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = Path(data_dir)
+        # Las mismas reglas compiladas que usa ArenaEngine, para que no puedan divergir
+        self.reglas = cargar_configuracion(self.data_dir).reglas
+        self.moral_max = self.reglas.moral_max
+        self.cordura_max = self.reglas.cordura_max
+
+        self.ids_apoyo = np.array([r.id for r in self.reglas.apoyo.entradas], dtype=np.int16)
+        self.ids_desprecio = np.array([r.id for r in self.reglas.desprecio.entradas], dtype=np.int16)
+        self._motor = ArenaEngine(self.reglas)
+        self._textos = {}
+
+    def _tier(self, nivel):
+        # Mismo reparto nivel -> tier y mismas tablas d100 que ArenaEngine.tier
+        tier = self._motor.tier(nivel)
+        rondas = [tier.rondas[r] for r in (1, 2, 3)]
+        if tier.archivo not in self._textos:
+            self._textos[tier.archivo] = [[e.texto for e in tabla.entradas] for tabla in rondas]
+        return tier, rondas, self._textos[tier.archivo]
+
+    def pagos(self, recompensa, apuestas=APUESTAS):
+        """Monedas ganadas por apuesta (no dependen del desarrollo de la partida)"""
+        multiplicador = recompensa.multiplicador_monedas
+        return {apuesta: recompensa.monedas + (int(apuesta * multiplicador) if apuesta > 0 else 0)
+                for apuesta in apuestas}
+
+    def simular(self, nivel, partidas, semilla=None, politica=(0.5, 0.3)):
+        """Simular `partidas` torneos de un nivel.
+
+        politica = (probabilidad de acción heroica, probabilidad de acción
+        deshonrosa) en cada ronda; el resto de rondas no hay acción.
+        """
+        tier, tablas, textos = self._tier(nivel)
+        p_heroica, p_deshonrosa = politica
+        reglas = self.reglas
+        moral_heroica = reglas.heroico.moral
+        cordura_deshonrosa = reglas.deshonroso.cordura
+        moral_descanso = reglas.descanso_corto.moral
+        cordura_descanso = reglas.descanso_corto.expresion_cordura
+
+        inicio = time.perf_counter()
+        rng = np.random.default_rng(semilla)
+        n = partidas
+
+        # Todas las tiradas por adelantado
+        tiradas = rng.integers(1, 101, size=(n, 3), dtype=np.int16)
+        u = rng.random((n, 3))
+        acciones = np.where(u < p_heroica, 1, np.where(u < p_heroica + p_deshonrosa, 2, 0)).astype(np.int8)
+        reacciones = np.where(
+            acciones == 1,
+            reglas.apoyo.indices_lote(n * 3, rng).reshape(n, 3),
+            reglas.desprecio.indices_lote(n * 3, rng).reshape(n, 3),
+        ).astype(np.int16)
+        # Dados de cada descanso tal cual (para reproducirlos en el motor) y su total
+        descansos = cordura_descanso.dados_lote((n, 2), rng)
+        cordura_descansos = cordura_descanso.total_lote(descansos)
+
+        moral = np.full(n, self.moral_max, dtype=np.int16)
+        cordura = np.full(n, self.cordura_max, dtype=np.int16)
+        encuentros = np.empty((n, 3), dtype=np.int16)
+        tray_moral = np.empty((n, 3), dtype=np.int16)
+        tray_cordura = np.empty((n, 3), dtype=np.int16)
+        bonificaciones_criticas = np.zeros(n, dtype=np.int8)
+
+        for r in range(3):
+            if r > 0:
+                # Descanso corto antes de la ronda 2 y 3
+                np.minimum(moral + moral_descanso, self.moral_max, out=moral)
+                np.minimum(cordura + cordura_descansos[:, r - 1], self.cordura_max, out=cordura)
+
+            encuentros[:, r] = tablas[r].indices_lote(tiradas[:, r])
+
+            heroica = acciones[:, r] == 1
+            deshonrosa = acciones[:, r] == 2
+            ids = np.where(heroica, self.ids_apoyo[reacciones[:, r]], self.ids_desprecio[reacciones[:, r]])
+
+            moral = np.where(heroica, np.minimum(moral + moral_heroica, self.moral_max), moral)
+            cordura = np.where(deshonrosa, np.maximum(cordura + cordura_deshonrosa, 0), cordura)
+
+            # Apoyo id 4: bonificación crítica (bonif_critico en el motor), no las reacciones críticas (id > 15)
+            bonificaciones_criticas += heroica & (ids == 4)
+            moral = np.where(heroica & (ids == 19), np.minimum(moral + 1, self.moral_max), moral)
+            moral = np.where(deshonrosa & (ids == 4), np.maximum(moral - 1, 0), moral)
+            cordura = np.where(deshonrosa & (ids == 5), np.maximum(cordura - 1, 0), cordura)
+
+            tray_moral[:, r] = moral
+            tray_cordura[:, r] = cordura
+
+        return ResultadoSimulacion(
+            nivel=nivel, partidas=n, semilla=semilla, politica=tuple(politica),
+            segundos=time.perf_counter() - inicio, tiradas=tiradas, acciones=acciones,
+            reacciones=reacciones, descansos=descansos, encuentros=encuentros,
+            moral=tray_moral, cordura=tray_cordura, bonificaciones_criticas=bonificaciones_criticas,
+            textos_encuentros=textos, pagos=self.pagos(tier.recompensa),
+        )
+
+
+class _RngGuion:
+    """Sustituto de random.Random que devuelve tiradas ya decididas, en orden"""
+
+    def __init__(self, valores):
+        self._valores = iter(valores)
+
+    def randint(self, a, b):
+        return next(self._valores)
+
+    def randrange(self, n):
+        return next(self._valores)
+
+    def random(self):
+        # Con el índice final ya decidido, el muestreo alias siempre se queda con él
+        return 0.0
+
+
+def reproducir_en_motor(resultado, indice, apuesta=0, data_dir=DATA_DIR):
+    """Jugar la partida `indice` de una simulación en ArenaEngine con sus mismas tiradas"""
+    guion = []
+    for r in range(3):
+        guion.append(int(resultado.tiradas[indice, r]))
+        if resultado.acciones[indice, r]:
+            guion.append(int(resultado.reacciones[indice, r]))
+        if r < 2:
+            guion.extend(int(d) for d in resultado.descansos[indice, r])
+
+    motor = ArenaEngine.desde_directorio(data_dir, rng=_RngGuion(guion))
+    motor.iniciar_arena(resultado.nivel, apuesta)
+    tray_moral, tray_cordura, encuentros = [], [], []
+    for r in range(3):
+        encuentros.append(motor.estado.encuentro_actual)
+        accion = resultado.acciones[indice, r]
+        if accion:
+            motor.evaluar_accion("heroica" if accion == 1 else "deshonrosa")
+        tray_moral.append(motor.estado.moral_grupo)
+        tray_cordura.append(motor.estado.cordura)
+        motor.siguiente_ronda()
+    return motor, tray_moral, tray_cordura, encuentros
+
+
+def verificar_contra_motor(resultado, muestras=100, data_dir=DATA_DIR):
+    """Comprobar partida a partida que el simulador coincide con ArenaEngine"""
+    indices = np.linspace(0, resultado.partidas - 1, num=min(muestras, resultado.partidas), dtype=np.int64)
+    for indice in indices:
+        for apuesta in (0, 100):
+            motor, moral, cordura, encuentros = reproducir_en_motor(resultado, indice, apuesta, data_dir)
+            esperados = [resultado.textos_encuentros[r][resultado.encuentros[indice, r]] for r in range(3)]
+            if (moral != resultado.moral[indice].tolist() or cordura != resultado.cordura[indice].tolist()
+                    or encuentros != esperados
+                    or motor.estado.recompensas["monedas"] != resultado.pagos[apuesta]):
+                raise AssertionError(f"La partida {indice} no coincide con ArenaEngine")
+    return len(indices)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador Monte Carlo de torneos de la arena")
+    parser.add_argument("--partidas", type=int, default=1_000_000)
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--nivel", type=int, action="append",
+                        help="Nivel de héroes (repetible); por defecto uno de cada tier")
+    parser.add_argument("--heroica", type=float, default=0.5, help="Probabilidad de acción heroica por ronda")
+    parser.add_argument("--deshonrosa", type=float, default=0.3, help="Probabilidad de acción deshonrosa por ronda")
+    parser.add_argument("--verificar", type=int, default=0, help="Partidas a reproducir en ArenaEngine")
+    parser.add_argument("--salida", type=Path, help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    simulador = SimuladorArena()
+    niveles = args.nivel or [tier.minimo for tier in simulador.reglas.tiers]
+    resultados = []
+    for nivel in niveles:
+        resultado = simulador.simular(nivel, args.partidas, args.semilla, (args.heroica, args.deshonrosa))
+        print(f"Nivel {nivel}: {resultado.partidas} partidas en {resultado.segundos:.3f} s "
+              f"({resultado.partidas_por_segundo:,.0f} partidas/s)")
+        if args.verificar:
+            comprobadas = verificar_contra_motor(resultado, args.verificar)
+            print(f"  {comprobadas} partidas reproducidas en ArenaEngine sin diferencias")
+        resultados.append(resultado.resumen())
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(resultados[0]["moral_final"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
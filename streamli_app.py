@@ -1,10 +1,20 @@
 import streamlit as st
-import random
-import json
+import streamlit.components.v1 as components
 from pathlib import Path
 import base64
-import sys
 import os
+import functools
+import hashlib
+import json
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from arena_engine import ArenaEngine, EVENTO_LOG, EVENTO_RECOMPENSAS
+from config_compartida import AlmacenConfiguracion
+from registro_eventos import RegistroEventos
+import trazas
 
 # Configuración de la página
 st.set_page_config(
@@ -20,405 +30,439 @@ def get_base64_of_bin_file(bin_file):
         data = f.read()
     return base64.b64encode(data).decode()
 
-# Funciones para manejar audio con HTML5
-def autoplay_audio(file_path: str):
-    """Reproduce audio automáticamente usando HTML5"""
+# Control de la música con HTML5. El <audio> se crea una sola vez en la página
+# principal (fuera del iframe del componente), así que sobrevive a los reruns:
+# cada rerun solo vuelve a pintar este pequeño script, y si no cambia su
+# contenido Streamlit ni siquiera recarga el iframe.
+CONTROL_MUSICA = """
+<script>
+(function () {
+    var doc = window.parent.document;
+    var audio = doc.getElementById("arena-musica");
+    if (!audio) {
+        audio = doc.createElement("audio");
+        audio.id = "arena-musica";
+        audio.loop = true;
+        audio.preload = "none";
+        audio.style.display = "none";
+        doc.body.appendChild(audio);
+    }
+    var fuentes = %(fuentes)s;
+    var elegida = fuentes.find(function (f) { return audio.canPlayType(f[1]); }) || fuentes[fuentes.length - 1];
+    if (elegida && audio.dataset.src !== elegida[0] && audio.paused) {
+        audio.src = elegida[0];
+        audio.dataset.src = elegida[0];
+    }
+    if (%(reproducir)s) {
+        var promesa = audio.play();
+        if (promesa) { promesa.catch(function () {}); }
+    } else {
+        audio.pause();
+    }
+})();
+</script>
+"""
+
+
+def control_musica(reproducir, fuentes):
+    """Reproducir o pausar la música de fondo; fuentes = [(url, tipo MIME), ...]"""
+    components.html(CONTROL_MUSICA % {
+        "fuentes": json.dumps([list(f) for f in fuentes]),
+        "reproducir": "true" if reproducir else "false",
+    }, height=0)
+
+# En Streamlit, los archivos deben estar en el mismo directorio o en una estructura conocida
+BASE_DIR = Path(__file__).parent
+DATA_DIR = BASE_DIR / "assets" / "data"
+
+
+STATIC_DIR = BASE_DIR / "static"
+
+# Variante web del fondo (WebP reducido); los PNG originales son de varios MB
+ANCHO_FONDO_WEB = 1280
+CALIDAD_WEBP = 80
+
+
+# Variante Opus de la música (solo si hay ffmpeg); el MP3 original pesa 3.8 MB
+BITRATE_OPUS = "48k"
+
+
+def _ruta_estatica(origen, datos, extension, parametros=""):
+    """Ruta en static/ con el hash del contenido (y de los parámetros) en el nombre"""
+    digest = hashlib.sha1(datos + parametros.encode()).hexdigest()[:12]
+    return STATIC_DIR / f"{Path(origen).stem}-{digest}{extension}"
+
+
+def _preparar_destino(destino):
+    """Borrar versiones anteriores del mismo recurso y devolver un temporal junto al destino"""
+    STATIC_DIR.mkdir(parents=True, exist_ok=True)
+    stem = destino.stem.rsplit("-", 1)[0]
+    for anterior in STATIC_DIR.glob(f"{stem}-*{destino.suffix}"):
+        anterior.unlink()
+    return destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+
+
+def url_estatica(ruta):
+    """URL relativa de un archivo de static/ con su versión en ?v= (caché HTTP larga)"""
+    return f"app/static/{ruta.name}?v={ruta.stem.rsplit('-', 1)[-1]}"
+
+
+def publicar_estatico(origen, ancho_max=None):
+    """Copiar una imagen a static/ con su hash en el nombre, como WebP si hay Pillow.
+
+    Devuelve la ruta publicada. Las versiones anteriores de la misma imagen se
+    borran; si ya existe la versión actual no se vuelve a generar.
+    """
+    origen = Path(origen)
+    with open(origen, "rb") as f:
+        datos = f.read()
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+
+    extension = ".webp" if Image is not None else origen.suffix
+    destino = _ruta_estatica(origen, datos, extension, f"{ancho_max}-{CALIDAD_WEBP}")
+    if destino.exists():
+        return destino
+
+    tmp = _preparar_destino(destino)
+    if Image is not None:
+        with Image.open(origen) as imagen:
+            if ancho_max and imagen.width > ancho_max:
+                imagen = imagen.resize((ancho_max, round(imagen.height * ancho_max / imagen.width)),
+                                       Image.LANCZOS)
+            imagen.save(tmp, "WEBP", quality=CALIDAD_WEBP)
+    else:
+        tmp.write_bytes(datos)
+    os.replace(tmp, destino)
+    return destino
+
+
+@st.cache_resource(show_spinner=False)
+def url_fondo(fondo_path, mtime_ns):
+    """URL CSS del fondo, calculada una vez por proceso (y por versión del archivo).
+
+    Con server.enableStaticServing se sirve desde /app/static con el hash en el
+    nombre y en ?v=, para que el navegador lo guarde en caché indefinidamente;
+    si no, se devuelve un data URI en base64 de la variante reducida.
+    """
     try:
-        with open(file_path, "rb") as f:
-            data = f.read()
-            b64 = base64.b64encode(data).decode()
-            md = f"""
-                <audio autoplay="true" loop="true" style="display: none">
-                <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
-                </audio>
-                """
-            st.components.v1.html(md, height=0)
+        publicado = publicar_estatico(fondo_path, ANCHO_FONDO_WEB)
     except Exception as e:
-        st.error(f"Error reproduciendo audio: {e}")
-
-def stop_audio():
-    """Detiene todo el audio en la página"""
-    js_code = """
-    <script>
-    var audioElements = document.getElementsByTagName('audio');
-    for (var i = 0; i < audioElements.length; i++) {
-        audioElements[i].pause();
-        audioElements[i].currentTime = 0;
-    }
-    </script>
+        print(f"Error preparando el fondo para la web: {e}")
+        publicado = Path(fondo_path)
+
+    if st.get_option("server.enableStaticServing") and publicado.parent == STATIC_DIR:
+        return url_estatica(publicado)
+    tipo = "webp" if publicado.suffix == ".webp" else "png"
+    return f"data:image/{tipo};base64,{get_base64_of_bin_file(publicado)}"
+
+
+class MusicaPublicada:
+    """Música de fondo servida por el gestor de medios de Streamlit (/media).
+
+    El servidor estático de /app/static manda como text/plain (con nosniff)
+    todo lo que no es una imagen, así que el audio va por la misma ruta que
+    st.audio: con su tipo MIME y admitiendo peticiones Range, para que el
+    navegador lo reproduzca en streaming. Los bytes se leen una vez por
+    proceso; si hay ffmpeg se añade una variante Opus de bajo bitrate que se
+    genera en segundo plano.
     """
-    st.components.v1.html(js_code, height=0)
+
+    # Posición fija de cada archivo en el gestor de medios: re-registrarlo en cada rerun
+    # sustituye la referencia anterior en lugar de acumular archivos
+    COORDENADAS = "arena-musica"
+
+    def __init__(self, origen):
+        self.origen = Path(origen)
+        with open(self.origen, "rb") as f:
+            self.datos = f.read()
+        self.datos_ogg = None
+        self._data_uri = None
+
+        self.ogg = _ruta_estatica(self.origen, self.datos, ".ogg", BITRATE_OPUS)
+        if self.ogg.exists():
+            self.datos_ogg = self.ogg.read_bytes()
+        elif shutil.which("ffmpeg"):
+            threading.Thread(target=self._transcodificar, daemon=True).start()
+
+    def _transcodificar(self):
+        tmp = _preparar_destino(self.ogg)
+        try:
+            subprocess.run(["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", str(self.origen),
+                            "-vn", "-c:a", "libopus", "-b:a", BITRATE_OPUS, "-f", "ogg", str(tmp)],
+                           check=True, timeout=300)
+            os.replace(tmp, self.ogg)
+            self.datos_ogg = self.ogg.read_bytes()
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"No se pudo generar la variante Opus de la música: {e}")
+            tmp.unlink(missing_ok=True)
+
+    def fuentes(self):
+        """[(url, tipo MIME)] por orden de preferencia"""
+        from streamlit import runtime
+
+        if not runtime.exists():
+            # Sin runtime (por ejemplo, en pruebas) no hay /media: data URI calculado una sola vez
+            if self._data_uri is None:
+                self._data_uri = f"data:audio/mpeg;base64,{base64.b64encode(self.datos).decode()}"
+            return [(self._data_uri, "audio/mpeg")]
+
+        medios = runtime.get_instance().media_file_mgr
+        fuentes = []
+        if self.datos_ogg is not None:
+            url = medios.add(self.datos_ogg, "audio/ogg", f"{self.COORDENADAS}.ogg")
+            fuentes.append((url.lstrip("/"), 'audio/ogg; codecs="opus"'))
+        url = medios.add(self.datos, "audio/mpeg", f"{self.COORDENADAS}.mp3")
+        # Relativa a la página, como las de /app/static, por si hay server.baseUrlPath
+        fuentes.append((url.lstrip("/"), "audio/mpeg"))
+        return fuentes
+
+
+@st.cache_resource(show_spinner=False)
+def musica_publicada(musica_path, mtime_ns):
+    """Una publicación de la música por proceso (y por versión del archivo)"""
+    return MusicaPublicada(musica_path)
+
+
+class MedidorRerun:
+    """Bytes que el script envía al navegador en cada rerun (mensajes ForwardMsg)"""
+
+    def __init__(self, historial=50):
+        self.bytes = 0
+        self.mensajes = 0
+        self.inicio = None
+        self.en_curso = False
+        self.parcial = False
+        # False si esta versión de Streamlit no tiene la cola que se intercepta
+        self.mide_bytes = True
+        self.historial = deque(maxlen=historial)
+
+    def empezar(self, parcial=False):
+        """Engancharse a la cola de mensajes de la ejecución actual del script"""
+        self.bytes = 0
+        self.mensajes = 0
+        self.inicio = time.perf_counter()
+        self.en_curso = True
+        self.parcial = parcial
+        try:
+            from streamlit.runtime.scriptrunner import get_script_run_ctx
+            ctx = get_script_run_ctx()
+        except ImportError:
+            ctx = None
+        if ctx is None:
+            return
+        # ScriptRunContext._enqueue es interno de Streamlit: si cambia, se mide solo el tiempo
+        encolar = getattr(ctx, "_enqueue", None)
+        if not callable(encolar):
+            self.mide_bytes = False
+            return
+        if getattr(encolar, "medidor", None) is self:
+            return
+
+        def encolar_medido(msg):
+            self.bytes += msg.ByteSize()
+            self.mensajes += 1
+            encolar(msg)
+
+        encolar_medido.medidor = self
+        ctx._enqueue = encolar_medido
+
+    def terminar(self):
+        segundos = time.perf_counter() - self.inicio if self.inicio else 0.0
+        self.en_curso = False
+        self.historial.append((self.bytes, self.mensajes, segundos, self.parcial))
+        if os.environ.get("ARENA_METRICAS"):
+            print(self.resumen())
+        return self.bytes, self.mensajes, segundos
+
+    def resumen(self):
+        if not self.historial:
+            return "Sin reruns medidos"
+        bytes_rerun, mensajes, segundos, parcial = self.historial[-1]
+        media = sum(h[0] for h in self.historial) / len(self.historial)
+        tipo = "fragmento" if parcial else "rerun"
+        if not self.mide_bytes:
+            return f"Último {tipo}: {segundos * 1000:.0f} ms (esta versión de Streamlit no permite medir bytes)"
+        return (f"Último {tipo}: {bytes_rerun / 1024:.1f} KB en {mensajes} mensajes, "
+                f"{segundos * 1000:.0f} ms · media {media / 1024:.1f} KB ({len(self.historial)} reruns)")
+
+
+# Fragmentos (st.fragment desde Streamlit 1.37, st.experimental_fragment en
+# 1.33-1.36): un clic en un widget de un fragmento solo vuelve a ejecutar ese
+# fragmento. Con versiones anteriores se vuelve a ejecutar la página entera.
+_st_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def fragmento(funcion):
+    """Decorador de fragmento que también mide (y traza) los reruns parciales"""
+    funcion = trazas.span(funcion)
+
+    @functools.wraps(funcion)
+    def fragmento_medido(*args, **kwargs):
+        medidor = st.session_state.get("medidor")
+        # Si no hay un rerun completo en curso, es el fragmento el que se está ejecutando solo
+        parcial = medidor is not None and not medidor.en_curso
+        if parcial:
+            medidor.empezar(parcial=True)
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            if parcial:
+                medidor.terminar()
+    return _st_fragment(fragmento_medido) if _st_fragment else fragmento_medido
+
+
+@st.cache_resource
+def almacen_configuracion():
+    """Configuración de solo lectura compartida por todas las sesiones del proceso"""
+    return AlmacenConfiguracion(DATA_DIR)
+
 
 class ArenaApp:
     def __init__(self):
+        self.configuracion = None
         self.cargar_configuraciones()
+        self.motor = ArenaEngine.desde_configuracion(self.configuracion)
         self.inicializar_estados()
         
+    @trazas.span
     def cargar_configuraciones(self):
+        """Tomar la configuración compartida; si se editaron los datos, pasar a la nueva"""
         try:
-            # En Streamlit, los archivos deben estar en el mismo directorio o en una estructura conocida
-            self.BASE_DIR = Path(__file__).parent
-            self.DATA_DIR = self.BASE_DIR / "assets" / "data"
+            self.BASE_DIR = BASE_DIR
+            self.DATA_DIR = DATA_DIR
             self.AUDIO_DIR = self.BASE_DIR / "assets" / "audio"
             self.IMAGES_DIR = self.BASE_DIR / "assets" / "imagenes"
 
-            # Cargar todos los archivos de configuración
-            config_files = {
-                "ui_config": "ui_config.json",
-                "estados_config": "estados.json",
-                "descansos": "descansos.json",
-                "recompensas": "recompensas.json",
-                "comportamiento": "comportamiento.json"
-            }
-            
-            for attr, file_name in config_files.items():
-                with open(self.DATA_DIR / file_name, "r", encoding="utf-8") as f:
-                    setattr(self, attr, json.load(f))
-
+            configuracion = almacen_configuracion().obtener()
         except Exception as e:
             st.error(f"No se pudieron cargar las configuraciones:\n{str(e)}")
             st.stop()
-            
+
+        if configuracion is not self.configuracion:
+            self.configuracion = configuracion
+            # Solo referencias al objeto compartido, nunca copias
+            self.ui_config = configuracion.ui_config
+            if getattr(self, "motor", None) is not None:
+                self.motor.usar_configuracion(configuracion)
+
+
     def inicializar_estados(self):
-        # Usar valores de configuración si están disponibles
-        if not hasattr(self, 'estados_config'):
-            self.cargar_configuraciones()
-            
-        limites = self.estados_config.get("limites", {})
-        
-        # Inicializar estado de la sesión de Streamlit
-        if 'moral_grupo' not in st.session_state:
-            st.session_state.moral_grupo = limites.get("moral_max", 10)
-            st.session_state.cordura = limites.get("cordura_max", 10)
-            st.session_state.heroes_nivel = None
-            st.session_state.ronda_actual = 1
-            st.session_state.encuentro_actual = None
-            st.session_state.encuentros = {}
-            st.session_state.acciones_heroicas = 0
-            st.session_state.acciones_deshonrosas = 0
-            st.session_state.bonif_critico = False
-            st.session_state.apuesta_activa = False
-            st.session_state.apuesta_monedas = 0
+        # El estado de la partida vive en el motor; la sesión solo guarda el de la interfaz
+        if 'registro_log' not in st.session_state:
             st.session_state.musica_activada = False
-            st.session_state.juego_iniciado = False
             st.session_state.nivel_valor = 1
             st.session_state.apuesta_valor = 0
-            st.session_state.mensajes_log = []
+            # Bloques algo mayores que el mínimo de la caché de mensajes de Streamlit
+            bytes_bloque = int(st.get_option("global.minCachedMessageSize") * 1.25)
+            st.session_state.registro_log = RegistroEventos(retencion=self.config_log("retencion", 5000),
+                                                            bytes_bloque=bytes_bloque)
+            st.session_state.ventana_log = self.config_log("ventana", 400)
+
+    def config_log(self, clave, por_defecto):
+        return self.ui_config.get("log", {}).get(clave, por_defecto)
 
     def reiniciar_arena(self):
-        limites = self.estados_config.get("limites", {})
-        st.session_state.moral_grupo = limites.get("moral_max", 10)
-        st.session_state.cordura = limites.get("cordura_max", 10)
-        st.session_state.heroes_nivel = None
-        st.session_state.ronda_actual = 1
-        st.session_state.encuentro_actual = None
-        st.session_state.encuentros = {}
-        st.session_state.acciones_heroicas = 0
-        st.session_state.acciones_deshonrosas = 0
-        st.session_state.bonif_critico = False
-        st.session_state.apuesta_activa = False
-        st.session_state.apuesta_monedas = 0
-        st.session_state.juego_iniciado = False
-        st.session_state.mensajes_log = []
-        
-        if st.session_state.musica_activada:
-            stop_audio()
-            st.session_state.musica_activada = False
+        self.motor.reiniciar()
+        self.limpiar_log()
+        # El control de música que se pinta al final del rerun la pausará
+        st.session_state.musica_activada = False
 
     def toggle_musica(self):
         if st.session_state.musica_activada:
-            stop_audio()
             st.session_state.musica_activada = False
         else:
-            try:
-                musica_path = self.AUDIO_DIR / "musica_fondo.mp3"
-                if musica_path.exists():
-                    autoplay_audio(str(musica_path))
-                    st.session_state.musica_activada = True
-                else:
-                    st.error("Archivo de música no encontrado")
-            except Exception as e:
-                st.error(f"No se pudo reproducir la música: {e}")
-        st.rerun()
-
-    def iniciar_arena(self):
-        nivel = st.session_state.nivel_valor
-        apuesta = st.session_state.apuesta_valor
-        
-        try:
-            if apuesta < 0 or apuesta > 500:
-                raise ValueError("La apuesta debe estar entre 0 y 500")
-
-            # Determinar archivo según nivel y clave para recompensas
-            nivel_config = {
-                (1, 2): {"archivo": "nivel_1_2.json", "clave_recompensa": "nivel_1_2"},
-                (3, 4): {"archivo": "nivel_3_4.json", "clave_recompensa": "nivel_3_4"},
-                (5, 6): {"archivo": "nivel_5_6.json", "clave_recompensa": "nivel_5_6"},
-                (7, 10): {"archivo": "nivel_7_8.json", "clave_recompensa": "nivel_7_8"}
-            }
-            
-            config_seleccionada = None
-            for rango, config in nivel_config.items():
-                if rango[0] <= nivel <= rango[1]:
-                    st.session_state.heroes_nivel = f"{rango[0]}_{rango[1]}"
-                    config_seleccionada = config
-                    break
-            
-            if not config_seleccionada:
-                raise ValueError("Nivel debe estar entre 1 y 10")
-
-            # Cargar encuentros
-            encuentros_dir = self.DATA_DIR / "encuentros"
-            if not encuentros_dir.exists():
-                raise ValueError(f"Directorio de encuentros no encontrado: {encuentros_dir}")
-                
-            encuentros_path = encuentros_dir / config_seleccionada["archivo"]
-            if not encuentros_path.exists():
-                raise ValueError(f"Archivo de encuentros no encontrado: {encuentros_path}")
-                
-            with open(encuentros_path, "r", encoding="utf-8") as f:
-                st.session_state.encuentros = json.load(f)
-
-            st.session_state.apuesta_monedas = apuesta
-            st.session_state.apuesta_activa = apuesta > 0
-            st.session_state.juego_iniciado = True
-
-            # Obtener el multiplicador de recompensas usando la clave correcta
-            recompensa = self.recompensas.get(config_seleccionada["clave_recompensa"], {})
-            multiplicador = recompensa.get("multiplicador_monedas", 1.0)
-            
-            # Mensajes de inicio
-            st.session_state.mensajes_log = []
-            self.agregar_mensaje_log("\n=== BIENVENIDO A LA ARENA DE LORAINIA ===", "titulo")
-            self.agregar_mensaje_log("¡Atención, ciudadanos de Lorainia! Aventureros de las Tierras Antiguas,\n"
-                                    "estáis bajo la atenta mirada de los dioses y del gran rey Logan III. Aquí hallaréis muerte o gloria.", "publico")
-            self.agregar_mensaje_log("Reglamento escrito por José Manuel Arena v1.3 y aplicacion por Omar Nieto (DETION)","enemigo")
-            
-            self.agregar_mensaje_log("\n«¡Atención, nobles espectadores!»", "speaker")
-            
-            if st.session_state.apuesta_activa:
-                ganancia_potencial = int(st.session_state.apuesta_monedas * multiplicador)
-                self.agregar_mensaje_log(f"«¡Nuestros valientes héroes han apostado {st.session_state.apuesta_monedas} monedas!»", "speaker")
-                self.agregar_mensaje_log(f"«Si logran la victoria, obtendrán {ganancia_potencial} monedas adicionales!»", "speaker")
+            musica_path = self.AUDIO_DIR / "musica_fondo.mp3"
+            if musica_path.exists():
+                st.session_state.musica_activada = True
             else:
-                self.agregar_mensaje_log("«¡Jajaja nuestros héroes no han apostado o eso quiere decir que solo les queda la vida!»", "speaker")
-                self.agregar_mensaje_log("«¡Una muestra de valentía o tal vez de locura!»", "speaker")
-            
-            self.agregar_mensaje_log("«¡Que comience el espectáculo!»", "speaker")
+                st.error("Archivo de música no encontrado")
 
-            self.agregar_mensaje_log(f"\n=== HÉROES DE NIVEL {st.session_state.heroes_nivel.replace('_', '-')} ===", "titulo")
-            if st.session_state.apuesta_activa:
-                self.agregar_mensaje_log(f"¡Has apostado {st.session_state.apuesta_monedas} monedas!", "apuesta")
-            else:
-                self.agregar_mensaje_log("¡No has realizado ninguna apuesta!", "apuesta")
-                
-            self.ejecutar_ronda(1)
-            st.rerun()
+    def renderizar_musica(self):
+        """Pintar el control de la música (mismo iframe en cada rerun)"""
+        musica_path = self.AUDIO_DIR / "musica_fondo.mp3"
+        if not musica_path.exists():
+            return
+        try:
+            if not st.session_state.get('musica_activada', False):
+                # Pausada: el control no necesita fuentes y no se toca el archivo
+                control_musica(False, [])
+                return
+            musica = musica_publicada(str(musica_path), musica_path.stat().st_mtime_ns)
+            control_musica(True, musica.fuentes())
+        except Exception as e:
+            st.error(f"No se pudo reproducir la música: {e}")
 
+    @trazas.span
+    def iniciar_arena(self):
+        try:
+            eventos = self.motor.iniciar_arena(st.session_state.nivel_valor, st.session_state.apuesta_valor)
         except Exception as e:
             st.error(f"No se pudo iniciar la arena:\n{str(e)}")
-
-    def ejecutar_ronda(self, ronda):
-        st.session_state.ronda_actual = ronda
-        tipo_ronda = "Calentamiento" if ronda == 1 else "Desafío" if ronda == 2 else "Jefe Final"
-
-        encuentros_ronda = st.session_state.encuentros[f"ronda_{ronda}"]
-        tirada = random.randint(1, 100)
-
-        for encuentro in encuentros_ronda:
-            rango_min, rango_max = map(int, encuentro["rango"].split("-"))
-            if rango_min <= tirada <= rango_max:
-                st.session_state.encuentro_actual = encuentro["enemigos"]
-                break
-        else:
-            # Si no se encuentra encuentro, usar el último por defecto
-            st.session_state.encuentro_actual = encuentros_ronda[-1]["enemigos"]
-
-        self.agregar_mensaje_log(f"\n=== RONDA {ronda}: {tipo_ronda.upper()} ===", "ronda")
-        self.agregar_mensaje_log(f"Tirada: {tirada}", "enemigo")
-        self.mostrar_enemigos()
-        st.session_state.bonif_critico = False
-
-    def mostrar_enemigos(self):
-        enemigos = st.session_state.encuentro_actual.split(" y ")
-        self.agregar_mensaje_log("\nENEMIGOS EN LA ARENA:", "enemigo")
-        
-        # Diccionario de iconos para tipos de enemigos
-        iconos_enemigos = {
-            "Hechicero": "🧙",
-            "Escudo": "🛡️", 
-            "Espada": "⚔️",
-            "Hacha": "⚔️"
-        }
+            return
+
+        # Mensajes de inicio: cada torneo empieza con el log vacío
+        self.limpiar_log()
+        self.agregar_mensaje_log("\n=== BIENVENIDO A LA ARENA DE LORAINIA ===", "titulo")
+        self.agregar_mensaje_log("¡Atención, ciudadanos de Lorainia! Aventureros de las Tierras Antiguas,\n"
+                                "estáis bajo la atenta mirada de los dioses y del gran rey Logan III. Aquí hallaréis muerte o gloria.", "publico")
+        self.agregar_mensaje_log("Reglamento escrito por José Manuel Arena v1.3 y aplicacion por Omar Nieto (DETION)","enemigo")
         
-        for enemigo in enemigos:
-            icono = "🐺"  # Por defecto
-            for tipo, emoji in iconos_enemigos.items():
-                if tipo in enemigo:
-                    icono = emoji
-                    break
-                    
-            self.agregar_mensaje_log(f"{icono} {enemigo.strip()}", "enemigo")
+        self.renderizar_eventos(eventos)
 
+    @trazas.span
     def evaluar_accion(self, tipo_accion):
-        if tipo_accion == "heroica":
-            st.session_state.acciones_heroicas += 1
-            tag = "heroico"
-            tipo_reaccion = "apoyo"
-            self.actualizar_estados("heroica")
-        else:
-            st.session_state.acciones_deshonrosas += 1
-            tag = "deshonroso"
-            tipo_reaccion = "desprecio"
-            self.actualizar_estados("deshonrosa")
-
-        reacciones = self.comportamiento["reacciones_publico"][tipo_reaccion]
-        reaccion = random.choice(reacciones)
-
-        self.agregar_mensaje_log(f"\nLos héroes realizan una acción {tipo_accion}:", tag)
-        self.agregar_mensaje_log(f"» {reaccion['efecto']}", "critical" if reaccion['id'] > 15 else "efecto")
-
-        self.aplicar_efecto_publico(reaccion['id'], tipo_accion == "heroica")
-        st.rerun()
-
-    def aplicar_efecto_publico(self, id_efecto, es_apoyo):
-        if es_apoyo:
-            if id_efecto == 4:
-                st.session_state.bonif_critico = True
-                self.agregar_mensaje_log("¡BONIFICACIÓN CRÍTICA ACTIVADA!", "critical")
-            elif id_efecto == 19:
-                st.session_state.moral_grupo = min(self.estados_config["limites"]["moral_max"], st.session_state.moral_grupo + 1)
-                self.agregar_mensaje_log("+1 a la Moral del Grupo", "heroico")
-        else:
-            if id_efecto == 4:
-                st.session_state.moral_grupo = max(0, st.session_state.moral_grupo - 1)
-                self.agregar_mensaje_log("-1 a la Moral del Grupo", "deshonroso")
-            elif id_efecto == 5:
-                st.session_state.cordura = max(0, st.session_state.cordura - 1)
-                self.agregar_mensaje_log("-1 a la Cordura", "deshonroso")
-        self.actualizar_estados()
-
-    def actualizar_estados(self, accion=None):
-        if accion == "heroica":
-            st.session_state.moral_grupo = min(
-                self.estados_config["limites"]["moral_max"],
-                st.session_state.moral_grupo + self.estados_config["efectos"]["heroico"]["moral"]
-            )
-        elif accion == "deshonrosa":
-            st.session_state.cordura = max(
-                0,
-                st.session_state.cordura + self.estados_config["efectos"]["deshonroso"]["cordura"]
-            )
-
-        self.agregar_mensaje_log(
-            f"\nMoral del Grupo: {st.session_state.moral_grupo}/{self.estados_config['limites']['moral_max']} "
-            f"| Cordura: {st.session_state.cordura}/{self.estados_config['limites']['cordura_max']}",
-            "efecto"
-        )
-
-    def mostrar_descanso(self):
-        tipo = "corto"
-        descanso = self.descansos[tipo]
-
-        self.agregar_mensaje_log(f"\n=== {descanso['descripcion']} ===", "titulo")
-        for beneficio in descanso["beneficios"]:
-            self.agregar_mensaje_log(beneficio, "lista")
-
-        st.session_state.moral_grupo = min(
-            self.estados_config["limites"]["moral_max"],
-            st.session_state.moral_grupo + descanso["efectos"]["moral"]
-        )
-        
-        # Parsear y aplicar efecto de cordura
-        cordura_efecto = descanso["efectos"]["cordura"]
-        if "d" in cordura_efecto:
-            dado_cordura = int(cordura_efecto.split("d")[1])
-            cordura_sumada = random.randint(1, dado_cordura)
-        else:
-            cordura_sumada = int(cordura_efecto)
-            
-        st.session_state.cordura = min(
-            self.estados_config["limites"]["cordura_max"],
-            st.session_state.cordura + cordura_sumada
-        )
-        self.actualizar_estados()
+        self.renderizar_eventos(self.motor.evaluar_accion(tipo_accion))
 
+    @trazas.span
     def siguiente_ronda(self):
-        if st.session_state.ronda_actual < 3:
-            # Mostrar descanso después de la ronda actual
-            if st.session_state.ronda_actual > 0:
-                self.mostrar_descanso()
-            
-            st.session_state.ronda_actual += 1
-            self.ejecutar_ronda(st.session_state.ronda_actual)
-            st.rerun()
-        else:
-            self.mostrar_recompensas()
-            st.rerun()
-
-    def mostrar_recompensas(self):
-        # Mapear el nivel a la clave correcta del JSON
-        nivel_config = {
-            "1_2": "nivel_1_2",
-            "3_4": "nivel_3_4", 
-            "5_6": "nivel_5_6",
-            "7_10": "nivel_7_8"
-        }
-        
-        clave_recompensa = nivel_config.get(st.session_state.heroes_nivel, "nivel_1_2")
-        recompensa = self.recompensas.get(clave_recompensa, {})
-        multiplicador = recompensa.get("multiplicador_monedas", 1.0)
-        monedas_base = recompensa.get("monedas", 0)
-        
-        # Calcular monedas ganadas
-        monedas_ganadas = monedas_base
-        
-        # Aplicar multiplicador si el usuario apostó algo
-        if st.session_state.apuesta_activa and st.session_state.apuesta_monedas > 0:
-            ganancia_apuesta = int(st.session_state.apuesta_monedas * multiplicador)
-            monedas_ganadas += ganancia_apuesta
-
-        experiencia_ganada = recompensa.get("experiencia", 0)
-        tesoros_ganados = recompensa.get("tesoros", [])
-
-        # Mostrar recompensas
-        st.session_state.recompensas = {
-            "monedas": monedas_ganadas,
-            "monedas_base": monedas_base,
-            "ganancia_apuesta": ganancia_apuesta if st.session_state.apuesta_activa else 0,
-            "experiencia": experiencia_ganada,
-            "tesoros": tesoros_ganados
-        }
-        
+        self.renderizar_eventos(self.motor.siguiente_ronda())
+
+    def renderizar_eventos(self, eventos):
+        """Pasar al log de la sesión los eventos devueltos por el motor"""
+        for evento in eventos:
+            if evento.tipo == EVENTO_LOG:
+                self.agregar_mensaje_log(evento.mensaje, evento.tag)
+            elif evento.tipo == EVENTO_RECOMPENSAS:
+                self.mostrar_recompensas(evento.datos)
+
+    def mostrar_recompensas(self, recompensas):
         self.agregar_mensaje_log("\n=== ¡VICTORIA! ===", "titulo")
-        self.agregar_mensaje_log(f"Monedas ganadas: {monedas_ganadas}", "heroico")
-        if st.session_state.apuesta_activa:
-            self.agregar_mensaje_log(f" - Base: {monedas_base} monedas", "efecto")
-            self.agregar_mensaje_log(f" - Ganancia por apuesta: +{ganancia_apuesta} monedas", "efecto")
-        self.agregar_mensaje_log(f"Experiencia: {experiencia_ganada} puntos", "heroico")
+        self.agregar_mensaje_log(f"Monedas ganadas: {recompensas['monedas']}", "heroico")
+        if self.motor.estado.apuesta_activa:
+            self.agregar_mensaje_log(f" - Base: {recompensas['monedas_base']} monedas", "efecto")
+            self.agregar_mensaje_log(f" - Ganancia por apuesta: +{recompensas['ganancia_apuesta']} monedas", "efecto")
+        self.agregar_mensaje_log(f"Experiencia: {recompensas['experiencia']} puntos", "heroico")
         
-        if tesoros_ganados:
+        if recompensas['tesoros']:
             self.agregar_mensaje_log("Tesoros obtenidos:", "titulo")
-            for tesoro in tesoros_ganados:
+            for tesoro in recompensas['tesoros']:
                 self.agregar_mensaje_log(f"» {tesoro}", "lista")
 
     def agregar_mensaje_log(self, mensaje, tag=None):
-        if 'mensajes_log' not in st.session_state:
-            st.session_state.mensajes_log = []
-        
-        st.session_state.mensajes_log.append({"mensaje": mensaje, "tag": tag})
+        st.session_state.registro_log.agregar(mensaje, tag)
+
+    def limpiar_log(self):
+        st.session_state.registro_log.limpiar()
+        st.session_state.ventana_log = self.config_log("ventana", 400)
 
+    def mostrar_anteriores(self):
+        st.session_state.ventana_log += self.config_log("ventana", 400)
+
+    @trazas.span
     def renderizar_interfaz(self):
-        # Intentar cargar el fondo como base64
-        fondo_base64 = ""
+        # Fondo como recurso estático con caché HTTP (o base64 calculado una sola vez)
+        fondo_url = ""
         try:
             fondo_path = self.IMAGES_DIR / "fondo.png"
             if fondo_path.exists():
-                fondo_base64 = get_base64_of_bin_file(fondo_path)
+                fondo_url = url_fondo(str(fondo_path), fondo_path.stat().st_mtime_ns)
         except Exception as e:
             st.error(f"Error cargando imagen de fondo: {e}")
         
-        # CSS personalizado con fondo como imagen base64
+        # CSS personalizado con la imagen de fondo
         css = f"""
         <style>
         .stApp {{
@@ -426,10 +470,10 @@ class ArenaApp:
         }}
         """
         
-        if fondo_base64:
+        if fondo_url:
             css += f"""
             .stApp {{
-                background-image: url("data:image/png;base64,{fondo_base64}");
+                background-image: url("{fondo_url}");
                 background-size: cover;
                 background-position: center;
             }}
@@ -449,13 +493,13 @@ class ArenaApp:
             cursor: pointer;
             border-radius: 12px;
         }
-        .log-container {
+        div[data-testid="stVerticalBlockBorderWrapper"]:has(.log-bloque) {
             background-color: rgba(255, 255, 255, 0.9);
             border-radius: 10px;
-            padding: 20px;
             margin: 10px 0;
-            height: 400px;
-            overflow-y: auto;
+        }
+        .log-bloque {
+            padding: 0 20px;
             color: black !important;
         }
         .titulo { 
@@ -518,6 +562,9 @@ class ArenaApp:
         """
         
         st.markdown(css, unsafe_allow_html=True)
+
+        # Siempre en la misma posición, para que el iframe del control no se recree
+        self.renderizar_musica()
         
         # Título de la aplicación
         st.title("⚔️ DETION ARENA: LEAGUE OF DUNGEONEERS")
@@ -527,68 +574,112 @@ class ArenaApp:
         
         with col1:
             st.subheader("Nivel de Héroes")
-            st.session_state.nivel_valor = st.slider("Nivel", 1, 10, st.session_state.nivel_valor, 1, label_visibility="collapsed", key="nivel_slider")
+            self.renderizar_nivel()
             
         with col2:
             st.subheader("Apuesta")
-            st.session_state.apuesta_valor = st.slider("Monedas", 0, 500, st.session_state.apuesta_valor, 10, label_visibility="collapsed", key="apuesta_slider")
+            self.renderizar_apuesta()
             
+        # Los botones usan on_click: el estado ya está actualizado cuando se
+        # pinta la página y no hace falta un st.rerun() extra
+        estado = self.motor.estado
         with col3:
             st.subheader("Controles")
-            if not st.session_state.get('juego_iniciado', False):
-                if st.button("🎮 Iniciar Arena", use_container_width=True, key="iniciar_btn"):
-                    self.iniciar_arena()
+            if not estado.juego_iniciado:
+                st.button("🎮 Iniciar Arena", use_container_width=True, key="iniciar_btn",
+                          on_click=self.iniciar_arena)
             else:
-                if st.session_state.ronda_actual < 3:
-                    if st.button("➡️ Siguiente Ronda", use_container_width=True, key="siguiente_btn"):
-                        self.siguiente_ronda()
+                if estado.ronda_actual < 3:
+                    st.button("➡️ Siguiente Ronda", use_container_width=True, key="siguiente_btn",
+                              on_click=self.siguiente_ronda)
+                elif not estado.terminado:
+                    # Tras la ronda final, el mismo paso del motor calcula las recompensas
+                    st.button("🏆 Recompensas", use_container_width=True, key="siguiente_btn",
+                              on_click=self.siguiente_ronda)
                 
-            if st.button("🔁 Reiniciar", use_container_width=True, key="reiniciar_btn"):
-                self.reiniciar_arena()
+            st.button("🔁 Reiniciar", use_container_width=True, key="reiniciar_btn",
+                      on_click=self.reiniciar_arena)
                 
             musica_texto = "🔊 Música: ON" if st.session_state.get('musica_activada', False) else "🔇 Música: OFF"
-            if st.button(musica_texto, use_container_width=True, key="musica_btn"):
-                self.toggle_musica()
+            st.button(musica_texto, use_container_width=True, key="musica_btn", on_click=self.toggle_musica)
         
         # Área de log de eventos
         st.subheader("Eventos de la Arena")
-        
-        # Crear contenedor para el log
-        log_html = '<div class="log-container">'
-        for msg in st.session_state.get('mensajes_log', []):
-            clase = msg.get('tag', 'efecto')
-            mensaje = msg['mensaje'].replace('\n', '<br>')
-            log_html += f'<p class="{clase}">{mensaje}</p>'
-        log_html += '</div>'
-        
-        st.markdown(log_html, unsafe_allow_html=True)
+        self.renderizar_partida()
+        self.renderizar_recompensas()
+
+    # Cada fragmento se refresca por separado; un cambio en sus widgets no
+    # vuelve a ejecutar el resto de la página
+
+    @fragmento
+    def renderizar_nivel(self):
+        st.session_state.nivel_valor = st.slider("Nivel", 1, 10, st.session_state.nivel_valor, 1, label_visibility="collapsed", key="nivel_slider")
+
+    @fragmento
+    def renderizar_apuesta(self):
+        st.session_state.apuesta_valor = st.slider("Monedas", 0, 500, st.session_state.apuesta_valor, 10, label_visibility="collapsed", key="apuesta_slider")
+
+    @fragmento
+    def renderizar_partida(self):
+        """Log de eventos y botones de acción: una acción solo refresca este fragmento"""
+        estado = self.motor.estado
+
+        # Solo los bloques de la ventana visible; los sellados no cambian y
+        # Streamlit los reenvía como referencia a su caché de mensajes
+        registro = st.session_state.registro_log
+        ventana = st.session_state.ventana_log
+        with st.container(height=400):
+            ocultas = registro.ocultas(ventana)
+            if ocultas:
+                st.button(f"⬆️ Mostrar anteriores ({ocultas})", key="anteriores_btn",
+                          on_click=self.mostrar_anteriores)
+            for _, html in registro.bloques_html(ventana):
+                st.markdown(f'<div class="log-bloque">{html}</div>', unsafe_allow_html=True)
         
         # Botones de acción durante el juego
-        if st.session_state.get('juego_iniciado', False) and st.session_state.get('ronda_actual', 1) <= 3:
+        if estado.juego_iniciado and not estado.terminado:
             col4, col5 = st.columns(2)
             with col4:
-                if st.button("🛡️ Acción Heroica", use_container_width=True, key="heroica_btn"):
-                    self.evaluar_accion("heroica")
+                st.button("🛡️ Acción Heroica", use_container_width=True, key="heroica_btn",
+                          on_click=self.evaluar_accion, args=("heroica",))
             with col5:
-                if st.button("💀 Acción Deshonrosa", use_container_width=True, key="deshonrosa_btn"):
-                    self.evaluar_accion("deshonrosa")
-        
+                st.button("💀 Acción Deshonrosa", use_container_width=True, key="deshonrosa_btn",
+                          on_click=self.evaluar_accion, args=("deshonrosa",))
+
+    @fragmento
+    def renderizar_recompensas(self):
+        estado = self.motor.estado
         # Mostrar recompensas al final
-        if hasattr(st.session_state, 'recompensas'):
+        if estado.recompensas:
             st.subheader("🎉 ¡Victoria!")
-            st.write(f"**Monedas ganadas:** {st.session_state.recompensas['monedas']}")
-            if st.session_state.apuesta_activa:
-                st.write(f"** - Base:** {st.session_state.recompensas['monedas_base']}")
-                st.write(f"** - Ganancia por apuesta:** {st.session_state.recompensas['ganancia_apuesta']}")
-            st.write(f"**Experiencia:** {st.session_state.recompensas['experiencia']} puntos")
-            if st.session_state.recompensas['tesoros']:
+            st.write(f"**Monedas ganadas:** {estado.recompensas['monedas']}")
+            if estado.apuesta_activa:
+                st.write(f"** - Base:** {estado.recompensas['monedas_base']}")
+                st.write(f"** - Ganancia por apuesta:** {estado.recompensas['ganancia_apuesta']}")
+            st.write(f"**Experiencia:** {estado.recompensas['experiencia']} puntos")
+            if estado.recompensas['tesoros']:
                 st.write("**Tesoros:**")
-                for tesoro in st.session_state.recompensas['tesoros']:
+                for tesoro in estado.recompensas['tesoros']:
                     st.write(f" - {tesoro}")
 
 # Crear y ejecutar la aplicación
 if __name__ == "__main__":
-    if 'app' not in st.session_state:
-        st.session_state.app = ArenaApp()
-    
-    st.session_state.app.renderizar_interfaz()
\ No newline at end of file
+    if 'medidor' not in st.session_state:
+        st.session_state.medidor = MedidorRerun()
+    medidor = st.session_state.medidor
+    medidor.empezar()
+    # st.stop(), un st.rerun() o una excepción cortan el script: sin el finally el
+    # medidor se quedaría "en curso" y dejaría de medir los fragmentos
+    try:
+        if 'app' not in st.session_state:
+            st.session_state.app = ArenaApp()
+        else:
+            st.session_state.app.cargar_configuraciones()
+
+        st.session_state.app.renderizar_interfaz()
+
+        # ARENA_METRICAS=1 muestra y registra los bytes enviados en cada rerun
+        if os.environ.get("ARENA_METRICAS"):
+            st.caption(medidor.resumen())
+    finally:
+        medidor.terminar()
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""Tablas aleatorias compiladas una sola vez al cargar los datos.
+
+- TablaD100: tablas de tirada d100 con rangos "a-b" (encuentros). Se validan al
+  compilar (sin huecos ni solapes entre 1 y 100) y se convierten en un array
+  directo tirada -> entrada.
+- TablaPonderada: tablas con pesos (reacciones del público) muestreadas con el
+  método alias de Vose en O(1) por tirada.
+
+Ambas admiten tiradas sueltas con un random.Random y tiradas por lotes con un
+numpy.random.Generator para los simuladores.
+"""
+from collections import namedtuple
+
+Reaccion = namedtuple("Reaccion", "id efecto critica")
+
+# Las reacciones con id mayor que este umbral son críticas (texto parpadeante)
+UMBRAL_CRITICO = 15
+
+
+def _parsear_rango(rango):
+    try:
+        minimo, maximo = (int(valor) for valor in rango.split("-"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Rango inválido: {rango!r}") from None
+    if minimo > maximo:
+        raise ValueError(f"Rango invertido: {rango!r}")
+    return minimo, maximo
+
+
+class TablaD100:
+    """Tabla de tirada 1-100 compilada a un array de 101 posiciones (la 0 no se usa)"""
+
+    __slots__ = ("entradas", "indices", "_array")
+
+    def __init__(self, entradas, campo_rango="rango", nombre="tabla"):
+        self.entradas = tuple(entradas)
+        indices = [None] * 101
+        for posicion, entrada in enumerate(self.entradas):
+            # Las entradas pueden ser diccionarios del JSON o registros con atributos
+            rango = entrada[campo_rango] if isinstance(entrada, dict) else getattr(entrada, campo_rango)
+            minimo, maximo = _parsear_rango(rango)
+            if minimo < 1 or maximo > 100:
+                raise ValueError(f"{nombre}: el rango {rango} se sale de 1-100")
+            for tirada in range(minimo, maximo + 1):
+                if indices[tirada] is not None:
+                    raise ValueError(f"{nombre}: la tirada {tirada} está en más de un rango")
+                indices[tirada] = posicion
+
+        huecos = [tirada for tirada in range(1, 101) if indices[tirada] is None]
+        if huecos:
+            raise ValueError(f"{nombre}: tiradas sin encuentro: {huecos[0]}-{huecos[-1]}"
+                             if len(huecos) > 1 else f"{nombre}: tirada sin encuentro: {huecos[0]}")
+        indices[0] = 0
+        self.indices = tuple(indices)
+        self._array = None
+
+    def entrada(self, tirada):
+        return self.entradas[self.indices[tirada]]
+
+    def tirar(self, rng):
+        """Devuelve (tirada, entrada)"""
+        tirada = rng.randint(1, 100)
+        return tirada, self.entradas[self.indices[tirada]]
+
+    def indices_lote(self, tiradas):
+        """Índices de entrada para un array de tiradas de NumPy"""
+        if self._array is None:
+            import numpy as np
+            self._array = np.array(self.indices, dtype=np.int16)
+        return self._array[tiradas]
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+class TablaPonderada:
+    """Tabla con pesos muestreada con el método alias (Vose).
+
+    Si todos los pesos son iguales se usa directamente rng.randrange, que
+    consume el generador igual que random.choice.
+    """
+
+    __slots__ = ("entradas", "uniforme", "probabilidades", "alias", "_arrays")
+
+    def __init__(self, entradas, pesos=None, nombre="tabla"):
+        self.entradas = tuple(entradas)
+        n = len(self.entradas)
+        if n == 0:
+            raise ValueError(f"{nombre}: la tabla está vacía")
+        pesos = [1.0] * n if pesos is None else [float(p) for p in pesos]
+        if len(pesos) != n or any(p < 0 for p in pesos) or sum(pesos) <= 0:
+            raise ValueError(f"{nombre}: pesos inválidos")
+
+        self.uniforme = len(set(pesos)) == 1
+        self._arrays = None
+
+        total = sum(pesos)
+        escalados = [p * n / total for p in pesos]
+        self.probabilidades = [0.0] * n
+        self.alias = list(range(n))
+        pequeños = [i for i, p in enumerate(escalados) if p < 1.0]
+        grandes = [i for i, p in enumerate(escalados) if p >= 1.0]
+        while pequeños and grandes:
+            menor, mayor = pequeños.pop(), grandes.pop()
+            self.probabilidades[menor] = escalados[menor]
+            self.alias[menor] = mayor
+            escalados[mayor] -= 1.0 - escalados[menor]
+            (pequeños if escalados[mayor] < 1.0 else grandes).append(mayor)
+        for i in pequeños + grandes:
+            self.probabilidades[i] = 1.0
+
+    def indice(self, rng):
+        i = rng.randrange(len(self.entradas))
+        if self.uniforme or rng.random() < self.probabilidades[i]:
+            return i
+        return self.alias[i]
+
+    def tirar(self, rng):
+        return self.entradas[self.indice(rng)]
+
+    def indices_lote(self, n, generador):
+        """n índices muestreados con un numpy.random.Generator"""
+        import numpy as np
+        i = generador.integers(0, len(self.entradas), size=n)
+        if self.uniforme:
+            return i
+        if self._arrays is None:
+            self._arrays = (np.array(self.probabilidades), np.array(self.alias))
+        probabilidades, alias = self._arrays
+        return np.where(generador.random(n) < probabilidades[i], i, alias[i])
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+def compilar_reacciones(comportamiento):
+    """Tablas de reacciones del público por tipo ("apoyo", "desprecio")"""
+    tablas = {}
+    for tipo, reacciones in comportamiento["reacciones_publico"].items():
+        entradas = [Reaccion(r["id"], r["efecto"], r["id"] > UMBRAL_CRITICO) for r in reacciones]
+        pesos = [r.get("peso", 1) for r in reacciones]
+        tablas[tipo] = TablaPonderada(entradas, pesos, nombre=f"reacciones_publico.{tipo}")
+    return tablas
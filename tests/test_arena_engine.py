@@ -0,0 +1,74 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from arena_engine import EVENTO_LOG, EVENTO_RECOMPENSAS, EVENTO_RONDA, ArenaEngine
+from modelo_configuracion import cargar_configuracion
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "assets" / "data"
+SEMILLA = 20240517
+
+
+@pytest.fixture(scope="module")
+def reglas(tmp_path_factory):
+    return cargar_configuracion(DATA_DIR, directorio_cache=tmp_path_factory.mktemp("cache")).reglas
+
+
+def _jugar(reglas, nivel, apuesta, semilla=SEMILLA):
+    motor = ArenaEngine(reglas, rng=random.Random(semilla))
+    eventos = motor.iniciar_arena(nivel, apuesta)
+    for _ in range(3):
+        eventos += motor.siguiente_ronda()
+    return motor, eventos
+
+
+def _firma(eventos):
+    return [(e.tipo, e.mensaje, e.tag,
+             {k: v for k, v in e.datos.items() if k != "encuentro"} if e.tipo == EVENTO_RONDA else e.datos)
+            for e in eventos]
+
+
+@pytest.mark.parametrize("nivel, apuesta", [(1, 0), (5, 100), (9, 500)])
+def test_secuencia_de_eventos_con_semilla(reglas, nivel, apuesta):
+    motor, eventos = _jugar(reglas, nivel, apuesta)
+
+    assert [e.tipo for e in eventos if e.tipo != EVENTO_LOG] == [EVENTO_RONDA] * 3 + [EVENTO_RECOMPENSAS]
+    assert eventos[-1].tipo == EVENTO_RECOMPENSAS
+
+    # Rehacer las mismas tiradas, en el mismo orden, con un random.Random gemelo
+    rng = random.Random(SEMILLA)
+    tier = motor.tier(nivel)
+    descanso = reglas.descanso_corto
+    cordura = reglas.cordura_max
+    moral = reglas.moral_max
+    esperadas = []
+    for ronda in (1, 2, 3):
+        if ronda > 1:
+            moral = min(reglas.moral_max, moral + descanso.moral)
+            cordura = min(reglas.cordura_max, cordura + descanso.expresion_cordura.tirar(rng))
+        tirada = rng.randint(1, 100)
+        esperadas.append({"ronda": ronda, "tirada": tirada, "enemigos": tier.rondas[ronda].entrada(tirada).texto})
+
+    rondas = [e.datos for e in eventos if e.tipo == EVENTO_RONDA]
+    assert [{k: v for k, v in datos.items() if k != "encuentro"} for datos in rondas] == esperadas
+    assert (motor.estado.moral_grupo, motor.estado.cordura) == (moral, cordura)
+
+    recompensa = tier.recompensa
+    ganancia = int(apuesta * recompensa.multiplicador_monedas) if apuesta else 0
+    assert eventos[-1].datos["monedas"] == recompensa.monedas + ganancia
+    assert motor.estado.terminado and not motor.estado.accion_disponible
+
+
+def test_misma_semilla_mismos_eventos(reglas):
+    _, primera = _jugar(reglas, 5, 100)
+    _, segunda = _jugar(reglas, 5, 100)
+    assert _firma(primera) == _firma(segunda)
+    _, otra = _jugar(reglas, 5, 100, semilla=SEMILLA + 1)
+    assert _firma(otra) != _firma(primera)
+
+
+@pytest.mark.parametrize("nivel, apuesta", [(0, 0), (99, 0), (5, -1), (5, 501)])
+def test_iniciar_arena_rechaza_valores_fuera_de_rango(reglas, nivel, apuesta):
+    with pytest.raises(ValueError):
+        ArenaEngine(reglas, rng=random.Random(SEMILLA)).iniciar_arena(nivel, apuesta)
@@ -0,0 +1,89 @@
+import os
+import random
+
+import pytest
+
+from cache_disco import CABECERA, CacheImagenesDisco
+
+TAMAÑO = (4, 3)
+CUBETA = "escala_1.00_dpr_1.00"
+
+
+@pytest.fixture
+def origen(tmp_path):
+    ruta = tmp_path / "pergamino.png"
+    ruta.write_bytes(b"png original")
+    return ruta
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheImagenesDisco(tmp_path / "cache")
+
+
+def _pixeles(semilla=7):
+    rng = random.Random(semilla)
+    return bytes(rng.randrange(256) for _ in range(16 * TAMAÑO[1]))
+
+
+def _guardar(cache, origen, datos):
+    cache.guardar(origen, TAMAÑO, CUBETA, datos, TAMAÑO[0], TAMAÑO[1], 16, 4)
+    return cache._ruta_entrada(origen, TAMAÑO, CUBETA)
+
+
+def test_guardar_y_cargar(cache, origen):
+    datos = _pixeles()
+    _guardar(cache, origen, datos)
+    pixeles, ancho, alto, bpl, formato = cache.cargar(origen, TAMAÑO, CUBETA)
+    assert bytes(pixeles) == datos and (ancho, alto, bpl, formato) == (4, 3, 16, 4)
+    pixeles.release()
+    assert (cache.aciertos, cache.fallos) == (1, 0)
+
+
+def test_entrada_inexistente_es_un_fallo(cache, origen):
+    assert cache.cargar(origen, TAMAÑO, CUBETA) is None
+    assert cache.fallos == 1
+
+
+@pytest.mark.parametrize("recorte", [1, CABECERA.size - 1, CABECERA.size, CABECERA.size + 10])
+def test_entrada_truncada_es_un_fallo_y_se_borra(cache, origen, recorte):
+    ruta = _guardar(cache, origen, _pixeles())
+    ruta.write_bytes(ruta.read_bytes()[:recorte])
+    assert cache.cargar(origen, TAMAÑO, CUBETA) is None
+    assert cache.fallos == 1
+    assert not ruta.exists()
+
+
+def test_cabecera_ajena_es_un_fallo_y_se_borra(cache, origen):
+    ruta = _guardar(cache, origen, _pixeles())
+    contenido = bytearray(ruta.read_bytes())
+    contenido[:4] = b"XXXX"
+    ruta.write_bytes(bytes(contenido))
+    assert cache.cargar(origen, TAMAÑO, CUBETA) is None
+    assert not ruta.exists()
+
+
+def test_origen_modificado_invalida_y_purga_las_entradas(cache, origen):
+    antigua = _guardar(cache, origen, _pixeles())
+    origen.write_bytes(b"png editado, con otro contenido")
+    st = origen.stat()
+    os.utime(origen, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert cache.cargar(origen, TAMAÑO, CUBETA) is None
+    assert not antigua.exists()
+
+    nueva = _guardar(cache, origen, _pixeles(8))
+    assert nueva != antigua
+    pixeles = cache.cargar(origen, TAMAÑO, CUBETA)[0]
+    assert bytes(pixeles) == _pixeles(8)
+    pixeles.release()
+
+
+def test_indice_de_hashes_persistido(tmp_path, cache, origen):
+    digest = cache.hash_origen(origen)
+    cache.guardar_indice()
+    otra = CacheImagenesDisco(tmp_path / "cache")
+    indice = otra._cargar_indice()
+    assert indice[str(origen)][2] == digest
+    assert otra.hash_origen(origen) == digest
+    assert not otra._indice_modificado
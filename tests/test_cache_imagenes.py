@@ -0,0 +1,78 @@
+import random
+
+from cache_imagenes import CacheLRU
+
+
+def _cache(presupuesto=100):
+    return CacheLRU(presupuesto, coste=len)
+
+
+def test_expulsa_la_menos_usada_al_superar_el_presupuesto():
+    cache = _cache()
+    cache.guardar("a", b"x" * 40)
+    cache.guardar("b", b"x" * 40)
+    # Usar "a" la convierte en la más reciente: al llenarse se expulsa "b"
+    assert cache.obtener("a") == b"x" * 40
+    cache.guardar("c", b"x" * 40)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.bytes_usados == 80
+    assert cache.expulsiones == 1
+
+
+def test_reemplazar_una_clave_no_cuenta_su_coste_dos_veces():
+    cache = _cache()
+    cache.guardar("a", b"x" * 60)
+    cache.guardar("a", b"x" * 30)
+    assert cache.bytes_usados == 30
+    assert len(cache) == 1 and cache.expulsiones == 0
+
+
+def test_valor_mayor_que_el_presupuesto_no_se_cachea():
+    cache = _cache()
+    cache.guardar("a", b"x" * 10)
+    valor = b"x" * 101
+    assert cache.guardar("grande", valor) is valor
+    assert "grande" not in cache and "a" in cache
+    assert cache.bytes_usados == 10
+
+
+def test_invalidar_con_predicado():
+    cache = _cache()
+    for clave in ("fondo.png", "boton.png", "fondo@2x.png"):
+        cache.guardar(clave, b"x" * 10)
+    cache.invalidar(lambda clave: clave.startswith("fondo"))
+    assert list(cache._entradas) == ["boton.png"]
+    assert cache.bytes_usados == 10
+    cache.invalidar()
+    assert len(cache) == 0 and cache.bytes_usados == 0
+
+
+def test_secuencia_aleatoria_respeta_presupuesto_y_orden_lru():
+    rng = random.Random(1234)
+    cache = _cache(presupuesto=500)
+    # Modelo de referencia: claves de la más antigua a la más reciente
+    orden, costes = [], {}
+    for _ in range(2000):
+        clave = rng.randrange(40)
+        if rng.random() < 0.5:
+            valor = b"x" * rng.randint(1, 120)
+            cache.guardar(clave, valor)
+            if clave in orden:
+                orden.remove(clave)
+            orden.append(clave)
+            costes[clave] = len(valor)
+            while sum(costes[c] for c in orden) > 500:
+                orden.pop(0)
+        else:
+            encontrado = cache.obtener(clave)
+            assert (encontrado is not None) == (clave in orden)
+            if encontrado is not None:
+                assert len(encontrado) == costes[clave]
+                orden.remove(clave)
+                orden.append(clave)
+        assert cache.bytes_usados <= 500
+        assert list(cache._entradas) == orden
+
+    estadisticas = cache.estadisticas()
+    assert estadisticas["aciertos"] + estadisticas["fallos"] == cache.aciertos + cache.fallos
+    assert estadisticas["bytes_usados"] == sum(costes[c] for c in orden)
@@ -0,0 +1,100 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import catalogo_encuentros
+from catalogo_encuentros import cargar_catalogo
+
+ENCUENTROS_DIR = Path(__file__).resolve().parent.parent / "assets" / "data" / "encuentros"
+
+
+@pytest.fixture
+def encuentros(tmp_path):
+    return Path(shutil.copytree(ENCUENTROS_DIR, tmp_path / "datos" / "encuentros"))
+
+
+@pytest.fixture
+def compilaciones(monkeypatch):
+    """Contar las veces que se compila el catálogo en lugar de leerse de la caché"""
+    llamadas = []
+    original = catalogo_encuentros.compilar_catalogo
+
+    def compilar(encuentros_dir, paquete=None):
+        llamadas.append(Path(encuentros_dir))
+        return original(encuentros_dir, paquete)
+    monkeypatch.setattr(catalogo_encuentros, "compilar_catalogo", compilar)
+    return llamadas
+
+
+def _instantaneas(cache):
+    return sorted(p.name for p in (cache / "catalogo").glob("*.pickle"))
+
+
+def _editar_primer_encuentro(encuentros, texto):
+    ruta = encuentros / "nivel_1_2.json"
+    datos = json.loads(ruta.read_text(encoding="utf-8"))
+    datos["ronda_1"][0]["enemigos"] = texto
+    ruta.write_text(json.dumps(datos, ensure_ascii=False), encoding="utf-8")
+
+
+def test_segunda_carga_desde_la_caché(tmp_path, encuentros, compilaciones):
+    cache = tmp_path / "cache"
+    primero = cargar_catalogo(encuentros, directorio_cache=cache)
+    segundo = cargar_catalogo(encuentros, directorio_cache=cache)
+    assert len(compilaciones) == 1
+    assert len(_instantaneas(cache)) == 1
+    assert segundo["nivel_1_2.json"]["ronda_1"].entrada(1).texto == primero["nivel_1_2.json"]["ronda_1"].entrada(1).texto
+
+
+def test_editar_un_json_invalida_la_caché(tmp_path, encuentros, compilaciones):
+    cache = tmp_path / "cache"
+    cargar_catalogo(encuentros, directorio_cache=cache)
+    antes = _instantaneas(cache)
+
+    _editar_primer_encuentro(encuentros, "2 Orcos (Hacha)")
+    catalogo = cargar_catalogo(encuentros, directorio_cache=cache)
+    assert len(compilaciones) == 2
+    assert catalogo["nivel_1_2.json"]["ronda_1"].entrada(1).texto == "2 Orcos (Hacha)"
+    # La instantánea antigua del mismo origen se sustituye
+    despues = _instantaneas(cache)
+    assert len(despues) == 1 and despues != antes
+
+
+def test_editar_los_monstruos_invalida_la_caché(tmp_path, encuentros, compilaciones):
+    cache = tmp_path / "cache"
+    cargar_catalogo(encuentros, directorio_cache=cache)
+    ruta = encuentros / catalogo_encuentros.ARCHIVO_MONSTRUOS
+    ruta.write_text(ruta.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    cargar_catalogo(encuentros, directorio_cache=cache)
+    assert len(compilaciones) == 2
+
+
+def test_origenes_distintos_no_se_pisan(tmp_path, encuentros, compilaciones):
+    cache = tmp_path / "cache"
+    otro = Path(shutil.copytree(encuentros, tmp_path / "otra_copia" / "encuentros"))
+    _editar_primer_encuentro(otro, "1 Ogro (Garrote)")
+
+    cargar_catalogo(encuentros, directorio_cache=cache)
+    cargar_catalogo(otro, directorio_cache=cache)
+    assert len(_instantaneas(cache)) == 2
+    # Volver al primero no recompila: su instantánea sigue ahí
+    cargar_catalogo(encuentros, directorio_cache=cache)
+    cargar_catalogo(otro, directorio_cache=cache)
+    assert len(compilaciones) == 2
+
+
+def test_instantánea_dañada_se_recompila(tmp_path, encuentros, compilaciones, capsys):
+    cache = tmp_path / "cache"
+    cargar_catalogo(encuentros, directorio_cache=cache)
+    (ruta,) = (cache / "catalogo").glob("*.pickle")
+    ruta.write_bytes(b"no es un pickle")
+
+    catalogo = cargar_catalogo(encuentros, directorio_cache=cache)
+    assert len(compilaciones) == 2
+    assert "Error leyendo la caché del catálogo de encuentros" in capsys.readouterr().out
+    assert set(catalogo) == {ruta.name for ruta in encuentros.glob("nivel_*.json")}
+    # Y la instantánea vuelve a ser válida
+    cargar_catalogo(encuentros, directorio_cache=cache)
+    assert len(compilaciones) == 2
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+import dados
+
+
+@pytest.mark.parametrize("texto, minimo, maximo", [
+    ("1d3", 1, 3),
+    ("1d4+1", 2, 5),
+    ("2d6 - 1", 1, 11),
+    ("4d6kh3", 3, 18),
+    ("2d20kl1", 1, 20),
+    ("d8", 1, 8),
+    ("2", 2, 2),
+    ("2-5", 2, 5),
+    ("-1d4", -4, -1),
+])
+def test_compilar_rangos(texto, minimo, maximo):
+    expresion = dados.compilar(texto)
+    assert (expresion.minimo, expresion.maximo) == (minimo, maximo)
+    distribucion = expresion.distribucion()
+    assert (min(distribucion), max(distribucion)) == (minimo, maximo)
+    assert sum(distribucion.values()) == 1
+
+
+@pytest.mark.parametrize("texto", ["", "d", "1d0", "0d6", "3d6kh4", "2d6kh0", "1d6 2", "1d6+", "5-2", "xd6"])
+def test_compilar_rechaza_expresiones_invalidas(texto):
+    with pytest.raises(ValueError):
+        dados.compilar(texto)
+
+
+def test_compilar_cachea_por_texto():
+    assert dados.compilar("1d4+1") is dados.compilar("1d4+1")
+
+
+@pytest.mark.parametrize("texto", ["1d3", "1d4+1", "3d6", "4d6kh3", "2d20kl1", "2-5", "1d6-1d4"])
+def test_tirar_dentro_de_rango(texto):
+    rng = random.Random(1234)
+    expresion = dados.compilar(texto)
+    tiradas = [expresion.tirar(rng) for _ in range(2000)]
+    assert min(tiradas) >= expresion.minimo
+    assert max(tiradas) <= expresion.maximo
+    # Con 2000 tiradas aparecen todos los valores posibles
+    assert set(tiradas) == set(expresion.distribucion())
+
+
+def test_tirar_consume_una_llamada_por_dado():
+    expresion = dados.compilar("4d6kh3+2")
+    assert expresion.tiradas == 4
+    rng = random.Random(7)
+    esperado = random.Random(7)
+    valores = sorted((esperado.randint(1, 6) for _ in range(4)), reverse=True)
+    assert expresion.tirar(rng) == sum(valores[:3]) + 2
+    assert rng.random() == esperado.random()
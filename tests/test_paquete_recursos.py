@@ -0,0 +1,118 @@
+import hashlib
+import json
+import random
+
+import pytest
+
+from paquete_recursos import ALINEACION, CABECERA, PaqueteRecursos, construir
+
+
+@pytest.fixture
+def assets(tmp_path):
+    rng = random.Random(321)
+    raiz = tmp_path / "assets"
+    archivos = {
+        "imagenes/fondo.png": rng.randbytes(5000),
+        "imagenes/botones/btn_ronda.png": rng.randbytes(333),
+        "audio/musica_fondo.mp3": rng.randbytes(70_001),
+        "data/estados.json": b'{"limites": {"moral_max": 10}}',
+        "tokens/goblin.png": b"",
+        "imagenes/reglas.pdf": rng.randbytes(100),
+    }
+    for relativa, datos in archivos.items():
+        ruta = raiz / relativa
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_bytes(datos)
+    construir(raiz, tmp_path / "assets.pak")
+    return raiz, archivos
+
+
+def _abrir(assets):
+    raiz, _ = assets
+    return PaqueteRecursos(raiz, raiz.parent / "assets.pak")
+
+
+def _indice(ruta_paquete):
+    contenido = ruta_paquete.read_bytes()
+    _, _, _, longitud = CABECERA.unpack_from(contenido, 0)
+    return json.loads(contenido[CABECERA.size:CABECERA.size + longitud])
+
+
+def test_indice_con_hash_alineacion_y_firma(assets):
+    raiz, archivos = assets
+    indice = _indice(raiz.parent / "assets.pak")
+    # El PDF se queda como archivo suelto
+    assert set(indice["archivos"]) == set(archivos) - {"imagenes/reglas.pdf"}
+    for relativa, (desplazamiento, tamaño, digest, mtime_ns, tamaño_disco) in indice["archivos"].items():
+        estado = (raiz / relativa).stat()
+        assert desplazamiento % ALINEACION == 0
+        assert tamaño == tamaño_disco == len(archivos[relativa])
+        assert digest == hashlib.sha1(archivos[relativa]).hexdigest()
+        assert mtime_ns == estado.st_mtime_ns
+
+
+def test_vista_leer_y_hash_desde_el_paquete(assets):
+    raiz, archivos = assets
+    paquete = _abrir(assets)
+    assert paquete.disponible
+    for relativa, datos in archivos.items():
+        assert paquete.leer(raiz / relativa) == datos
+        assert paquete.existe(raiz / relativa)
+    vista = paquete.vista(raiz / "audio/musica_fondo.mp3")
+    assert isinstance(vista, memoryview) and bytes(vista) == archivos["audio/musica_fondo.mp3"]
+    vista.release()
+    assert paquete.hash(raiz / "data/estados.json") == hashlib.sha1(archivos["data/estados.json"]).hexdigest()
+    assert paquete.vista(raiz / "imagenes/reglas.pdf") is None
+    assert paquete.hash(raiz / "imagenes/reglas.pdf") is None
+
+
+def test_archivo_editado_despues_de_empaquetar_se_lee_suelto(assets):
+    raiz, archivos = assets
+    ruta = raiz / "data/estados.json"
+    ruta.write_bytes(b'{"limites": {"moral_max": 120}}')
+    paquete = _abrir(assets)
+    assert paquete.disponible
+    assert paquete.leer(ruta) == b'{"limites": {"moral_max": 120}}'
+    assert paquete.hash(ruta) is None
+    assert paquete.desactualizados == {"data/estados.json"}
+    # El resto sigue saliendo del paquete
+    assert paquete.vista(raiz / "imagenes/fondo.png") is not None
+
+
+def test_directorio_cambiado_desactiva_el_paquete(assets):
+    raiz, archivos = assets
+    (raiz / "imagenes" / "nuevo.png").write_bytes(b"nuevo")
+    paquete = _abrir(assets)
+    assert not paquete.disponible
+    assert paquete.leer(raiz / "imagenes/fondo.png") == archivos["imagenes/fondo.png"]
+
+
+def test_cabecera_desconocida_desactiva_el_paquete(assets):
+    raiz, _ = assets
+    ruta_paquete = raiz.parent / "assets.pak"
+    contenido = bytearray(ruta_paquete.read_bytes())
+    contenido[:4] = b"NOPE"
+    ruta_paquete.write_bytes(bytes(contenido))
+    assert not _abrir(assets).disponible
+
+
+def test_verificacion_detecta_recursos_dañados(assets):
+    raiz, archivos = assets
+    ruta_paquete = raiz.parent / "assets.pak"
+    indice = _indice(ruta_paquete)
+    longitud = CABECERA.unpack_from(ruta_paquete.read_bytes(), 0)[3]
+    inicio_datos = -(-(CABECERA.size + longitud) // ALINEACION) * ALINEACION
+    desplazamiento = indice["archivos"]["imagenes/fondo.png"][0]
+
+    contenido = bytearray(ruta_paquete.read_bytes())
+    contenido[inicio_datos + desplazamiento] ^= 0xFF
+    ruta_paquete.write_bytes(bytes(contenido))
+
+    paquete = _abrir(assets)
+    paquete.verificar_en_segundo_plano()
+    paquete._verificador.join(timeout=30)
+    assert paquete.corruptos == {"imagenes/fondo.png"}
+    assert paquete.verificados == len(indice["archivos"])
+    # Dañado: se sirve desde el archivo suelto
+    assert paquete.vista(raiz / "imagenes/fondo.png") is None
+    assert paquete.leer(raiz / "imagenes/fondo.png") == archivos["imagenes/fondo.png"]
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from registro_eventos import RegistroEventos
+
+TAGS = ("titulo", "efecto", "heroico", "deshonroso", "critical", None)
+
+
+def _llenar(registro, n, semilla=99):
+    rng = random.Random(semilla)
+    referencia = []
+    for i in range(n):
+        mensaje = f"Mensaje {i} " + "x" * rng.randrange(60)
+        tag = rng.choice(TAGS)
+        registro.agregar(mensaje, tag)
+        referencia.append((mensaje, tag or registro.tag_por_defecto))
+    return referencia
+
+
+def test_sella_bloques_por_tamaño_y_su_html_no_cambia():
+    registro = RegistroEventos(retencion=10_000, bytes_bloque=500)
+    _llenar(registro, 200)
+    sellados = registro._bloques[:-1]
+    assert len(sellados) > 5
+    assert all(bloque.bytes >= 500 for bloque in sellados)
+    html = {primero: texto for primero, texto in registro.bloques_html()}
+    registro.agregar("uno más", "efecto")
+    # Los bloques sellados devuelven el mismo objeto de texto: nada que reenviar
+    for primero, texto in registro.bloques_html()[:len(sellados)]:
+        assert texto is html[primero]
+
+
+def test_retencion_descarta_bloques_sellados_antiguos():
+    registro = RegistroEventos(retencion=100, bytes_bloque=300)
+    referencia = _llenar(registro, 1000)
+    assert registro.total == 1000
+    assert 100 <= len(registro) < 100 + max(len(b.mensajes) for b in registro._bloques) + 1
+    assert registro.descartados == registro.primero == 1000 - len(registro)
+    # Lo retenido es exactamente la cola de lo que se añadió
+    assert list(registro.entradas()) == referencia[registro.primero:]
+    assert [(e["mensaje"], e["tag"]) for e in registro] == referencia[registro.primero:]
+
+
+def test_entradas_por_indice_absoluto():
+    registro = RegistroEventos(retencion=300, bytes_bloque=400)
+    referencia = _llenar(registro, 800)
+    rng = random.Random(5)
+    for _ in range(200):
+        desde, hasta = sorted(rng.randrange(-10, 820) for _ in range(2))
+        esperado = referencia[max(desde, registro.primero):min(hasta, registro.total)]
+        assert list(registro.entradas(desde, hasta)) == esperado
+
+
+def test_ventana_y_ocultas_para_paginar():
+    registro = RegistroEventos(retencion=10_000, bytes_bloque=300)
+    _llenar(registro, 500)
+    visibles = registro.bloques_html(ventana=50)
+    mostradas = sum(len(b.mensajes) for b in registro._bloques if b.primero >= visibles[0][0])
+    # La ventana se redondea a bloques completos, los más recientes
+    assert 50 <= mostradas < 50 + max(len(b.mensajes) for b in registro._bloques)
+    assert visibles[-1][0] == max(b.primero for b in registro._bloques if b.mensajes)
+    assert registro.ocultas(50) == len(registro) - mostradas
+    # "Mostrar anteriores": ampliar la ventana reduce las ocultas hasta cero
+    assert registro.ocultas(100) < registro.ocultas(50)
+    assert registro.ocultas(len(registro)) == 0
+    assert registro.bloques_html(ventana=len(registro)) == registro.bloques_html()
+
+
+def test_limpiar_conserva_los_indices_absolutos():
+    registro = RegistroEventos(bytes_bloque=200)
+    _llenar(registro, 50)
+    registro.limpiar()
+    assert len(registro) == 0 and registro.primero == 50
+    assert registro.bloques_html() == []
+    registro.agregar("nuevo torneo", "titulo")
+    assert list(registro.entradas(50, 51)) == [("nuevo torneo", "titulo")]
+
+
+def test_html_escapa_saltos_de_linea_con_la_clase_del_tag():
+    registro = RegistroEventos()
+    registro.agregar("\n=== RONDA 1 ===", "ronda")
+    registro.agregar("sin tag")
+    assert registro.bloques_html() == [(0, '<p class="ronda"><br>=== RONDA 1 ===</p><p class="efecto">sin tag</p>')]
+
+
+def test_demasiados_tags_distintos():
+    registro = RegistroEventos()
+    for i in range(255):
+        registro.agregar("m", f"tag{i}")
+    with pytest.raises(ValueError):
+        registro.agregar("m", "uno de más")
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from simulador import SimuladorArena, reproducir_en_motor, verificar_contra_motor
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "assets" / "data"
+SEMILLA = 12345
+
+
+@pytest.fixture(scope="module")
+def simulador(tmp_path_factory):
+    # Instantáneas de la configuración en un directorio temporal, no en la caché del usuario
+    with pytest.MonkeyPatch.context() as parche:
+        parche.setenv("ARENA_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+        yield SimuladorArena(DATA_DIR)
+
+
+@pytest.mark.parametrize("nivel", [1, 3, 5, 7, 10])
+@pytest.mark.parametrize("politica", [(0.5, 0.3), (1.0, 0.0), (0.0, 1.0)])
+def test_coincide_partida_a_partida_con_el_motor(simulador, nivel, politica):
+    resultado = simulador.simular(nivel, 3000, semilla=SEMILLA, politica=politica)
+    assert verificar_contra_motor(resultado, muestras=25, data_dir=DATA_DIR) == 25
+
+
+def test_pagos_y_trayectorias_de_una_partida(simulador):
+    resultado = simulador.simular(5, 200, semilla=SEMILLA)
+    for apuesta in (0, 100):
+        motor, moral, cordura, encuentros = reproducir_en_motor(resultado, 7, apuesta, DATA_DIR)
+        assert motor.estado.terminado
+        assert motor.estado.recompensas["monedas"] == resultado.pagos[apuesta]
+        assert moral == resultado.moral[7].tolist()
+        assert cordura == resultado.cordura[7].tolist()
+
+
+def test_limites_de_moral_y_cordura(simulador):
+    reglas = simulador.reglas
+    resultado = simulador.simular(3, 5000, semilla=SEMILLA)
+    assert resultado.moral.min() >= 0 and resultado.moral.max() <= reglas.moral_max
+    assert resultado.cordura.min() >= 0 and resultado.cordura.max() <= reglas.cordura_max
+
+
+def test_frecuencia_de_encuentros_sigue_los_rangos_d100(simulador):
+    resultado = simulador.simular(1, 40_000, semilla=SEMILLA)
+    tier = simulador.reglas.tier_por_nivel[1]
+    for ronda in (1, 2, 3):
+        tabla = tier.rondas[ronda]
+        frecuencias = np.bincount(resultado.encuentros[:, ronda - 1], minlength=len(tabla)) / resultado.partidas
+        for indice, entrada in enumerate(tabla.entradas):
+            minimo, maximo = (int(v) for v in entrada.rango.split("-"))
+            assert frecuencias[indice] == pytest.approx((maximo - minimo + 1) / 100, abs=0.015)
+
+
+def test_misma_semilla_mismo_resultado(simulador):
+    primero = simulador.simular(7, 1000, semilla=SEMILLA)
+    segundo = simulador.simular(7, 1000, semilla=SEMILLA)
+    assert np.array_equal(primero.tiradas, segundo.tiradas)
+    assert np.array_equal(primero.moral, segundo.moral)
+    assert np.array_equal(primero.cordura, segundo.cordura)
+    assert np.array_equal(primero.bonificaciones_criticas, segundo.bonificaciones_criticas)
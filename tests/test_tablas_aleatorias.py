@@ -0,0 +1,70 @@
+import random
+from collections import Counter
+
+import pytest
+
+from tablas_aleatorias import TablaD100, TablaPonderada
+
+
+def _tabla(*rangos):
+    return TablaD100([{"rango": rango, "enemigos": f"E{i}"} for i, rango in enumerate(rangos)])
+
+
+def test_tabla_d100_cubre_todas_las_tiradas():
+    tabla = _tabla("1-10", "11-60", "61-99", "100-100")
+    assert [tabla.indices[t] for t in (1, 10, 11, 60, 61, 99, 100)] == [0, 0, 1, 1, 2, 2, 3]
+    rng = random.Random(42)
+    for _ in range(500):
+        tirada, entrada = tabla.tirar(rng)
+        assert entrada is tabla.entrada(tirada)
+
+
+@pytest.mark.parametrize("rangos, mensaje", [
+    (("1-50", "52-100"), "tirada sin encuentro: 51"),
+    (("1-40", "61-100"), "tiradas sin encuentro: 41-60"),
+    (("1-50", "50-100"), "la tirada 50 está en más de un rango"),
+    (("1-60", "40-100"), "la tirada 40 está en más de un rango"),
+    (("0-50", "51-100"), "se sale de 1-100"),
+    (("1-50", "51-101"), "se sale de 1-100"),
+    (("1-50", "100-51"), "Rango invertido"),
+    (("1-50", "51"), "Rango inválido"),
+])
+def test_tabla_d100_rechaza_huecos_y_solapes(rangos, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        _tabla(*rangos)
+
+
+@pytest.mark.parametrize("pesos", [[1, 2, 3, 4], [5, 1, 1], [0, 3, 1, 0, 6], [0.1, 0.7, 0.2]])
+def test_alias_reproduce_los_pesos_exactos(pesos):
+    tabla = TablaPonderada(list("abcde")[:len(pesos)], pesos)
+    n, total = len(pesos), sum(pesos)
+    # Probabilidad de cada entrada según las tablas de probabilidades y alias
+    masa = list(tabla.probabilidades)
+    for j in range(n):
+        masa[tabla.alias[j]] += 1.0 - tabla.probabilidades[j]
+    for i in range(n):
+        assert masa[i] / n == pytest.approx(pesos[i] / total)
+
+
+def test_alias_muestreo_con_semilla():
+    pesos = [1, 2, 3, 4]
+    tabla = TablaPonderada(list("abcd"), pesos)
+    rng = random.Random(2024)
+    muestras = 40_000
+    cuentas = Counter(tabla.tirar(rng) for _ in range(muestras))
+    for entrada, peso in zip("abcd", pesos):
+        assert cuentas[entrada] / muestras == pytest.approx(peso / 10, abs=0.01)
+
+
+def test_uniforme_consume_como_random_choice():
+    entradas = list("abcdef")
+    tabla = TablaPonderada(entradas, [2] * 6)
+    assert tabla.uniforme
+    rng, referencia = random.Random(9), random.Random(9)
+    assert [tabla.tirar(rng) for _ in range(50)] == [referencia.choice(entradas) for _ in range(50)]
+
+
+@pytest.mark.parametrize("entradas, pesos", [([], None), (["a", "b"], [1]), (["a"], [-1]), (["a", "b"], [0, 0])])
+def test_ponderada_rechaza_pesos_invalidos(entradas, pesos):
+    with pytest.raises(ValueError):
+        TablaPonderada(entradas, pesos)
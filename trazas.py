@@ -0,0 +1,146 @@
+"""Trazas opcionales de los caminos calientes, exportables como Chrome trace.
+
+Se activan con la variable de entorno ARENA_TRAZA (1 o la ruta del .json) o,
+en la aplicación de escritorio, con el argumento --traza[=ruta]. Cada función
+decorada con @span registra un evento completo ("ph": "X") con su inicio y su
+duración; los anidados quedan dentro de su padre por tiempo, así que el JSON
+se abre tal cual como flame chart en chrome://tracing, Perfetto o speedscope.
+
+Con las trazas desactivadas @span devuelve la misma función, sin envoltorio:
+coste cero. Las funciones decoradas quedan registradas y activar() las
+sustituye en su clase o módulo, por si la activación llega después de
+importarlas (el argumento de línea de órdenes se lee en main()).
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+VARIABLE_ENTORNO = "ARENA_TRAZA"
+ARGUMENTO = "--traza"
+# Eventos que se conservan como mucho (los más antiguos se descartan)
+MAX_EVENTOS = 1_000_000
+
+activo = False
+ruta_salida = None
+_eventos = deque(maxlen=MAX_EVENTOS)
+# (módulo, nombre cualificado) -> (función original, nombre del tramo)
+_registradas = {}
+_guardado_registrado = False
+
+
+def _envolver(funcion, nombre):
+    codigo = getattr(funcion, "__code__", None)
+    # Como hace PyQt con los slots: no pasar más posicionales de los que acepta
+    # (clicked(bool) conectado a un método sin argumentos)
+    maximo = None
+    if codigo is not None and not codigo.co_flags & 0x04:
+        maximo = codigo.co_argcount
+    categoria = funcion.__module__
+    reloj = time.perf_counter_ns
+    eventos = _eventos
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if maximo is not None and len(args) > maximo:
+            args = args[:maximo]
+        inicio = reloj()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            eventos.append((nombre, categoria, inicio, reloj() - inicio, threading.get_ident()))
+    envoltura.__traza__ = nombre
+    return envoltura
+
+
+def span(nombre=None):
+    """Decorador que registra cada llamada como un tramo de la traza.
+
+    Se puede usar como @span o @span("nombre"); por defecto el nombre es el
+    nombre cualificado de la función (ArenaApp.cargar_imagen).
+    """
+    if callable(nombre):
+        return span()(nombre)
+
+    def decorador(funcion):
+        tramo = nombre or funcion.__qualname__
+        _registradas[(funcion.__module__, funcion.__qualname__)] = (funcion, tramo)
+        return _envolver(funcion, tramo) if activo else funcion
+    return decorador
+
+
+def activar(ruta=None):
+    """Empezar a trazar y guardar la traza en `ruta` al salir del proceso"""
+    global activo, ruta_salida, _guardado_registrado
+    ruta_salida = ruta or ruta_salida or f"traza-{os.getpid()}.json"
+    if not activo:
+        activo = True
+        # Envolver también las funciones decoradas antes de activar
+        for (modulo, nombre_cualificado), (funcion, nombre) in list(_registradas.items()):
+            _instalar(modulo, nombre_cualificado, funcion, nombre)
+    if not _guardado_registrado:
+        atexit.register(guardar)
+        _guardado_registrado = True
+
+
+def _instalar(modulo, nombre_cualificado, funcion, nombre):
+    dueño = sys.modules.get(modulo)
+    *ruta, atributo = nombre_cualificado.split(".")
+    for parte in ruta:
+        if dueño is None or parte == "<locals>":
+            return
+        dueño = getattr(dueño, parte, None)
+    if dueño is not None and getattr(dueño, atributo, None) is funcion:
+        setattr(dueño, atributo, _envolver(funcion, nombre))
+
+
+def activar_desde_argumentos(argv):
+    """Activar si argv lleva --traza[=ruta]; devuelve argv sin ese argumento"""
+    restantes = []
+    for argumento in argv:
+        if argumento == ARGUMENTO:
+            activar()
+        elif argumento.startswith(ARGUMENTO + "="):
+            activar(argumento.split("=", 1)[1])
+        else:
+            restantes.append(argumento)
+    return restantes
+
+
+def eventos_chrome():
+    """Eventos en formato Chrome trace (microsegundos)"""
+    pid = os.getpid()
+    eventos = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": hilo.ident, "args": {"name": hilo.name}}
+               for hilo in threading.enumerate()]
+    for nombre, categoria, inicio, duracion, tid in list(_eventos):
+        eventos.append({"name": nombre, "cat": categoria, "ph": "X", "pid": pid, "tid": tid,
+                        "ts": inicio / 1000, "dur": duracion / 1000})
+    return eventos
+
+
+def guardar(ruta=None):
+    """Escribir la traza en JSON; devuelve la ruta o None si no hay nada que guardar"""
+    ruta = ruta or ruta_salida
+    if ruta is None or not _eventos:
+        return None
+    try:
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": eventos_chrome(), "displayTimeUnit": "ms"}, f)
+        print(f"Traza guardada en {ruta} ({len(_eventos)} tramos)")
+        return ruta
+    except OSError as e:
+        print(f"Error guardando la traza: {e}")
+        return None
+
+
+def limpiar():
+    _eventos.clear()
+
+
+_valor_entorno = os.environ.get(VARIABLE_ENTORNO, "")
+if _valor_entorno and _valor_entorno != "0":
+    activar(None if _valor_entorno == "1" else _valor_entorno)
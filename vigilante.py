@@ -0,0 +1,173 @@
+"""Vigilante de bloqueos del bucle de eventos de Qt.
+
+Un hilo aparte envía un latido al hilo principal (una señal encolada) y espera
+la respuesta. Si el bucle de eventos tarda más de `umbral_ms` en contestar,
+toma muestras de la pila de Python del hilo principal con sys._current_frames()
+hasta que vuelve a responder, y escribe un informe JSON con las pilas más
+frecuentes y el método de ArenaApp que se estaba ejecutando (el más interno de
+la pila), además de una línea resumen por consola.
+
+Se activa con la variable de entorno ARENA_VIGILANTE (1 o el umbral en ms) o
+con el argumento --vigilante[=ms]. Desactivado no hay hilo ni latidos.
+"""
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from cache_disco import directorio_cache_predeterminado
+
+VARIABLE_ENTORNO = "ARENA_VIGILANTE"
+ARGUMENTO = "--vigilante"
+UMBRAL_POR_DEFECTO_MS = 500
+# Informes que se conservan en el directorio de bloqueos
+MAX_INFORMES = 50
+
+
+def _leer_umbral(texto, origen):
+    """Umbral en ms de la configuración; uno mal escrito no debe impedir el arranque"""
+    try:
+        umbral = float(texto)
+    except ValueError:
+        umbral = None
+    if umbral is None or not math.isfinite(umbral) or umbral <= 0:
+        print(f"Umbral del vigilante inválido en {origen}: {texto!r}; se usa {UMBRAL_POR_DEFECTO_MS} ms")
+        return UMBRAL_POR_DEFECTO_MS
+    return umbral
+
+
+def umbral_configurado(argv):
+    """(argv sin --vigilante, umbral en ms o None si el vigilante está desactivado)"""
+    umbral = None
+    valor = os.environ.get(VARIABLE_ENTORNO, "")
+    if valor and valor != "0":
+        umbral = UMBRAL_POR_DEFECTO_MS if valor == "1" else _leer_umbral(valor, VARIABLE_ENTORNO)
+
+    restantes = []
+    for argumento in argv:
+        if argumento == ARGUMENTO:
+            umbral = umbral or UMBRAL_POR_DEFECTO_MS
+        elif argumento.startswith(ARGUMENTO + "="):
+            umbral = _leer_umbral(argumento.split("=", 1)[1], ARGUMENTO)
+        else:
+            restantes.append(argumento)
+    return restantes, umbral
+
+
+class VigilanteBloqueos(QObject):
+    """Detecta bloqueos del bucle de eventos y muestrea la pila del hilo principal"""
+
+    _latido = pyqtSignal(float)
+
+    def __init__(self, umbral_ms=UMBRAL_POR_DEFECTO_MS, intervalo_ms=250, periodo_muestreo_ms=10,
+                 directorio=None, prefijo_responsable="ArenaApp."):
+        super().__init__()
+        self.umbral = umbral_ms / 1000
+        self.intervalo = intervalo_ms / 1000
+        self.periodo_muestreo = periodo_muestreo_ms / 1000
+        self.directorio = Path(directorio or directorio_cache_predeterminado()) / "bloqueos"
+        self.prefijo_responsable = prefijo_responsable
+
+        # Se crea en el hilo principal: es el hilo que hay que vigilar
+        self._hilo_principal = threading.get_ident()
+        self._respuesta = threading.Event()
+        self._parar = threading.Event()
+        self._hilo = None
+        self._latido.connect(self._responder)
+
+        self.latencia_ms = 0.0
+        self.latencia_maxima_ms = 0.0
+        self.bloqueos = 0
+        self.ultimo_informe = None
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._vigilar, name="vigilante-bloqueos", daemon=True)
+            self._hilo.start()
+        return self
+
+    def detener(self):
+        self._parar.set()
+        self._respuesta.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=1.0)
+            self._hilo = None
+
+    def _responder(self, enviado):
+        # Hilo principal: el bucle de eventos ha procesado el latido
+        self.latencia_ms = (time.monotonic() - enviado) * 1000
+        self.latencia_maxima_ms = max(self.latencia_maxima_ms, self.latencia_ms)
+        self._respuesta.set()
+
+    # ----- hilo del vigilante -----
+
+    def _vigilar(self):
+        while not self._parar.wait(self.intervalo):
+            enviado = time.monotonic()
+            self._respuesta.clear()
+            try:
+                self._latido.emit(enviado)
+            except RuntimeError:
+                # El QObject ya se destruyó (la aplicación se está cerrando)
+                return
+            if self._respuesta.wait(self.umbral) or self._parar.is_set():
+                continue
+
+            pilas, responsables = self._muestrear()
+            if self._parar.is_set():
+                return
+            try:
+                self._informar(time.monotonic() - enviado, pilas, responsables)
+            except Exception as e:
+                print(f"Error escribiendo el informe de bloqueo: {e}")
+
+    def _muestrear(self):
+        """Muestras de la pila del hilo principal hasta que vuelva a responder"""
+        pilas, responsables = Counter(), Counter()
+        while not self._respuesta.wait(self.periodo_muestreo):
+            marco = sys._current_frames().get(self._hilo_principal)
+            pila, responsable = [], None
+            while marco is not None:
+                codigo = marco.f_code
+                nombre = getattr(codigo, "co_qualname", codigo.co_name)
+                pila.append(f"{nombre} ({Path(codigo.co_filename).name}:{marco.f_lineno})")
+                if responsable is None and nombre.startswith(self.prefijo_responsable):
+                    responsable = nombre
+                marco = marco.f_back
+            del marco
+            if pila:
+                pilas[tuple(pila)] += 1
+                responsables[responsable] += 1
+        return pilas, responsables
+
+    def _informar(self, duracion, pilas, responsables):
+        self.bloqueos += 1
+        muestras = sum(pilas.values())
+        responsable = next((nombre for nombre, _ in responsables.most_common() if nombre), None)
+        informe = {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duracion_ms": round(duracion * 1000, 1),
+            "umbral_ms": round(self.umbral * 1000),
+            "responsable": responsable,
+            "muestras": muestras,
+            "responsables": {nombre or "(fuera de ArenaApp)": veces for nombre, veces in responsables.most_common()},
+            # Del marco más interno al más externo
+            "pilas": [{"muestras": veces, "pila": list(pila)} for pila, veces in pilas.most_common(10)],
+        }
+
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta = self.directorio / f"bloqueo-{time.strftime('%Y%m%d-%H%M%S')}-{self.bloqueos}.json"
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        for antiguo in sorted(self.directorio.glob("bloqueo-*.json"), key=os.path.getmtime)[:-MAX_INFORMES]:
+            antiguo.unlink()
+
+        self.ultimo_informe = informe
+        print(f"Bloqueo del bucle de eventos de {informe['duracion_ms']:.0f} ms en "
+              f"{responsable or 'código fuera de ArenaApp'} ({muestras} muestras): {ruta}")